@@ -0,0 +1,5 @@
+"""Converter of IFC to FENIA and OpenFOAM files
+
+Depends on ifc2gmsh (inventory, profiler, cache and extraction of model
+shared with its converters), so both packages of src are needed.
+"""
@@ -1,11 +1,31 @@
 import argparse
 from ifc2fenia.main import main
+from ifc2gmsh.cache import DEFAULT_CACHE_PATH
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--file_path')
-    parser.add_argument('--output_dir_path')
+    parser.add_argument('--output_dir_path', default=argparse.SUPPRESS)
+    parser.add_argument('-p', '--profile', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='write profile of stages next to output')
+    parser.add_argument('--cprofile', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='write cProfile stats next to output')
+    parser.add_argument('-c', '--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        default=argparse.SUPPRESS,
+                        help=f'path to cache of extracted data, {DEFAULT_CACHE_PATH} '
+                             f'if no value')
+    parser.add_argument('--cache_size', type=lambda x: int(float(x) * (1 << 20)),
+                        default=argparse.SUPPRESS, help='max size of cache, MB')
+    parser.add_argument('-m', '--mesh_path', default=argparse.SUPPRESS,
+                        help='polyMesh directory with cellZones for fields of cells')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='binary format of polyMesh and fields of cells')
+    parser.add_argument('--msh_path', default=argparse.SUPPRESS,
+                        help='gmsh mesh (MSH 4.1) written as polyMesh for fields of cells')
     args = parser.parse_args()
     kwargs = vars(args)
     main(**kwargs)
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+import os
+from pathlib import Path
+import sys
+
+import numpy as np
+
+import ifc2fenia.foam as foam
+
+DEFAULT_MAX_SIZE = 1 << 30  # bytes
+MESH_CLASSES = {'points': 'vectorField', 'faces': 'faceList', 'owner': 'labelList',
+                'neighbour': 'labelList', 'cellZones': 'cellZoneList'}
+
+
+def value_size(value):
+  """Size of loaded value in bytes, arrays by data, containers recursively"""
+  if isinstance(value, np.ndarray):
+    return value.nbytes
+  size = sys.getsizeof(value)
+  if isinstance(value, dict):
+    size += sum(value_size(k) + value_size(v) for k, v in value.items())
+  elif isinstance(value, (list, tuple)):
+    size += sum(value_size(x) for x in value)
+  return size
+
+
+def freeze(value):
+  """Make arrays of loaded value read-only, e.g. array, faces or cellZones"""
+  if isinstance(value, np.ndarray):
+    value.flags.writeable = False
+  elif isinstance(value, (dict, tuple)):
+    for x in value.values() if isinstance(value, dict) else value:
+      freeze(x)
+
+
+class FoamCase:
+  """Lazy accessor of files of FOAM case with LRU cache of loaded values
+
+  Names of time directories and files are indexed on first access without
+  reading of files, the index of directory is rebuilt if its mtime changed,
+  e.g. new time directory is written by running solver. Files are loaded
+  (see foam.load) on first access and kept in cache, least recently used
+  values are evicted when their total size exceeds max_size. Cached value is
+  loaded again if mtime or size of its file changed. Cached arrays are
+  read-only, so they could not be changed by callers.
+
+  Args:
+    path (str or Path): case directory
+    max_size (int): max total size of cached values in bytes
+    start_from (int): number of lines of header of files, see foam.load
+
+  Attributes:
+    size (int): total size of cached values in bytes
+    hits (int): number of loads from cache
+    misses (int): number of loads from files
+  """
+
+  def __init__(self, path, max_size=DEFAULT_MAX_SIZE, start_from=12):
+    self.path = Path(path)
+    self.max_size = max_size
+    self.start_from = start_from
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self._cache = OrderedDict()  # (path, cls) to (mtime_ns, size), value, size
+    self._index = {}  # directory to mtime_ns and content
+
+  def _indexed(self, directory, build):
+    path = self.path / directory
+    try:
+      mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+      self._index.pop(directory, None)
+      return build(None)
+    entry = self._index.get(directory)
+    if entry is None or entry[0] != mtime:
+      entry = self._index[directory] = mtime, build(path)
+    return entry[1]
+
+  @property
+  def times(self):
+    """Times of time directories (list of float), sorted"""
+    return list(self._time_directories())
+
+  def _time_directories(self):
+    return self._indexed('', lambda x: {} if x is None else {
+      t: p.name for t, p in foam.time_directories(x)})
+
+  def time_directory(self, time=None):
+    """Name of time directory, e.g. 0.5, the latest one if time is None"""
+    directories = self._time_directories()
+    if len(directories) == 0:
+      raise FileNotFoundError(f'time directories of {self.path}')
+    if time is None:
+      return directories[max(directories)]
+    try:
+      return directories[float(time)]
+    except KeyError:
+      raise KeyError(f'time {time} of {self.path}') from None
+
+  def names(self, directory):
+    """Names of files in directory of case, e.g. 0.5, constant, constant/polyMesh
+
+    Suffix .gz of compressed files is omitted.
+
+    Returns:
+      list of str: sorted names
+    """
+    return self._indexed(str(directory), lambda x: [] if x is None else sorted(
+      p.name[:-3] if p.name.endswith('.gz') else p.name
+      for p in x.iterdir() if p.is_file()))
+
+  def fields(self, time=None):
+    """Names of files in time directory, the latest one if time is None"""
+    return self.names(self.time_directory(time))
+
+  def load(self, name, cls='dictionary'):
+    """Load file of case from cache or from file
+
+    Args:
+      name (str or Path): path relative to case directory, e.g. 0.5/T,
+        compressed T.gz is loaded if there is no T
+      cls (str): class of file, see foam.load
+
+    Returns:
+      dict or list or np.ndarray: data
+    """
+    path = self.path / name
+    path = foam.field_path(path.parent, path.name)
+    stat = os.stat(path)
+    signature = stat.st_mtime_ns, stat.st_size
+    key = str(path), cls
+    entry = self._cache.get(key)
+    if entry is not None:
+      if entry[0] == signature:
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+      self._remove(key)
+    self.misses += 1
+    value = foam.load(path, cls, self.start_from)
+    freeze(value)
+    size = value_size(value)
+    if size <= self.max_size:
+      self._cache[key] = signature, value, size
+      self.size += size
+      self.evict()
+    return value
+
+  def field(self, name, time=None, cls='scalarField'):
+    """Load field of time directory, the latest one if time is None"""
+    return self.load(Path(self.time_directory(time)) / name, cls)
+
+  def constant(self, name, cls='dictionary'):
+    """Load file of constant directory, e.g. transportProperties"""
+    return self.load(Path('constant') / name, cls)
+
+  def mesh(self, name, cls=None):
+    """Load file of constant/polyMesh, e.g. points, class by name if cls is None"""
+    return self.load(Path('constant') / 'polyMesh' / name, cls or MESH_CLASSES[name])
+
+  def evict(self):
+    """Remove least recently used values while size > max_size"""
+    while self.size > self.max_size:
+      self._remove(next(iter(self._cache)))
+
+  def _remove(self, key):
+    _, _, size = self._cache.pop(key)
+    self.size -= size
+
+  def clear(self):
+    """Remove all cached values and index"""
+    self._cache.clear()
+    self._index.clear()
+    self.size = 0
+
+  def __len__(self):
+    return len(self._cache)
@@ -0,0 +1,114 @@
+"""Fields of cells by conditions and properties of zones
+
+Zone of each cell is given by cellZones of mesh (see foam.load_zones), values
+of zones by InitialCondition and MaterialProperty of IBRAE_Fenia property
+sets (see ifc2fenia.main). Values of cells are taken from table of values of
+zones by one fancy indexing, so there is no loop over cells.
+"""
+import io
+from pathlib import Path
+
+import numpy as np
+
+import ifc2fenia.foam as foam
+
+FIELDS = {'T': 'inZoneTemperature', 'qW': 'qW'}  # name of field to key of zone values
+DEFAULTS = {'qW': 0.}  # value of cells without value of zone, required if not set
+DIMENSIONS = {'T': '[0 0 0 1 0 0 0]', 'qW': '[1 -1 -3 0 0 0 0]'}  # K, W/m^3
+PATCH_TYPE = 'zeroGradient'  # condition of each patch of boundaryField
+FIELD_CLASSES = {1: ('scalarField', 'volScalarField'), 2: ('vectorField', 'volVectorField')}
+
+
+def cell_zones(zones, n_cells=None):
+    """Index of zone of each cell
+
+    Args:
+        zones (dict): name of zone to labels of its cells, see foam.load_zones
+        n_cells (int or None): number of cells, max label + 1 if None
+
+    Returns:
+        np.ndarray: int32 (n_cells,) index of zone in zones, -1 for cells
+            without zone, the last one for cells in several zones
+    """
+    if n_cells is None:
+        n_cells = max((int(x.max()) + 1 for x in zones.values() if len(x) > 0), default=0)
+    ids = np.full(n_cells, -1, np.int32)
+    for i, labels in enumerate(zones.values()):
+        ids[labels] = i
+    return ids
+
+
+def cell_values(ids, names, values, default=None):
+    """Values of cells by values of their zones
+
+    Args:
+        ids (np.ndarray): index of zone of each cell, -1 if none, see cell_zones
+        names (list of str): names of zones by index
+        values (dict): name of zone to value, scalar or vector
+        default (float or list or None): value of cells without zone or
+            without value of zone, there should be no such cells if None
+
+    Returns:
+        np.ndarray: float64 (n_cells,) for scalars or (n_cells, 3) for vectors
+    """
+    used = np.bincount(ids + 1, minlength=len(names) + 1) > 0  # cells without zone first
+    table = [default] + [values.get(x, default) for x in names]
+    for name, value, is_used in zip([None] + list(names), table, used):
+        if value is None and is_used:
+            raise ValueError('No value of cells without zone' if name is None
+                             else f'No value of zone {name}')
+    known = next((x for x in table if x is not None), 0.)
+    table = np.array([np.zeros_like(known, float) if x is None else x for x in table], float)
+    return table[ids + 1]
+
+
+def write_fields(zones, values, output_dir_path, n_cells=None, time='0', fields=None,
+                 binary=False, boundary=None):
+    """Write fields of cells by values of their zones
+
+    Each field has dimensions (DIMENSIONS, dimensionless for other fields),
+    internalField of values of cells and boundaryField with PATCH_TYPE
+    condition of each patch of boundary.
+
+    Args:
+        zones (dict): name of zone to labels of its cells, see foam.load_zones
+        values (dict): name of zone to values by keys, e.g.
+            {"Zone1": {"inZoneTemperature": 300.0, "qW": 1.0}}
+        output_dir_path (str or Path): output directory
+        n_cells (int or None): number of cells, see cell_zones
+        time (str): time directory of fields
+        fields (dict or None): name of field to key of values, FIELDS if None,
+            fields without values of zones of mesh are not written
+        binary (bool): binary format of fields
+        boundary (dict or None): name of patch of mesh to its entries, see
+            foam.load_boundary, no patches if None
+
+    Returns:
+        list of str: written files relative to output directory
+    """
+    fields = FIELDS if fields is None else fields
+    output_dir_path = Path(output_dir_path)
+    ids = cell_zones(zones, n_cells)
+    names = list(zones)
+    boundary_field = io.StringIO()
+    foam.dump({'boundaryField': {x: {'type': PATCH_TYPE} for x in boundary or {}}},
+              boundary_field)
+    files = []
+    for name, key in fields.items():
+        zone_values = {x: values[x][key] for x in names if key in values.get(x, {})}
+        if len(zone_values) == 0:
+            continue
+        v = cell_values(ids, names, zone_values, DEFAULTS.get(name))
+        cls, header_cls = FIELD_CLASSES[v.ndim]
+        header = {'FeniaFile': {'version': 2.0, 'format': 'ascii', 'class': header_cls,
+                                'location': time, 'object': name}}
+        path = output_dir_path / time / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with foam.open_file(path, 'wb' if binary else 'w') as f:
+            write = foam.text_writer(f)
+            write(foam.header_text(header, binary))
+            write(f'dimensions {DIMENSIONS.get(name, "[0 0 0 0 0 0 0]")};\n')
+            foam.dump_field(v, f, cls, binary, name='internalField')
+            write(boundary_field.getvalue())
+        files.append(path.relative_to(output_dir_path).as_posix())
+    return files
@@ -1,3 +1,64 @@
+import gzip
+import io
+import mmap
+import multiprocessing
+import os
+from pathlib import Path
+import re
+
+import numpy as np
+
+PARENTHESES = str.maketrans('()', '  ')
+PARENTHESES_BYTES = bytes.maketrans(b'()', b'  ')
+COMMENTS = re.compile(r'/\*.*?\*/|//[^\n]*', re.S)
+COMMENTS_BYTES = re.compile(rb'/\*.*?\*/|//[^\n]*', re.S)
+LIST_START = re.compile(r'(?<![\w.])(\d+)\s*\(')  # length and start of list
+LIST_START_BYTES = re.compile(rb'(?<![\w.])(\d+)\s*\(')
+VECTORS_END = re.compile(r'\)\s*\)')  # end of last vector and end of list
+VECTORS_END_BYTES = re.compile(rb'\)\s*\)')
+WORD = r'[^\s{}()\[\];"]+'
+KEY = r'[^\s{}()\[\];"#][^\s{}()\[\];"]*'
+QUOTED = r'"(?:[^"\\]|\\.)*"'
+FLAT_LIST = r'\([^(){}\[\];"]*\)'
+TOKENS = re.compile(  # key value; key (list); name { or one token
+  rf'({KEY})[ \t]+(?:({WORD})|({FLAT_LIST}))[ \t]*;'
+  rf'|({KEY}|{QUOTED})\s*{{'
+  rf'|{QUOTED}|{FLAT_LIST}|[{{}}()\[\];]|{WORD}')
+LIST_TOKENS = {'(', '['}
+NUMBER_STARTS = set('0123456789+-.')
+NUMBER_WORDS = {'nan', 'inf', 'infinity'}  # float() of words
+BOOLEANS = {'off': False, 'false': False, 'on': True, 'true': True}
+INCLUDE_DIRECTIVES = ['#include', '#includeIfPresent']
+FORMAT_BINARY = re.compile(rb'\bformat\s+binary\s*;')
+ARCH = re.compile(rb'\barch\s+"([^"]*)"')
+FIELD_WIDTHS = {'scalarField': 1, 'vectorList': 3, 'vectorField': 3, 'labelList': 1}
+LABEL_FIELDS = ['labelList']
+FACE_LISTS = ['faceList', 'faceCompactList']
+ZONE_LISTS = ['cellZoneList']  # class regIOobject in header of cellZones
+MESH_HEADERS = {'points': 'vectorField', 'faces': 'faceList', 'owner': 'labelList',
+                'neighbour': 'labelList', 'boundary': 'polyBoundaryMesh',
+                'cellZones': 'regIOobject'}  # class in header of file of polyMesh
+BINARY_CLASSES = list(FIELD_WIDTHS) + FACE_LISTS + ZONE_LISTS  # loaded from binary files
+FACE_START_BYTES = re.compile(rb'\s*\d+\s*\(')  # first face of faceList N(...)
+ZONE_START_BYTES = re.compile(rb'([^\s{}()";]+)\s*\{')
+FIELD_TYPES = {'scalarField': 'scalar', 'vectorList': 'vector', 'vectorField': 'vector',
+               'labelList': 'label'}
+BINARY_ARCH = 'LSB;label=32;scalar=64'
+CHUNK_SIZE = 1 << 16  # values (scalars or vectors) of chunk of field
+BLOCK_SIZE = 1 << 22  # bytes of text parsed at once by iter_field
+SAMPLE_SIZE = 1 << 12  # values checked for repeats by format_values
+GZIP_MAGIC = b'\x1f\x8b'
+COMPRESS_LEVEL = 6  # as zlib default
+BANNER = r"""/*--------------------------------*- C++ -*----------------------------------*\
+| =========                 |                                                 |
+| \\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |
+|  \\    /   O peration     | Written by ifc2fenia                            |
+|   \\  /    A nd           |                                                 |
+|    \\/     M anipulation  |                                                 |
+\*---------------------------------------------------------------------------*/
+"""  # 7 lines as of OpenFOAM, see header_text
+
+
 def is_float(s):
   try:
     float(s)
@@ -22,15 +83,84 @@ def read(f):
       yield line
 
 
+def open_file(file_path, mode='r', compress=None):
+  """Open plain or gzip-compressed file
+
+  File is read as gzip-compressed if it starts with gzip magic bytes, and
+  written as gzip-compressed if compress or (if None) path ends with .gz.
+  Compressed file is decompressed/compressed on the fly.
+
+  Args:
+    file_path (str or Path): path to file
+    mode (str): mode as of open, e.g. r, rb, w, wb
+    compress (bool or None): compress on write, by suffix .gz if None
+
+  Returns:
+    file: file object
+  """
+  file_path = Path(file_path)
+  if 'r' in mode:
+    with open(file_path, 'rb') as f:
+      compressed = f.read(2) == GZIP_MAGIC
+  else:
+    compressed = file_path.suffix == '.gz' if compress is None else compress
+  if not compressed:
+    return open(file_path, mode)
+  if 'b' not in mode:
+    mode = mode.replace('t', '') + 't'
+  return gzip.open(file_path, mode, compresslevel=COMPRESS_LEVEL)
+
+
+def decompress(f):
+  """Stream of decompressed file f if it is gzip-compressed else f
+
+  Args:
+    f (file): file in text or binary mode positioned at start
+
+  Returns:
+    file: f or gzip.GzipFile (wrapped by io.TextIOWrapper if f in text mode)
+  """
+  if isinstance(f, io.TextIOWrapper):
+    buffer = f.buffer
+  elif isinstance(f, io.TextIOBase):
+    return f
+  else:
+    buffer = f
+  if hasattr(buffer, 'peek'):
+    head = buffer.peek(2)[:2]
+  elif buffer.seekable():
+    position = buffer.tell()
+    head = buffer.read(2)
+    buffer.seek(position)
+  else:
+    return f
+  if head != GZIP_MAGIC:
+    return f
+  stream = gzip.GzipFile(fileobj=buffer, mode='rb')
+  return stream if buffer is f else io.TextIOWrapper(stream, encoding=f.encoding)
+
+
 def load(f, cls='dictionary', start_from=12):
-  for _ in range(start_from):
-    next(f)
+  """Load FOAM file
+
+  Args:
+    f (file or str or Path): file (text or binary mode, see load_binary_field)
+      or path to file, gzip-compressed file is decompressed on the fly
+    cls (str): class of file, e.g. dictionary, scalarField, vectorField,
+      faceList (see load_faces), cellZoneList (see load_zones) or
+      polyBoundaryMesh (see load_boundary)
+    start_from (int): number of lines of header
+
+  Returns:
+    dict or list or tuple or np.ndarray: data
+  """
+  if isinstance(f, (str, os.PathLike)):
+    with open_file(f, 'rb' if cls in BINARY_CLASSES else 'r') as g:
+      return load(g, cls, start_from)
+  f = decompress(f)
+  header = [next(f) for _ in range(start_from)]
   if cls == 'dictionary':
-    d = {}
-    name, kvs = load_object(f)
-    while name is not None or len(kvs) > 0:
-      d[name] = kvs
-      name, kvs = load_object(f)
+    d = load_object(f)
   elif cls == 'scalarList':
     d = []
     for line in read(f):
@@ -49,71 +179,946 @@ def load(f, cls='dictionary', start_from=12):
       if line not in ['(', ')'] and not is_float(line):
         line = line.replace('(', ' ').replace(')', ' ')
         d.append(line.split()[1:])
-  elif cls in ['scalarField', 'vectorList', 'vectorField']:
-    d = []
-    for line in read(f):
-      if 'nonuniform' in line or not 'uniform' in line:
-        line = line.replace('(', ' ').replace(')', ' ')
-        for t in line.split():
-          if is_float(t):
-            d.append(float(t))
-      else:
-        d.append(1)
-        d.append(float(line.split()[2][:-1]))
-    d = d[1:]  # slice length
-    if cls in ['vectorList', 'vectorField']:  # TODO numpy reshape?
-      d = [d[x:x + 3] for x in range(0, len(d), 3)]
+  elif cls in FIELD_WIDTHS:
+    if isinstance(f.read(0), bytes):  # file opened in binary mode
+      d = load_binary_field(f, cls, b''.join(header))
+    else:
+      d = load_field(f, cls)
+  elif cls in FACE_LISTS or cls in ZONE_LISTS:
+    header = ''.join(header).encode() if isinstance(f.read(0), str) else b''.join(header)
+    d = (load_faces if cls in FACE_LISTS else load_zones)(f, header)
+  elif cls == 'polyBoundaryMesh':
+    d = load_boundary(f)
   else:
     raise NotImplementedError(cls)
   return d
 
 
-def load_object(f, name=None):
-  kvs = {}  # key-values
-  for line in read(f):
-    line = line.replace(';', '')  # remove ending ;
-    ts = line.split()  # tokens
-    k, vs = ts[0], ts[1:]
-    if len(vs) == 0:
-      if k == '{':
-        continue
-      elif k == '}':
+def field_dtype(cls, arch=BINARY_ARCH):
+  """NumPy dtype of values of field in binary format with arch
+
+  Args:
+    cls (str): class of field
+    arch (str): architecture from header, e.g. "LSB;label=32;scalar=64"
+
+  Returns:
+    np.dtype: dtype with byte order of arch
+  """
+  options = dict(x.split('=') for x in arch.split(';') if '=' in x)
+  if cls in LABEL_FIELDS:
+    dtype = np.dtype(f'i{int(options.get("label", 32)) // 8}')
+  else:
+    dtype = np.dtype(f'f{int(options.get("scalar", 64)) // 8}')
+  return dtype.newbyteorder('>' if arch.startswith('MSB') else '<')
+
+
+def load_field(f, cls='scalarField'):
+  """Load field body in bulk
+
+  Nonuniform list (N followed by parentheses) is parsed by np.fromstring and
+  reshaped to (N, 3) for vectors. Uniform value gives array of one value.
+  Comments are removed as by read(), also inline block ones.
+
+  Args:
+    f (file): file positioned after header
+    cls (str): scalarField, vectorList or vectorField
+
+  Returns:
+    np.ndarray: float64 (N,) for scalars or (N, 3) for vectors, int32 (N,)
+      for labels
+  """
+  width = FIELD_WIDTHS[cls]
+  dtype = np.int32 if cls in LABEL_FIELDS else np.float64
+  text = f.read()
+  if '/' in text:
+    text = COMMENTS.sub(' ', text)
+  m = LIST_START.search(text)
+  i = text.find('uniform', 0, len(text) if m is None else m.start())
+  if i != -1 and text[max(i - 3, 0):i] != 'non':
+    start = i + len('uniform')
+    end = text.find(';', start)
+    v = np.fromstring(text[start:None if end == -1 else end].translate(PARENTHESES),
+                      dtype, sep=' ')
+    return v.reshape(-1, width) if width > 1 else v
+  if m is None:
+    raise ValueError(f'List of {cls} is not found')
+  n, start = int(m.group(1)), m.end()
+  if n == 0:
+    end = start
+  elif width == 1:
+    end = text.index(')', start)
+  else:
+    end = VECTORS_END.search(text, start).start() + 1
+  v = np.fromstring(text[start:end].translate(PARENTHESES), dtype, sep=' ')
+  if v.size != n * width:
+    raise ValueError(f'{cls} of length {n} has {v.size} values')
+  return v.reshape(n, width) if width > 1 else v
+
+
+def load_binary_field(f, cls='scalarField', header=b''):
+  """Load field body from file opened in binary mode
+
+  Values of list in binary format are read by f.readinto straight to array
+  of dtype of arch of header (see field_dtype). Field in ascii format is
+  passed to load_field.
+
+  Args:
+    f (file): file opened in binary mode positioned after header
+    cls (str): scalarField, vectorList, vectorField or labelList
+    header (bytes): skipped lines of header with format and arch
+
+  Returns:
+    np.ndarray: (N,) for scalars and labels or (N, 3) for vectors
+  """
+  width = FIELD_WIDTHS[cls]
+  data = b''
+  m = None
+  while m is None:  # text before values
+    block = f.read(1 << 12)
+    if not block:
+      break
+    data += block
+    m = LIST_START_BYTES.search(data)
+  head = header + data[:len(data) if m is None else m.start()]
+  if b'/' in head:
+    head = COMMENTS_BYTES.sub(b' ', head)
+  i = head.find(b'uniform')
+  if m is None or FORMAT_BINARY.search(head) is None or \
+      i != -1 and head[max(i - 3, 0):i] != b'non':
+    return load_field(io.StringIO((data + f.read()).decode()), cls)
+  arch = ARCH.search(head)
+  dtype = field_dtype(cls, BINARY_ARCH if arch is None else arch.group(1).decode())
+  n, start = int(m.group(1)), m.end()
+  v = np.empty(n * width, dtype.newbyteorder('='))
+  buffer = memoryview(v).cast('B')
+  data = data[start:start + buffer.nbytes + 1]
+  size = min(len(data), buffer.nbytes)
+  buffer[:size] = data[:size]
+  while size < buffer.nbytes:
+    read = f.readinto(buffer[size:])
+    if not read:
+      break
+    size += read
+  end = data[buffer.nbytes:] if len(data) > buffer.nbytes else f.read(1)
+  if size != buffer.nbytes or end != b')':
+    raise ValueError(f'{cls} of length {n} has {size} of {buffer.nbytes} bytes')
+  if not dtype.isnative:  # values were copied as is
+    v = v.byteswap()
+  return v.reshape(n, width) if width > 1 else v
+
+
+def iter_field(file_path, cls='scalarField', chunk_size=CHUNK_SIZE, start_from=12):
+  """Iterate over field in chunks of chunk_size values in constant memory
+
+  File is read sequentially by blocks of BLOCK_SIZE bytes of text, each block
+  is parsed by np.fromstring as in load_field. Plain file is memory-mapped,
+  gzip-compressed one is decompressed on the fly (see open_file). Header is
+  skipped as by load (start_from lines), comments are removed as by read().
+  Uniform field gives one chunk of one value. Values in binary format are
+  read chunk by chunk.
+
+  Args:
+    file_path (str or Path): path to field file
+    cls (str): scalarField, vectorList, vectorField or labelList
+    chunk_size (int): number of scalars or vectors in chunk (but last)
+    start_from (int): number of lines of header
+
+  Yields:
+    np.ndarray: float64 (chunk_size,) for scalars or (chunk_size, 3) for
+      vectors, int32 (chunk_size,) for labels (dtype of arch if binary)
+  """
+  width = FIELD_WIDTHS[cls]
+  with open_file(file_path, 'rb') as f:
+    if isinstance(f, gzip.GzipFile) or os.fstat(f.fileno()).st_size == 0:
+      yield from iter_stream_field(f, cls, chunk_size, start_from)
+      return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+      yield from iter_stream_field(mm, cls, chunk_size, start_from)
+
+
+def iter_stream_field(f, cls='scalarField', chunk_size=CHUNK_SIZE, start_from=12):
+  """Iterate over field in chunks from stream f with read and readline, see iter_field"""
+  width = FIELD_WIDTHS[cls]
+  dtype = np.int32 if cls in LABEL_FIELDS else np.float64
+  header = b''.join(f.readline() for _ in range(start_from))
+  data, m = b'', None
+  while True:  # text before values
+    block = f.read(1 << 12)
+    data += block
+    m = LIST_START_BYTES.search(data)
+    while m is not None:  # skip lists in comments
+      if COMMENTS_BYTES.sub(b' ', data[:m.end()]).rstrip().endswith(b'('):
         break
-      elif name is None and len(kvs) == 0:
-        name = k
-      else:
-        sub_name, sub_kvs = load_object(f, k)
-        kvs[sub_name] = sub_kvs
+      m = LIST_START_BYTES.search(data, m.end())
+    if m is not None or not block:
+      break
+  head = COMMENTS_BYTES.sub(b' ', header + data[:len(data) if m is None else m.start()])
+  i = head.find(b'uniform')
+  if m is None or i != -1 and head[max(i - 3, 0):i] != b'non':
+    yield load_field(io.StringIO((data + f.read()).decode()), cls)
+    return
+  n, pending = int(m.group(1)), data[m.end():]
+  if n == 0:
+    return
+  if FORMAT_BINARY.search(head) is not None:
+    arch = ARCH.search(head)
+    binary_dtype = field_dtype(cls, BINARY_ARCH if arch is None else arch.group(1).decode())
+    for i in range(0, n, chunk_size):
+      size = min(chunk_size, n - i) * width * binary_dtype.itemsize
+      if len(pending) < size:
+        pending += f.read(size - len(pending))
+      if len(pending) < size:
+        raise ValueError(f'{cls} of length {n} has {i * width * binary_dtype.itemsize + len(pending)} bytes')
+      v = np.frombuffer(pending, binary_dtype, size // binary_dtype.itemsize)
+      pending = pending[size:]
+      v = v.astype(binary_dtype.newbyteorder('='))
+      yield v.reshape(-1, width) if width > 1 else v
+    if (pending or f.read(1))[:1] != b')':
+      raise ValueError(f'End of {cls} of length {n} is not found')
+    return
+  size, chunk_values, rest = 0, chunk_size * width, np.empty(0, dtype)
+  eof = done = closed = False  # closed: previous block ends with end of vector
+  while not done:
+    if not eof:
+      read = f.read(BLOCK_SIZE)
+      eof = not read
+      pending += read
+    if eof:
+      block, pending = pending, b''
+    else:  # whole lines, so line comments are not split
+      cut = pending.rfind(b'\n') + 1
+      if cut == 0 and b'/' not in pending:  # long line without comments
+        cut = max(pending.rfind(b' '), pending.rfind(b')')) + 1
+      i = pending.rfind(b'/*', 0, cut)
+      if i > pending.rfind(b'*/', 0, cut):  # block comment is not closed
+        cut = i
+      if cut == 0:
+        continue
+      block, pending = pending[:cut], pending[cut:]
+    if b'/' in block:
+      block = COMMENTS_BYTES.sub(b' ', block)
+    if width == 1:
+      end = block.find(b')')
+    elif closed and block.lstrip()[:1] == b')':
+      end = block.find(b')')
     else:
-      if len(vs) > 1:
-        if vs[0].startswith('('):
-          v = ' '.join(vs)
-        else:
-          k = ' '.join([k] + vs[:-1])
-          v = vs[-1]
-      else:
-        v = vs[0]
-      if v in ['off', 'false']:
-        kvs[k] = False
-      elif v in ['on', 'true']:
-        kvs[k] = True
-      elif v.isnumeric():
-        kvs[k] = int(v)
-      elif is_float(v):
-        kvs[k] = float(v)
-      else:  # string
-        kvs[k] = v
-  return name, kvs
-
-
-def dump(d, f, cls='dictionary'):
+      end = VECTORS_END_BYTES.search(block)
+      end = -1 if end is None else end.start() + 1
+    if end != -1:
+      block, done = block[:end], True
+    elif eof:
+      raise ValueError(f'End of {cls} of length {n} is not found')
+    if not block.isspace():
+      closed = block.rstrip().endswith(b')')
+    block = block.translate(PARENTHESES_BYTES)
+    if not block or block.isspace():  # np.fromstring gives [-1.] for spaces
+      continue
+    v = np.fromstring(block, dtype, sep=' ')
+    size += v.size
+    v = np.concatenate([rest, v]) if rest.size > 0 else v
+    n_chunks = v.size // chunk_values
+    for j in range(n_chunks):
+      chunk = v[j * chunk_values:(j + 1) * chunk_values]
+      yield chunk.reshape(chunk_size, width) if width > 1 else chunk
+    rest = v[n_chunks * chunk_values:]
+  if size != n * width:
+    raise ValueError(f'{cls} of length {n} has {size} values')
+  if rest.size > 0:
+    yield rest.reshape(-1, width) if width > 1 else rest
+
+
+def time_directories(case_path):
+  """Time directories of case, i.e. named by number, e.g. 0, 0.5, 1e+06
+
+  Args:
+    case_path (str or Path): case directory
+
+  Returns:
+    list of tuple: time (float) and path, sorted by time
+  """
+  directories = []
+  for path in Path(case_path).iterdir():
+    try:
+      time = float(path.name)
+    except ValueError:
+      continue
+    if path.is_dir():
+      directories.append((time, path))
+  return sorted(directories)
+
+
+def field_path(directory, name):
+  """Path of field name in directory, compressed name.gz if there is no name"""
+  path = Path(directory) / name
+  return path if path.exists() else path.with_name(f'{name}.gz')
+
+
+def _load_time(args):
+  path, cls, start_from, output_path, index = args
+  values = load(path, cls, start_from)
+  if output_path is None:
+    return values
+  output = np.load(output_path, mmap_mode='r+')
+  output[index] = values
+  output.flush()
+  del output
+
+
+def load_time_series(case_path, name, cls='scalarField', start_from=12, times=None,
+                     workers=1, output_path=None):
+  """Load field from time directories of case into one stacked array
+
+  Fields are loaded (see load) by a pool of processes. Uniform fields are
+  broadcast to number of values of nonuniform ones. If output_path is set,
+  array is memory-mapped .npy file there and workers write fields to it
+  directly, so fields are not passed between processes and kept in memory.
+
+  Args:
+    case_path (str or Path): case directory
+    name (str): name of field file, e.g. T (or T.gz)
+    cls (str): scalarField, vectorList, vectorField or labelList
+    start_from (int): number of lines of header
+    times (list of float or None): times to load, all with field if None
+    workers (int): number of processes
+    output_path (str or Path or None): path to scratch .npy file
+
+  Returns:
+    tuple: times (np.ndarray) and values (np.ndarray or np.memmap)
+      (n_times, n_values) for scalars and labels or (n_times, n_values, 3)
+      for vectors
+  """
+  directories = [(t, field_path(x, name)) for t, x in time_directories(case_path)
+                 if times is None or t in times]
+  directories = [(t, x) for t, x in directories if x.exists()]
+  if len(directories) == 0:
+    raise FileNotFoundError(f'{name} in time directories of {case_path}')
+  loaded = {}  # first fields till nonuniform one to know shape of array
+  for i, (_, path) in enumerate(directories):
+    loaded[i] = load(path, cls, start_from)
+    if len(loaded[i]) != 1:
+      break
+  values = loaded[len(loaded) - 1]
+  shape = (len(directories),) + values.shape
+  if output_path is None:
+    output = np.empty(shape, values.dtype)
+  else:
+    output = np.lib.format.open_memmap(output_path, 'w+', values.dtype, shape)
+  for i, x in loaded.items():
+    output[i] = x
+  if output_path is not None:
+    output.flush()
+  args = [(path, cls, start_from, None if output_path is None else str(output_path), i)
+          for i, (_, path) in enumerate(directories) if i not in loaded]
+  if workers > 1 and len(args) > 1:
+    with multiprocessing.Pool(min(workers, len(args))) as pool:
+      for (*_, i), x in zip(args, pool.imap(_load_time, args)):
+        if x is not None:
+          output[i] = x
+  else:
+    for path, *_, i in args:
+      output[i] = load(path, cls, start_from)
+  return np.array([t for t, _ in directories]), output
+
+
+def find_list(data, pos=0):
+  """Match of LIST_START_BYTES of first list N( of data after pos, not in comments"""
+  m = LIST_START_BYTES.search(data, pos)
+  while m is not None:
+    if COMMENTS_BYTES.sub(b' ', data[pos:m.end()]).rstrip().endswith(b'('):
+      return m
+    m = LIST_START_BYTES.search(data, m.end())
+  return None
+
+
+def read_labels_data(f, header=b''):
+  """Read data of file with lists of labels, e.g. faces or cellZones
+
+  Args:
+    f (file): file positioned after header
+    header (bytes): skipped lines of header with format and arch
+
+  Returns:
+    tuple: data (bytes), without comments in ascii format, and dtype of
+      labels in binary format (see field_dtype) or None in ascii format
+  """
+  data = f.read()
+  if isinstance(data, str):
+    data = data.encode()
+  m = find_list(data)
+  if m is None:
+    raise ValueError('List of labels is not found')
+  head = COMMENTS_BYTES.sub(b' ', header + data[:m.start()])
+  if FORMAT_BINARY.search(head) is None:
+    return (COMMENTS_BYTES.sub(b' ', data) if b'/' in data else data), None
+  arch = ARCH.search(head)
+  return data, field_dtype('labelList', BINARY_ARCH if arch is None else arch.group(1).decode())
+
+
+def parse_labels(data, pos=0, dtype=None):
+  """Parse list of labels N(...) of data after pos in bulk
+
+  Args:
+    data (bytes): data, see read_labels_data
+    pos (int): position to search list from
+    dtype (np.dtype or None): dtype of labels in binary format, ascii if None
+
+  Returns:
+    tuple: labels (np.ndarray int32) and position after list
+  """
+  m = find_list(data, pos)
+  if m is None:
+    raise ValueError('List of labels is not found')
+  n, start = int(m.group(1)), m.end()
+  if dtype is not None:
+    end = start + n * dtype.itemsize
+    v = np.frombuffer(data, dtype, n, start) if end <= len(data) else np.empty(0, dtype)
+  else:
+    end = data.find(b')', start)
+    v = np.fromstring(data[start:end], np.int32, sep=' ') if n > 0 else np.empty(0, np.int32)
+  if v.size != n or data[end:end + 1] != b')':
+    raise ValueError(f'List of {n} labels has {v.size} labels')
+  return v.astype(np.int32, copy=dtype is not None), end + 1
+
+
+def load_faces(f, header=b''):
+  """Load faces of polyMesh as compressed sparse rows (CSR)
+
+  Faces in ascii format are list of faces N(k(i ...) ...) (class faceList),
+  it is parsed by one np.fromstring with parentheses of faces replaced by
+  marks -1, sizes of faces are labels before marks. Faces in binary format
+  are list of offsets and list of indices (class faceCompactList), they are
+  read as is.
+
+  Args:
+    f (file): file positioned after header
+    header (bytes): skipped lines of header with format and arch
+
+  Returns:
+    tuple: offsets (N + 1,) and indices of points of faces, int32, points
+      of face i are indices[offsets[i]:offsets[i + 1]]
+  """
+  data, dtype = read_labels_data(f, header)
+  m = find_list(data)
+  n, start = int(m.group(1)), m.end()
+  if n == 0:
+    return np.zeros(1, np.int32), np.empty(0, np.int32)
+  if dtype is not None or FACE_START_BYTES.match(data, start) is None:  # faceCompactList
+    offsets, pos = parse_labels(data, 0, dtype)
+    indices, _ = parse_labels(data, pos, dtype)
+    if len(offsets) == 0:
+      offsets = np.zeros(1, np.int32)
+    if offsets[0] != 0 or offsets[-1] != len(indices) or np.any(np.diff(offsets) < 0):
+      raise ValueError(f'Offsets of {len(offsets) - 1} faces do not match {len(indices)} indices')
+    return offsets, indices
+  end = VECTORS_END_BYTES.search(data, start)
+  if end is None:
+    raise ValueError(f'End of faceList of length {n} is not found')
+  v = np.fromstring(data[start:end.start() + 1].replace(b'(', b' -1 ').translate(
+    PARENTHESES_BYTES), np.int32, sep=' ')
+  marks = np.flatnonzero(v == -1)
+  sizes = v[marks - 1]
+  if len(marks) != n or marks[0] != 1 or \
+      np.any(np.diff(np.append(marks, len(v) + 1)) != sizes + 2):
+    raise ValueError(f'faceList of length {n} has {len(marks)} faces')
+  keep = np.ones(len(v), bool)
+  keep[marks] = False
+  keep[marks - 1] = False
+  offsets = np.zeros(n + 1, np.int32)
+  np.cumsum(sizes, out=offsets[1:])
+  return offsets, v[keep]
+
+
+def load_zones(f, header=b''):
+  """Load cellZones of polyMesh
+
+  Args:
+    f (file): file positioned after header
+    header (bytes): skipped lines of header with format and arch
+
+  Returns:
+    dict: name of zone to labels of its cells (np.ndarray int32), in order
+      of zones in file
+  """
+  data, dtype = read_labels_data(f, header)
+  m = find_list(data)
+  n, pos = int(m.group(1)), m.end()
+  zones = {}
+  for _ in range(n):
+    m = ZONE_START_BYTES.search(data, pos)
+    if m is None:
+      raise ValueError(f'{len(zones)} of {n} zones are found')
+    start = data.find(b'cellLabels', m.end())
+    if start == -1:
+      raise ValueError(f'cellLabels of zone {m.group(1).decode()} are not found')
+    zones[m.group(1).decode()], pos = parse_labels(data, start, dtype)
+    pos = data.index(b'}', pos) + 1
+  return zones
+
+
+def load_boundary(f):
+  """Load boundary of polyMesh
+
+  Args:
+    f (file): file positioned after header
+
+  Returns:
+    dict: name of patch to its entries, e.g. {"type": "patch", "nFaces": 10,
+      "startFace": 100}, in order of patches in file
+  """
+  text = COMMENTS.sub(' ', f.read())
+  m = LIST_START.search(text)
+  if m is None:
+    raise ValueError('List of patches is not found')
+  d = {}
+  parse_dictionary(text[m.end():text.rindex(')')], d)
+  if len(d) != int(m.group(1)):
+    raise ValueError(f'{len(d)} of {m.group(1)} patches are found')
+  return d
+
+
+def load_mesh(mesh_path, start_from=12):
+  """Load polyMesh into compact arrays
+
+  Files are loaded by load, compressed ones (e.g. faces.gz) too, ascii
+  and binary formats are parsed in bulk.
+
+  Args:
+    mesh_path (str or Path): polyMesh directory, e.g. constant/polyMesh
+    start_from (int): number of lines of header of files
+
+  Returns:
+    dict: points (N, 3) float64, offsets (F + 1,) and faces (indices of
+      points) int32 as CSR (see load_faces), owner (F,) and neighbour (I,)
+      int32, boundary (dict) name of patch to its entries (see
+      load_boundary) and cellZones (dict) name of zone to int32 labels of
+      its cells, empty if there is no boundary or cellZones
+  """
+  mesh_path = Path(mesh_path)
+  offsets, faces = load(field_path(mesh_path, 'faces'), 'faceList', start_from)
+  mesh = {'points': load(field_path(mesh_path, 'points'), 'vectorField', start_from),
+          'offsets': offsets, 'faces': faces}
+  for name in ['owner', 'neighbour']:
+    labels = load(field_path(mesh_path, name), 'labelList', start_from)
+    mesh[name] = labels.astype(np.int32, copy=False)
+  for name, cls in [('boundary', 'polyBoundaryMesh'), ('cellZones', 'cellZoneList')]:
+    path = field_path(mesh_path, name)
+    mesh[name] = load(path, cls, start_from) if path.exists() else {}
+  return mesh
+
+
+def load_object(f):
+  """Load entries of dictionary by one pass over tokens
+
+  Tokens are words, quoted strings (e.g. regex keys, see lookup) and
+  punctuation. Sub-dictionaries are tracked by stack, so depth of nesting is
+  not limited. Entry is key and value till ;, value with list (in parentheses
+  or brackets, may span lines) is kept as text, e.g. "(1 2 3)", several words
+  are joined to key but last one, e.g. "timeValueTr const": 300, one word is
+  converted by to_value. #include and #includeIfPresent "path" entries are
+  replaced by entries of file, path is relative to directory of f.
+
+  Args:
+    f (file): file in text or binary mode positioned after header
+
+  Returns:
+    dict: key to value or sub-dictionary
+  """
+  d = {}
+  path = Path(getattr(f, 'name', 'dictionary'))
+  parse_dictionary(f.read(), d, path.parent, [path.resolve()])
+  return d
+
+
+def parse_dictionary(text, d, directory='.', included=None):
+  """Parse entries of dictionary text into d, see load_object
+
+  Args:
+    text (str or bytes): text of entries, bytes (of file in binary mode) are
+      decoded as UTF-8
+    d (dict): dictionary to update
+    directory (str or Path): directory of relative paths of #include
+    included (list or None): paths of including files to detect cycles
+  """
+  if isinstance(text, bytes):
+    text = text.decode()
+  if '/' in text:
+    text = COMMENTS.sub(' ', text)
+  included = [] if included is None else included
+  stack, current, entry, depth, skip = [d], d, [], 0, 0
+  start = end = 0  # of value of entry
+  for m in TOKENS.finditer(text):
+    if skip and m.start() < skip:  # arguments of directive
+      continue
+    i = m.lastindex  # 2 key value;, 3 key (list);, 4 name {, None token
+    if i is not None and depth == 0:
+      if i == 2 and not entry:
+        current[m[1]] = to_value(m[2])
+      elif i == 4:
+        sub = {}
+        current[' '.join(entry + [m[4]]) if entry else m[4]] = sub
+        stack.append(sub)
+        current, entry = sub, []
+      elif not entry:
+        current[m[1]] = ' '.join(m[3].split())
+      else:  # end of entry with key of several words
+        if len(entry) == 1:
+          start = m.start()
+        entry.extend([m[1], m[i]])
+        add_entry(current, entry, text[start:m.end(i)])
+        entry = []
+      continue
+    t = m[0]
+    if depth > 0:
+      if t in '([':
+        depth += 1
+      elif t in ')]':
+        depth -= 1
+      entry.append(t)
+      end = m.end()
+    elif t == '}':
+      if entry:
+        add_entry(current, entry, text[start:end])
+        entry = []
+      if len(stack) > 1:
+        stack.pop()
+        current = stack[-1]
+    elif t == ';':
+      if entry:
+        add_entry(current, entry, text[start:end])
+        entry = []
+    elif t == '{':
+      sub = {}
+      current[' '.join(entry)] = sub
+      stack.append(sub)
+      current, entry = sub, []
+    elif t[0] == '#' and not entry:  # directive, arguments till end of line
+      skip = text.find('\n', m.end())
+      skip = len(text) if skip == -1 else skip
+      args = text[m.end():skip].split()
+      if t in INCLUDE_DIRECTIVES and args:
+        include(Path(directory) / args[0].strip('"'), current, included,
+                t == '#include')
+      elif args:
+        current[' '.join([t] + args[:-1])] = to_value(args[-1])
+    else:
+      if len(entry) == 1:
+        start = m.start()
+      if t in '([':
+        depth += 1
+      entry.append(t)
+      end = m.end()
+
+
+def include(path, d, included=(), required=True):
+  """Parse dictionary file into d for #include directive"""
+  path = path.resolve()
+  if path in included:
+    raise ValueError(f'Cycle of #include: {path}')
+  if not path.exists():
+    if required:
+      raise FileNotFoundError(path)
+    return
+  parse_dictionary(path.read_text(), d, path.parent, included + [path])
+
+
+def add_entry(d, entry, text):
+  """Add entry of tokens of key and value with text of value to d"""
+  key, words = entry[0], entry[1:]
+  if len(words) == 0:
+    d[key] = ''
+  elif any(x[0] in LIST_TOKENS for x in words):  # value with list is kept as text
+    d[key] = ' '.join(text.split())
+  else:  # key of several words, e.g. timeValueTr const
+    d[' '.join([key] + words[:-1])] = to_value(words[-1])
+
+
+def to_value(v):
+  """Value of word: bool (on/off, true/false), int, float or string"""
+  if v.isnumeric():
+    return int(v)
+  elif v[0] in NUMBER_STARTS or v.lower() in NUMBER_WORDS:
+    return float(v) if is_float(v) else v
+  else:
+    return BOOLEANS.get(v, v)
+
+
+def lookup(d, key, default=None):
+  """Value of key in d, quoted keys are regular expressions
+
+  As in OpenFOAM, exact key is preferred and the last matching regular
+  expression is used otherwise, e.g. "(wall|inlet).*" for patch wall_1.
+  """
+  if key in d:
+    return d[key]
+  for k in reversed(list(d)):
+    if len(k) > 1 and k[0] == k[-1] == '"' and re.fullmatch(k[1:-1], key):
+      return d[k]
+  return default
+
+
+def dump(d, f, cls='dictionary', binary=False, header=None, name=None, precision=None,
+         compress=None):
+  """Dump FOAM file
+
+  Args:
+    d (dict or tuple or array_like): data, array for fields (see
+      dump_field), offsets and indices for faces (see dump_faces)
+    f (file or str or Path): file (binary mode for binary format) or path to
+      file, see open_file
+    cls (str): class of file, e.g. dictionary, scalarField, vectorField
+    binary (bool): binary format of field
+    header (dict or None): header of field
+    name (str or None): name of entry of field, e.g. internalField
+    precision (int or None): significant digits of ascii field
+    compress (bool or None): gzip-compress file at path, by suffix .gz if None
+  """
+  if isinstance(f, (str, os.PathLike)):
+    with open_file(f, 'wb' if binary else 'w', compress) as g:
+      return dump(d, g, cls, binary, header, name, precision)
   if cls == 'dictionary':
     for name, kvs in d.items():
       dump_object(name, kvs, f)
+  elif cls in FIELD_WIDTHS:
+    dump_field(d, f, cls, binary, header, name, precision)
+  elif cls in FACE_LISTS:
+    dump_faces(*d, f, binary, header)
+  elif cls in ZONE_LISTS:
+    dump_zones(d, f, binary, header)
+  elif cls == 'polyBoundaryMesh':
+    dump_boundary(d, f, header)
   else:
     raise NotImplementedError(cls)
 
 
+def dump_field(values, f, cls='scalarField', binary=False, header=None, name=None,
+               precision=None):
+  """Write field as list N(values) or as entry name nonuniform List<type> N(values);
+
+  In ascii format values are written in chunks of CHUNK_SIZE, each chunk is
+  formatted by one % operation (see format_values). In binary format values
+  are written as little-endian block straight from array (see field_dtype),
+  so file should be opened in binary mode.
+
+  Args:
+    values (array_like): (N,) scalars or labels or (N, 3) vectors
+    f (file): file
+    cls (str): scalarField, vectorList, vectorField or labelList
+    binary (bool): binary format
+    header (dict or None): header, e.g. {"FeniaFile": {...}}, format is set
+      by binary
+    name (str or None): name of entry, e.g. internalField
+    precision (int or None): significant digits of ascii scalars, shortest
+      exact representation if None
+  """
+  width = FIELD_WIDTHS[cls]
+  if binary:
+    dtype = field_dtype(cls)
+  else:
+    dtype = np.int64 if cls in LABEL_FIELDS else np.float64
+  values = np.ascontiguousarray(values, dtype)
+  if width > 1 and (values.ndim != 2 or values.shape[1] != width):
+    raise ValueError(f'{cls} should have shape (N, {width}), not {values.shape}')
+  text = io.StringIO(header_text(header, binary))
+  text.seek(0, io.SEEK_END)
+  if name is not None:
+    text.write(f'{name} nonuniform List<{FIELD_TYPES[cls]}> ')
+  end = ');\n' if name is not None else ')\n'
+  if binary:
+    text.write(f'{len(values)}\n(')
+    f.write(text.getvalue().encode())
+    f.write(values.reshape(-1).view(np.uint8))
+    f.write(end.encode())
+    return
+  write = text_writer(f)
+  text.write(f'{len(values)}\n(\n')
+  write(text.getvalue())
+  if cls in LABEL_FIELDS:
+    fmt = '%d'
+  else:
+    fmt = '%r' if precision is None else f'%.{precision}g'
+  for i in range(0, len(values), CHUNK_SIZE):
+    write(format_values(values[i:i + CHUNK_SIZE], fmt))
+  write(end)
+
+
+def header_text(header, binary=False):
+  """Text of header with format set by binary, empty if header is None
+
+  As in files of OpenFOAM, header starts with BANNER and version and format
+  are its first entries, so the default start_from=12 lines of load are
+  banner, name of header, its brace, version, format and class (arch in
+  binary format), the rest of header is skipped by loaders of bodies.
+  """
+  if header is None:
+    return ''
+  text = io.StringIO(BANNER)
+  text.seek(0, io.SEEK_END)
+  fmt = {'format': 'binary', 'arch': f'"{BINARY_ARCH}"'} if binary else {'format': 'ascii'}
+  for name, entries in header.items():
+    rest = {k: v for k, v in entries.items() if k not in ['version', 'format', 'arch']}
+    dump({name: {'version': entries.get('version', 2.0), **fmt, **rest}}, text)
+  return text.getvalue()
+
+
+def text_writer(f):
+  """Function writing text to text or binary file f"""
+  return f.write if isinstance(f, io.TextIOBase) else lambda x: f.write(x.encode())
+
+
+def dump_faces(offsets, indices, f, binary=False, header=None):
+  """Write faces of polyMesh, see load_faces
+
+  In ascii format faces are written as faceList N(k(i ...) ...) in chunks of
+  CHUNK_SIZE faces, each chunk is formatted by one % operation. In binary
+  format offsets and indices are written as faceCompactList, so file should
+  be opened in binary mode.
+
+  Args:
+    offsets (array_like): (N + 1,) offsets of faces in indices
+    indices (array_like): indices of points of faces
+    f (file): file
+    binary (bool): binary format
+    header (dict or None): header, e.g. {"FoamFile": {...}}, format is set
+      by binary
+  """
+  offsets = np.asarray(offsets)
+  if binary:
+    dtype = field_dtype('labelList')
+    f.write(f'{header_text(header, binary)}{len(offsets)}\n('.encode())
+    f.write(np.ascontiguousarray(offsets, dtype).view(np.uint8))
+    f.write(f')\n\n{len(indices)}\n('.encode())
+    f.write(np.ascontiguousarray(indices, dtype).view(np.uint8))
+    f.write(b')\n')
+    return
+  write = text_writer(f)
+  n = len(offsets) - 1
+  write(f'{header_text(header)}{n}\n(\n')
+  indices = np.asarray(indices)
+  lines = {}  # size of face to format of line
+  for i in range(0, n, CHUNK_SIZE):
+    chunk = offsets[i:i + CHUNK_SIZE + 1]
+    sizes = np.diff(chunk).tolist()
+    for k in set(sizes).difference(lines):
+      lines[k] = f'{k}({" ".join(["%d"] * k)})\n'
+    text = ''.join(map(lines.__getitem__, sizes))
+    write(text % tuple(indices[chunk[0]:chunk[-1]].tolist()))
+  write(')\n')
+
+
+def dump_zones(zones, f, binary=False, header=None):
+  """Write cellZones of polyMesh, see load_zones
+
+  Args:
+    zones (dict): name of zone to labels of its cells
+    f (file): file, binary mode for binary format
+    binary (bool): binary format
+    header (dict or None): header, e.g. {"FoamFile": {...}}, format is set
+      by binary
+  """
+  write = text_writer(f)
+  write(f'{header_text(header, binary)}{len(zones)}\n(\n')
+  for name, labels in zones.items():
+    write(f'{name}\n{{\n    type cellZone;\ncellLabels      List<label> ')
+    if binary:
+      labels = np.ascontiguousarray(labels, field_dtype('labelList'))
+      f.write(f'{len(labels)}\n('.encode())
+      f.write(labels.view(np.uint8))
+      f.write(b')')
+    else:
+      labels = np.asarray(labels)
+      write(f'{len(labels)}\n(\n')
+      for i in range(0, len(labels), CHUNK_SIZE):
+        write(format_values(labels[i:i + CHUNK_SIZE], '%d'))
+      write(')')
+    write('\n;\n}\n\n')
+  write(')\n')
+
+
+def dump_boundary(patches, f, header=None):
+  """Write boundary of polyMesh in ascii format, see load_boundary
+
+  Args:
+    patches (dict): name of patch to its entries, e.g. {"type": "patch",
+      "nFaces": 10, "startFace": 100}
+    f (file): file
+    header (dict or None): header, e.g. {"FoamFile": {...}}
+  """
+  text = io.StringIO()
+  text.write(f'{header_text(header)}{len(patches)}\n(\n')
+  for name, entries in patches.items():
+    dump_object(name, entries, text)
+  text.write(')\n')
+  text_writer(f)(text.getvalue())
+
+
+def dump_mesh(mesh, mesh_path, binary=False, header_name='FoamFile'):
+  """Write polyMesh, see load_mesh
+
+  Args:
+    mesh (dict): points, offsets, faces, owner, neighbour, boundary and
+      cellZones (optional)
+    mesh_path (str or Path): polyMesh directory, e.g. constant/polyMesh
+    binary (bool): binary format of arrays
+    header_name (str): name of header dictionary, e.g. FoamFile
+
+  Returns:
+    list of Path: written files
+  """
+  mesh_path = Path(mesh_path)
+  mesh_path.mkdir(parents=True, exist_ok=True)
+  n_cells = max(int(mesh['owner'].max(initial=-1)), int(mesh['neighbour'].max(initial=-1))) + 1
+  note = f'"nPoints:{len(mesh["points"])} nCells:{n_cells} ' \
+         f'nFaces:{len(mesh["owner"])} nInternalFaces:{len(mesh["neighbour"])}"'
+  data = {'points': mesh['points'], 'faces': (mesh['offsets'], mesh['faces']),
+          'owner': mesh['owner'], 'neighbour': mesh['neighbour'],
+          'boundary': mesh['boundary']}
+  if len(mesh.get('cellZones', {})) > 0:
+    data['cellZones'] = mesh['cellZones']
+  paths = []
+  for name, d in data.items():
+    cls = MESH_HEADERS[name]
+    if binary and cls == 'faceList':
+      cls = 'faceCompactList'
+    header = {'version': 2.0, 'class': cls}
+    if name in ['owner', 'neighbour']:
+      header['note'] = note
+    header.update({'location': '"constant/polyMesh"', 'object': name})
+    header = {header_name: header}
+    cls = {'faceCompactList': 'faceList', 'regIOobject': 'cellZoneList'}.get(cls, cls)
+    path = mesh_path / name
+    with open(path, 'wb' if binary else 'w') as f:
+      if cls == 'polyBoundaryMesh':
+        dump_boundary(d, f, header)
+      else:
+        dump(d, f, cls, binary, header)
+    paths.append(path)
+  return paths
+
+
+def format_values(values, fmt='%r'):
+  """Text of values by one % operation, scalar or (vector) per line
+
+  If values repeat (e.g. values of zones mapped to cells) in sample of first
+  SAMPLE_SIZE values, unique values are formatted once.
+
+  Args:
+    values (np.ndarray): (N,) scalars or (N, W) vectors
+    fmt (str): format of one value
+
+  Returns:
+    str: text
+  """
+  flat = values.reshape(-1)
+  line = fmt if values.ndim == 1 else f'({" ".join([fmt] * values.shape[1])})'
+  sample = flat[:SAMPLE_SIZE]
+  if 4 * np.unique(sample).size <= sample.size:
+    unique, inverse = np.unique(flat, return_inverse=True)
+    strings = [fmt % x for x in unique.tolist()]
+    line = line.replace(fmt, '%s')
+    return (f'{line}\n' * len(values)) % tuple(map(strings.__getitem__, inverse.tolist()))
+  return (f'{line}\n' * len(values)) % tuple(flat.tolist())
+
+
 def dump_object(name, kvs, f):
   if name is not None:
     f.write(f'{name}\n')
@@ -1,9 +1,15 @@
+import io
 from pathlib import Path
-import argparse
 
 import ifcopenshell
 
+import ifc2fenia.fields as fields
 import ifc2fenia.foam as foam
+import ifc2fenia.msh as msh
+from ifc2gmsh.cache import DEFAULT_MAX_SIZE
+from ifc2gmsh.extraction import Extraction, load as load_extraction
+from ifc2gmsh.inventory import Inventory
+from ifc2gmsh.profiling import Profiler
 
 
 def ifc2py(v):
@@ -13,37 +19,115 @@ def ifc2py(v):
         return v
 
 
-def main(file_path, output_dir_path='fenia'):
-    # Read
-    file_path = Path(file_path)
-    ifc = ifcopenshell.open(str(file_path))
-    property_sets = ifc.by_type('IfcPropertySet')
-    print(f'property_sets: {len(property_sets)}')
+FENIA_CONDITIONS = ['BoundaryCondition', 'InitialCondition', 'MaterialProperty']
+
+
+def decode_complex_property(prop):
+    """Decode IfcComplexProperty of IBRAE_Fenia property set to plain values
+
+    Args:
+        prop (ifcopenshell.entity_instance): IfcComplexProperty of
+            IfcPropertySingleValue and IfcPropertyListValue
+
+    Returns:
+        dict: name of property to its value, list for IfcPropertyListValue
+
+    Raises:
+        ValueError: if property is neither IfcPropertySingleValue nor
+            IfcPropertyListValue
+    """
+    values = {}
+    # HasProperties, Name and NominalValue (ListValues) by index are faster than by name
+    for x in prop[3]:
+        if x.is_a('IfcPropertySingleValue'):
+            values[ifc2py(x[0])] = ifc2py(x[2])
+        elif x.is_a('IfcPropertyListValue'):
+            values[ifc2py(x[0])] = [ifc2py(y) for y in x[2] or []]
+        else:
+            raise ValueError(f'{x.is_a()} {x[0]} of {prop[0]} is not supported, '
+                             f'only IfcPropertySingleValue and IfcPropertyListValue')
+    return values
+
+
+def get_fenia_conditions(ifc, inventory=None):
+    """Get conditions and properties of zones of IBRAE_Fenia property sets
+
+    Each complex property is decoded once, even if it is shared by property
+    sets of many zones. Duplicates of condition of zone are compared by
+    values, so equal copies in different property sets are allowed.
+
+    Args:
+        ifc (ifcopenshell.file): model
+        inventory (Inventory or None): inventory of model, built if None
+
+    Returns:
+        dict: name of condition (see FENIA_CONDITIONS) to UsageName of zone
+            to name of property to value
+    """
+    inventory = Inventory(ifc) if inventory is None else inventory
+    conditions = {x: {} for x in FENIA_CONDITIONS}
+    decoded = {}  # id of complex property to its values
+    for prop_set in inventory.property_sets.get('IBRAE_Fenia', []):
+        for prop in prop_set[4]:  # HasProperties
+            kind = conditions.get(ifc2py(prop[0]))  # Name
+            if kind is None:
+                continue
+            values = decoded.get(prop.id())
+            if values is None:
+                values = decode_complex_property(prop)
+                decoded[prop.id()] = values
+            zone = ifc2py(prop[2])  # UsageName
+            old_values = kind.setdefault(zone, values)
+            if old_values is not values and old_values != values:
+                raise ValueError(f'Conflicting {ifc2py(prop[0])} of zone {zone}: '
+                                 f'{old_values} != {values}')
+    return conditions
+
+
+def dump_dictionary(d, path):
+    """Write FOAM dictionary to file by one write of text formatted in memory"""
+    f = io.StringIO()
+    foam.dump(d, f, cls='dictionary')
+    with open(path, 'w') as g:
+        g.write(f.getvalue())
+
+
+def convert(ifc, output_dir_path='fenia', inventory=None, profiler=None,
+            mesh_path=None, binary=False, extraction=None):
+    """Write FENIA conditions and properties of model
+
+    Args:
+        ifc (ifcopenshell.file or None): model, not used if extraction is set
+        output_dir_path (str or Path): output directory
+        inventory (Inventory or None): inventory of model, built if None
+        profiler (Profiler or None): profiler of stages
+        mesh_path (str or Path or None): polyMesh directory with cellZones
+            named as zones of model and boundary, initial and heat source fields
+            of cells (see ifc2fenia.fields) are written to 0 directory if set
+        binary (bool): binary format of fields of cells
+        extraction (Extraction or None): data of model, extracted from ifc if None
+
+    Returns:
+        list of str: written files relative to output directory
+    """
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    if extraction is None:
+        extraction = Extraction(ifc, inventory=inventory, profiler=profiler)
+    n_property_sets = extraction.summary['property_sets']
+    print(f'property_sets: {n_property_sets}')
+    profiler.metadata['property_sets'] = n_property_sets
 
     # Get data
-    initial_conditions = {}
-    boundary_conditions = {}
-    material_properties = {}
-    for x in property_sets:
-        prop_set_name = ifc2py(x.Name)
-        if prop_set_name == 'IBRAE_Fenia':
-            for y in x.HasProperties:
-                name = ifc2py(y.Name)
-                if name in ['BoundaryCondition', 'InitialCondition', 'MaterialProperty']:
-                    uname = ifc2py(y.UsageName)
-                    if name == 'BoundaryCondition':
-                        boundary_conditions.setdefault(uname, []).append(y)
-                    elif name == 'InitialCondition':
-                        initial_conditions.setdefault(uname, []).append(y)
-                    elif name == 'MaterialProperty':
-                        material_properties.setdefault(uname, []).append(y)
-    print(initial_conditions)
-    print(boundary_conditions)
-    print(material_properties)
-
-    # Write BC
+    conditions = extraction.fenia_conditions
+    boundary_conditions = conditions['BoundaryCondition']
+    initial_conditions = conditions['InitialCondition']
+    material_properties = conditions['MaterialProperty']
+    print(f'IBRAE_Fenia boundary conditions: {len(boundary_conditions)}, '
+          f'initial conditions: {len(initial_conditions)}, '
+          f'material properties: {len(material_properties)}')
+
+    # BC
     output_dir_path = Path(output_dir_path)
-    output_dir_path.mkdir(parents=True, exist_ok=True)
     foam_bcs = {
         "FeniaFile": {
             "version": 2.0,
@@ -51,23 +135,15 @@ def main(file_path, output_dir_path='fenia'):
             "class": "dictionary",
             "location": "const",
             "object": "condition"}}
-    for bc_name, bc_values in boundary_conditions.items():
-        assert len(set(bc_values)) == 1
-        bc = bc_values[0]
+    for bc_name, bc in boundary_conditions.items():
         foam_bc = {}
-        for p in bc.HasProperties:
-            key = ifc2py(p.Name)
-            value = ifc2py(p.NominalValue)
+        for key, value in bc.items():
             if key in ['timeValueTr']:
                 key = f'{key} const'
             foam_bc[key] = value
         foam_bcs[bc_name] = foam_bc
-    bcs_path = output_dir_path / 'constant' / 'T'
-    bcs_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(bcs_path, 'w') as f:
-        foam.dump(foam_bcs, f, cls='dictionary')
 
-    # Write MAT and IC
+    # MAT and IC
     foam_mats = {
         "FeniaFile": {
             "version": 2.0,
@@ -82,38 +158,54 @@ def main(file_path, output_dir_path='fenia'):
             "cHeat": 800
         }
     }
-    for mat_name, mat_values in material_properties.items():
-        assert len(set(mat_values)) == 1
+    for mat_name, mat in material_properties.items():
         foam_mat = {}
-        mat = mat_values[0]
-        for p in mat.HasProperties:
-            key = ifc2py(p.Name)
-            value = ifc2py(p.NominalValue)
+        for key, value in mat.items():
             if key in ['Young', 'Poisson', 'alpha', 'stressCoeff', 'Hard']:
                 key = f'{key} const'
             if key in ['DT'] and isinstance(value, (float, int)):
                 value = [value, value, value]
             foam_mat[key] = value
-        ics = initial_conditions.get(mat_name, None)
-        if ics is not None:
-            assert len(set(ics)) == 1
-            ic = ics[0]
-            for p in ic.HasProperties:
-                key = ifc2py(p.Name)
-                value = ifc2py(p.NominalValue)
-                if key != 'type':
-                    foam_mat[key] = value
+        ic = initial_conditions.get(mat_name, {})
+        foam_mat.update({k: v for k, v in ic.items() if k != 'type'})
         foam_mats[mat_name] = foam_mat
+
+    # Write
+    bcs_path = output_dir_path / 'constant' / 'T'
     mat_path = output_dir_path / 'constant' / 'termProperty'
     mat_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(mat_path, 'w') as f:
-        foam.dump(foam_mats, f, cls='dictionary')
+    with profiler.stage('write'):
+        dump_dictionary(foam_bcs, bcs_path)
+        dump_dictionary(foam_mats, mat_path)
+    files = [bcs_path.relative_to(output_dir_path).as_posix(),
+             mat_path.relative_to(output_dir_path).as_posix()]
+    if mesh_path is not None:
+        with profiler.stage('fields'):
+            zones = foam.load(foam.field_path(mesh_path, 'cellZones'), 'cellZoneList')
+            owner = foam.load(foam.field_path(mesh_path, 'owner'), 'labelList')
+            boundary = foam.load(foam.field_path(mesh_path, 'boundary'), 'polyBoundaryMesh')
+            n_cells = int(owner.max()) + 1 if len(owner) > 0 else 0
+            files.extend(fields.write_fields(
+                zones, {k: v for k, v in foam_mats.items() if k != 'FeniaFile'},
+                output_dir_path, n_cells, binary=binary, boundary=boundary))
+    return files
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--file_path')
-    parser.add_argument('--output_dir_path')
-    args = parser.parse_args()
-    kwargs = vars(args)
-    main(**kwargs)
+def main(file_path, output_dir_path='fenia', profile=False, cprofile=False,
+         cache=None, cache_size=DEFAULT_MAX_SIZE, mesh_path=None, binary=False,
+         msh_path=None):
+    profiler = Profiler(enabled=profile or cprofile, cprofile=cprofile)
+    profiler.metadata.update({'converter': 'ifc2fenia.main',
+                              'file_path': str(file_path)})
+    profiler.start()
+    output_dir_path = Path(output_dir_path)
+    extraction = load_extraction(file_path, cache, cache_size, profiler=profiler)
+    if msh_path is not None:
+        with profiler.stage('mesh'):
+            msh.convert(msh_path, output_dir_path, binary)
+        mesh_path = output_dir_path / 'constant' / 'polyMesh'
+    convert(None, output_dir_path, profiler=profiler, mesh_path=mesh_path,
+            binary=binary, extraction=extraction)
+    profiler.stop()
+    profiler.dump(output_dir_path)
+
@@ -0,0 +1,459 @@
+"""Conversion of gmsh mesh (MSH 4.1, ascii or binary) to polyMesh
+
+Nodes and elements are read by blocks straight into NumPy arrays (see
+read_msh). Faces of cells are matched by sorting of their sorted points in
+buckets of faces by min point (see poly_mesh), so memory of temporaries of
+matching is bounded by face_chunk faces. Physical volumes are written as cellZones and
+physical surfaces as patches, named by $PhysicalNames, i.e. by VolumeZones
+and SurfacesZones of IBRAE_Gmsh properties of model.
+"""
+from itertools import islice
+from pathlib import Path
+import struct
+
+import numpy as np
+
+import ifc2fenia.foam as foam
+
+# Number of nodes of element by type, see gmsh MSH file format
+ELEMENT_NODES = {1: 2, 2: 3, 3: 4, 4: 4, 5: 8, 6: 6, 7: 5, 8: 3, 9: 6, 10: 9, 11: 10,
+                 12: 27, 13: 18, 14: 14, 15: 1, 16: 8, 17: 20, 18: 15, 19: 13}
+VOLUME_TYPES = [4, 11, 5, 12, 17, 6, 13, 18, 7, 14, 19]  # of dimension 3
+# Faces of tetrahedron, hexahedron, prism and pyramid with outward normals
+CELL_FACES = {4: [(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)],
+              5: [(0, 3, 2, 1), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6),
+                  (0, 4, 7, 3)],
+              6: [(0, 2, 1), (3, 4, 5), (0, 1, 4, 3), (1, 2, 5, 4), (0, 3, 5, 2)],
+              7: [(0, 3, 2, 1), (0, 1, 4), (1, 2, 4), (2, 3, 4), (3, 0, 4)]}
+CELL_CORNERS = {4: (0, 1, 2, 3), 5: (0, 1, 3, 4), 6: (0, 1, 2, 3), 7: (0, 1, 3, 4)}  # positive
+SURFACE_TYPES = {2: 3, 3: 4}  # triangle and quadrangle to number of points
+DEFAULT_PATCH = 'defaultFaces'  # boundary faces without physical surface
+CHUNK_SIZE = 1 << 20  # nodes or elements read at once
+FACE_CHUNK = 1 << 22  # faces matched at once
+
+
+def load_msh(file_path):
+    """Load gmsh mesh, see read_msh"""
+    with foam.open_file(file_path, 'rb') as f:
+        return read_msh(f)
+
+
+def read_msh(f):
+    """Read gmsh mesh of MSH 4.1 format, ascii or binary
+
+    Only linear volume elements (tetrahedra, hexahedra, prisms and pyramids)
+    and surface elements (triangles and quadrangles) are kept, points of
+    elements are indices of nodes.
+
+    Args:
+        f (file): file opened in binary mode
+
+    Returns:
+        dict: points (N, 3) float64, cells and surfaces (dict) type of
+            element to (n, k) int32 indices of its points, cells_entities and
+            surfaces_entities (dict) type of element to (n,) int32 tags of
+            entities of elements, physical (dict) dimension and tag of entity
+            to tuple of physical tags, names (dict) dimension and physical
+            tag to name
+    """
+    msh = {'points': np.empty((0, 3)), 'cells': {}, 'cells_entities': {},
+           'surfaces': {}, 'surfaces_entities': {}, 'physical': {}, 'names': {}}
+    binary, order = False, '<'
+    index = np.empty(0, np.int32)  # tag of node to index
+    for line in iter(f.readline, b''):
+        section = line.strip()
+        if section == b'$MeshFormat':
+            version, file_type, data_size = f.readline().split()
+            if version != b'4.1' or data_size != b'8':
+                raise NotImplementedError(f'MSH {version.decode()} with data size '
+                                          f'{data_size.decode()}')
+            binary = file_type == b'1'
+            if binary:
+                order = '<' if f.read(4) == struct.pack('<i', 1) else '>'
+                f.readline()
+        elif section == b'$PhysicalNames':
+            for _ in range(int(f.readline())):
+                dim, tag, name = f.readline().split(maxsplit=2)
+                msh['names'][(int(dim), int(tag))] = name.strip().strip(b'"').decode()
+        elif section == b'$Entities':
+            msh['physical'] = read_entities(f, binary, order)
+        elif section == b'$Nodes':
+            msh['points'], index = read_nodes(f, binary, order)
+        elif section == b'$Elements':
+            read_elements(f, binary, order, index, msh)
+        elif section.startswith(b'$'):  # skip other sections
+            end = b'$End' + section[1:]
+            for x in iter(f.readline, b''):
+                if x.strip() == end:
+                    break
+            continue
+        else:
+            continue
+        end = f.readline().strip()
+        if end != b'$End' + section[1:]:
+            raise ValueError(f'End of {section.decode()} is not found: {end[:80]}')
+    for key in ['cells', 'cells_entities', 'surfaces', 'surfaces_entities']:
+        msh[key] = {k: np.concatenate(v) for k, v in msh[key].items()}
+    return msh
+
+
+def read_entities(f, binary=False, order='<'):
+    """Physical tags of entities, see read_msh"""
+    physical = {}
+    if binary:
+        counts = struct.unpack(f'{order}4Q', f.read(32))
+        for dim, n in enumerate(counts):
+            for _ in range(n):
+                size = 4 + (3 if dim == 0 else 6) * 8  # tag and coordinates
+                tag = struct.unpack(f'{order}i', f.read(size)[:4])[0]
+                n_tags = struct.unpack(f'{order}Q', f.read(8))[0]
+                physical[(dim, tag)] = struct.unpack(f'{order}{n_tags}i', f.read(4 * n_tags))
+                if dim > 0:  # bounding entities
+                    f.read(4 * struct.unpack(f'{order}Q', f.read(8))[0])
+        f.readline()
+    else:
+        counts = [int(x) for x in f.readline().split()]
+        for dim, n in enumerate(counts):
+            for _ in range(n):
+                tokens = f.readline().split()
+                start = 4 if dim == 0 else 7  # after tag and coordinates
+                n_tags = int(tokens[start])
+                physical[(dim, int(tokens[0]))] = tuple(
+                    int(x) for x in tokens[start + 1:start + 1 + n_tags])
+    return physical
+
+
+def read_nodes(f, binary=False, order='<'):
+    """Coordinates of nodes and indices of nodes by tags, see read_msh"""
+    if binary:
+        n_blocks, n_nodes, _, max_tag = struct.unpack(f'{order}4Q', f.read(32))
+    else:
+        n_blocks, n_nodes, _, max_tag = [int(x) for x in f.readline().split()]
+    points = np.empty((n_nodes, 3))
+    index = np.full(max_tag + 1, -1, np.int32)
+    start = 0
+    for _ in range(n_blocks):
+        if binary:
+            dim, _, parametric, n = struct.unpack(f'{order}3iQ', f.read(20))
+        else:
+            dim, _, parametric, n = [int(x) for x in f.readline().split()]
+        width = 3 + (dim if parametric else 0)
+        tags = read_array(f, n, 1, binary, f'{order}i8').ravel()
+        index[tags] = np.arange(start, start + n, dtype=np.int32)
+        for i in range(0, n, CHUNK_SIZE):
+            chunk = read_array(f, min(CHUNK_SIZE, n - i), width, binary, f'{order}f8')
+            points[start + i:start + i + len(chunk)] = chunk[:, :3]
+        start += n
+    if binary:
+        f.readline()
+    return points, index
+
+
+def read_elements(f, binary, order, index, msh):
+    """Read volume and surface elements to msh, see read_msh"""
+    if binary:
+        n_blocks = struct.unpack(f'{order}4Q', f.read(32))[0]
+    else:
+        n_blocks = int(f.readline().split()[0])
+    for _ in range(n_blocks):
+        if binary:
+            _, entity, element_type, n = struct.unpack(f'{order}3iQ', f.read(20))
+        else:
+            _, entity, element_type, n = [int(x) for x in f.readline().split()]
+        if element_type not in ELEMENT_NODES:
+            raise NotImplementedError(f'Element type {element_type}')
+        width = 1 + ELEMENT_NODES[element_type]  # tag and nodes
+        if element_type in CELL_FACES:
+            key = 'cells'
+        elif element_type in SURFACE_TYPES:
+            key = 'surfaces'
+        elif element_type in VOLUME_TYPES:
+            raise NotImplementedError(f'Volume element type {element_type}')
+        else:
+            key = None
+        for i in range(0, n, CHUNK_SIZE):
+            chunk = read_array(f, min(CHUNK_SIZE, n - i), width, binary, f'{order}i8')
+            if key is not None:
+                msh[key].setdefault(element_type, []).append(index[chunk[:, 1:]])
+                msh[f'{key}_entities'].setdefault(element_type, []).append(
+                    np.full(len(chunk), entity, np.int32))
+    if binary:
+        f.readline()
+
+
+def read_array(f, n, width, binary, dtype):
+    """Read n rows of width numbers, ascii rows are lines"""
+    if binary:
+        dtype = np.dtype(dtype)
+        data = f.read(n * width * dtype.itemsize)
+        v = np.frombuffer(data, dtype)
+    else:
+        data = b''.join(islice(f, n))
+        v = np.fromstring(data, np.dtype(dtype).newbyteorder('='), sep=' ') if n > 0 \
+            else np.empty(0, dtype)
+    if v.size != n * width:
+        raise ValueError(f'{n} rows of {width} numbers have {v.size} numbers')
+    return v.reshape(n, width)
+
+
+def match_faces(faces, codes):
+    """Match faces by sets of their points
+
+    Faces with the same points are found by one sort of sorted points of
+    faces. Face of two cells is internal, face of one cell is boundary one,
+    surface element with the same points gives its patch.
+
+    Args:
+        faces (np.ndarray): (M, k) int32 points of faces of cells, outward
+            oriented, and of surface elements
+        codes (np.ndarray): (M,) int32 cell of face or -1 - patch of surface
+            element
+
+    Returns:
+        tuple: owner, neighbour and points of internal faces (oriented
+            outward of owner), owner, patch (-1 if none) and points of
+            boundary faces
+    """
+    n_points = int(faces.max(initial=0)) + 1
+    keys = np.sort(faces, axis=1)
+    codes_order = codes.view(np.uint32)  # cells ascending, surface elements after
+    if n_points ** keys.shape[1] < 1 << 62:  # points of face packed to one key
+        packed = np.zeros(len(keys), np.int64)
+        for j in range(keys.shape[1]):
+            packed = packed * n_points + keys[:, j]
+        order = np.lexsort((codes_order, packed))
+        packed = packed[order]
+        new = np.empty(len(order), bool)
+        new[:1] = True
+        np.not_equal(packed[1:], packed[:-1], out=new[1:])
+    else:
+        order = np.lexsort((codes_order,) + tuple(keys[:, j] for j in
+                                                  range(keys.shape[1] - 1, -1, -1)))
+        keys = keys[order]
+        new = np.empty(len(order), bool)
+        new[:1] = True
+        np.any(keys[1:] != keys[:-1], axis=1, out=new[1:])
+    codes = codes[order]
+    starts = np.flatnonzero(new)
+    sizes = np.diff(np.append(starts, len(order)))
+    n_cells = np.add.reduceat((codes >= 0).astype(np.int32), starts) if len(starts) > 0 \
+        else np.empty(0, np.int32)
+    if np.any(n_cells > 2):
+        raise ValueError(f'{np.count_nonzero(n_cells > 2)} faces of more than 2 cells')
+    internal = starts[n_cells == 2]
+    boundary = starts[n_cells == 1]
+    patch = np.full(len(boundary), -1, np.int32)
+    surface = sizes[n_cells == 1] > 1
+    patch[surface] = -1 - codes[boundary[surface] + 1]
+    return (codes[internal], codes[internal + 1], faces[order[internal]],
+            codes[boundary], patch, faces[order[boundary]])
+
+
+def poly_mesh(msh, face_chunk=FACE_CHUNK):
+    """polyMesh of gmsh mesh
+
+    Unused nodes are removed. Faces of cells with negative volume are
+    reversed. Faces are gathered and matched (see match_faces) in buckets of
+    about face_chunk faces with min point in range of points. Internal faces
+    are sorted by owner and neighbour, boundary ones by patch and owner.
+    Surface elements inside of mesh, e.g. between zones, are skipped.
+
+    Args:
+        msh (dict): gmsh mesh, see read_msh, its cells are removed after
+            renumbering of nodes to release their memory
+        face_chunk (int): max number of faces matched at once (but faces of
+            one point)
+
+    Returns:
+        dict: polyMesh, see foam.load_mesh
+    """
+    msh_cells = msh.pop('cells')
+    types = [x for x in CELL_FACES if x in msh_cells]
+    starts = np.cumsum([0] + [len(msh_cells[x]) for x in types])
+    n_cells = int(starts[-1])
+    used = np.zeros(len(msh['points']), bool)
+    for t in types:
+        used[msh_cells[t]] = True
+    new = np.cumsum(used, dtype=np.int32) - 1
+    points = msh['points'][used]
+    n_points = len(points)
+    cells = {t: new[msh_cells[t]] for t in types}
+    del msh_cells
+    # Zones by physical volumes, patches by physical surfaces
+    cells_physical = np.concatenate([physical_tags(msh, 3, msh['cells_entities'][t])
+                                     for t in types]) if types else np.empty(0, np.int64)
+    zones = {msh['names'].get((3, x), str(x)): np.flatnonzero(cells_physical == x).astype(np.int32)
+             for x in np.unique(cells_physical[cells_physical >= 0]).tolist()}
+    surfaces, patches = {}, {}
+    for t, x in msh['surfaces'].items():
+        tags = physical_tags(msh, 2, msh['surfaces_entities'][t])
+        valid = (tags >= 0) & used[x].all(axis=1)
+        for tag in np.unique(tags[valid]).tolist():
+            patches.setdefault(tag, len(patches))
+        lut = np.full(max(patches, default=0) + 1, -1, np.int32)
+        lut[list(patches)] = list(patches.values())
+        surfaces[t] = new[x[valid]], -1 - lut[tags[valid]]
+    # Sources of faces: points, codes of rows (cells or patches) and flipped rows
+    sources = {3: [], 4: []}
+    for t, start in zip(types, starts):
+        corners = cells[t][:, CELL_CORNERS[t]]
+        p = points[corners[:, 0]]
+        flip = np.einsum('ij,ij->i', np.cross(points[corners[:, 1]] - p, points[corners[:, 2]] - p),
+                         points[corners[:, 3]] - p) < 0
+        for face in CELL_FACES[t]:
+            sources[len(face)].append((cells[t], face, start, flip if flip.any() else None))
+    for t, (x, codes) in surfaces.items():
+        sources[SURFACE_TYPES[t]].append((x, None, codes, None))
+    n_buckets, selections = buckets(sources, n_points, face_chunk)
+    internal, boundary = [], []
+    for bucket in range(n_buckets):
+        for k, k_sources in sources.items():
+            faces, codes = gather_faces(
+                k_sources, None if selections is None else selections[k], bucket)
+            if len(faces) == 0:
+                continue
+            owner, neighbour, x, boundary_owner, patch, y = match_faces(faces, codes)
+            internal.append((owner, neighbour, x))
+            boundary.append((boundary_owner, patch, y))
+    # Internal faces first, sorted by owner and neighbour, boundary faces by patch
+    owner = np.concatenate([x[0] for x in internal] + [np.empty(0, np.int32)])
+    neighbour = np.concatenate([x[1] for x in internal] + [np.empty(0, np.int32)])
+    boundary_owner = np.concatenate([x[0] for x in boundary] + [np.empty(0, np.int32)])
+    patch = np.concatenate([x[1] for x in boundary] + [np.empty(0, np.int32)])
+    patch[patch < 0] = len(patches)
+    internal_order = np.lexsort((neighbour, owner))
+    boundary_order = np.lexsort((boundary_owner, patch))
+    order = np.concatenate([internal_order, len(owner) + boundary_order])
+    groups = [x[2] for x in internal] + [x[2] for x in boundary]
+    sizes = np.concatenate([np.full(len(x), x.shape[1], np.int32) for x in groups] +
+                           [np.empty(0, np.int32)])
+    offsets = np.zeros(len(sizes) + 1, np.int32)
+    np.cumsum(sizes[order], out=offsets[1:])
+    position = np.empty(len(order), np.int64)  # of face of groups in sorted faces
+    position[order] = np.arange(len(order))
+    indices = np.empty(offsets[-1], np.int32)
+    start = 0
+    for x in groups:
+        p = offsets[position[start:start + len(x)]]
+        indices[p[:, None] + np.arange(x.shape[1])] = x
+        start += len(x)
+    counts = np.bincount(patch, minlength=len(patches) + 1)
+    names = [msh['names'].get((2, x), str(x)) for x in patches] + [DEFAULT_PATCH]
+    boundary_patches, start_face = {}, len(owner)
+    for i, (name, n) in enumerate(zip(names, counts.tolist())):
+        if n > 0 or i < len(patches):
+            boundary_patches[name] = {'type': 'patch', 'nFaces': n, 'startFace': start_face}
+        start_face += n
+    return {'points': points, 'offsets': offsets, 'faces': indices,
+            'owner': np.concatenate([owner[internal_order], boundary_owner[boundary_order]]),
+            'neighbour': neighbour[internal_order], 'boundary': boundary_patches,
+            'cellZones': zones}
+
+
+def physical_tags(msh, dim, entities):
+    """First physical tag of entity of each element, -1 if none"""
+    lut = np.full(int(entities.max(initial=0)) + 1, -1, np.int64)
+    for (d, tag), tags in msh['physical'].items():
+        if d == dim and len(tags) > 0 and tag < len(lut):
+            lut[tag] = tags[0]
+    return lut[entities]
+
+
+def buckets(sources, n_points, face_chunk=FACE_CHUNK):
+    """Buckets of faces by ranges of their min points
+
+    Faces with min point in range of points are matched at once. Ranges have
+    about face_chunk faces. Min point of each face is found once, rows of faces
+    of each source are sorted by bucket once, so faces of bucket are gathered
+    by slice of rows, see gather_faces.
+
+    Returns:
+        tuple: number of buckets and selections, number of face size to list of
+            rows sorted by bucket and offsets of buckets in rows for each source,
+            None if there is one bucket
+    """
+    n_faces = sum(len(x) for k_sources in sources.values() for x, *_ in k_sources)
+    if n_faces <= face_chunk:
+        return 1, None
+    mins = {k: [face_mins(x, face) for x, face, *_ in k_sources]
+            for k, k_sources in sources.items()}
+    counts = np.zeros(n_points, np.int64)  # faces by min point
+    for k_mins in mins.values():
+        for m in k_mins:
+            counts += np.bincount(m, minlength=n_points)
+    cumulative = np.cumsum(counts)
+    edges = np.searchsorted(cumulative, np.arange(face_chunk, n_faces, face_chunk), 'right')
+    edges = np.array(sorted(set(edges.tolist()).difference([0, n_points])), np.int64)
+    n_buckets = len(edges) + 1
+    selections = {}
+    for k, k_mins in mins.items():
+        selections[k] = []
+        while k_mins:
+            bucket = np.searchsorted(edges, k_mins.pop(0), 'right')
+            offsets = np.zeros(n_buckets + 1, np.int64)
+            np.cumsum(np.bincount(bucket, minlength=n_buckets), out=offsets[1:])
+            selections[k].append((np.argsort(bucket, kind='stable'), offsets))
+    return n_buckets, selections
+
+
+def face_mins(x, face=None):
+    """Min point of each face, rows of x or columns face of rows of x"""
+    mins = np.empty(len(x), x.dtype)
+    for i in range(0, len(x), CHUNK_SIZE):
+        chunk = x[i:i + CHUNK_SIZE]
+        (chunk if face is None else chunk[:, face]).min(axis=1, out=mins[i:i + CHUNK_SIZE])
+    return mins
+
+
+def gather_faces(sources, selections=None, bucket=0):
+    """Points and codes of faces of bucket, see buckets and match_faces
+
+    Args:
+        sources (list): sources of faces of one size
+        selections (list or None): rows sorted by bucket and offsets of buckets
+            for each source, all faces if None
+        bucket (int): index of bucket
+
+    Returns:
+        tuple: (N, k) points and (N,) codes of faces
+    """
+    faces, codes = [], []
+    for j, (x, face, code, flip) in enumerate(sources):
+        if selections is None:
+            rows = np.arange(len(x))
+        else:
+            order, offsets = selections[j]
+            rows = order[offsets[bucket]:offsets[bucket + 1]]
+        for i in range(0, len(rows), CHUNK_SIZE):
+            chunk_rows = rows[i:i + CHUNK_SIZE]
+            chunk = x[chunk_rows] if face is None else x[chunk_rows[:, None], face]
+            if flip is not None:
+                reversed_rows = flip[chunk_rows]
+                chunk[reversed_rows] = chunk[reversed_rows, ::-1]
+            faces.append(chunk)
+            if face is None:
+                codes.append(code[chunk_rows])
+            else:
+                codes.append((code + chunk_rows).astype(np.int32))
+    if len(faces) == 0:
+        return np.empty((0, 3), np.int32), np.empty(0, np.int32)
+    return np.concatenate(faces), np.concatenate(codes)
+
+
+def convert(msh_path, output_dir_path='fenia', binary=False, face_chunk=FACE_CHUNK):
+    """Write polyMesh of gmsh mesh to constant/polyMesh of output directory
+
+    Args:
+        msh_path (str or Path): path to .msh file
+        output_dir_path (str or Path): output directory
+        binary (bool): binary format of polyMesh
+        face_chunk (int): max number of faces matched at once, see poly_mesh
+
+    Returns:
+        list of str: written files relative to output directory
+    """
+    output_dir_path = Path(output_dir_path)
+    mesh = poly_mesh(load_msh(msh_path), face_chunk)
+    paths = foam.dump_mesh(mesh, output_dir_path / 'constant' / 'polyMesh', binary,
+                           header_name='FeniaFile')
+    return [x.relative_to(output_dir_path).as_posix() for x in paths]
@@ -1,19 +1,53 @@
 import argparse
+import inspect
+
+from ifc2gmsh.cache import DEFAULT_CACHE_PATH
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--file_path')
-    parser.add_argument('--output_dir_path')
-    parser.add_argument('-t', '--type', default='geometry')
+    parser.add_argument('--output_dir_path', default=argparse.SUPPRESS)
+    parser.add_argument('-t', '--type', default='geometry',
+                        help='geometry, properties or all (with FENIA)')
+    parser.add_argument('-w', '--workers', type=int, default=argparse.SUPPRESS,
+                        help='number of processes for geometry')
+    parser.add_argument('-d', '--deduplicate', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='write each unique shape of geometry once')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='rewrite only changed items of geometry')
+    parser.add_argument('-g', '--global_ids', nargs='+', default=argparse.SUPPRESS,
+                        help='GlobalId of products for properties, all by default')
+    parser.add_argument('-p', '--profile', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='write profile of stages next to output')
+    parser.add_argument('--cprofile', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='write cProfile stats next to output')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        default=argparse.SUPPRESS,
+                        help='print statistics of model for geometry')
+    parser.add_argument('-c', '--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        default=argparse.SUPPRESS,
+                        help=f'path to cache of extracted data, {DEFAULT_CACHE_PATH} '
+                             f'if no value')
+    parser.add_argument('--cache_size', type=lambda x: int(float(x) * (1 << 20)),
+                        default=argparse.SUPPRESS, help='max size of cache, MB')
     args = parser.parse_args()
     kwargs = vars(args)
     t = kwargs.pop('type', None)
     if t == 'geometry':
         from ifc2gmsh.geometry import main
-        main(**kwargs)
     elif t == 'properties':
         from ifc2gmsh.properties import main
-        main(**kwargs)
+    elif t == 'all':
+        from ifc2gmsh.pipeline import main
     else:
         raise NotImplementedError(t)
+    unsupported = set(kwargs) - set(inspect.signature(main).parameters)
+    if unsupported:
+        parser.error(f'options not supported by type {t}: '
+                     f'{", ".join(f"--{x}" for x in sorted(unsupported))}')
+    main(**kwargs)
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = Path(os.environ.get(
+    'IFC2GMSH_CACHE_DIR', Path.home() / '.cache' / 'ifc2gmsh')) / 'cache.sqlite'
+DEFAULT_MAX_SIZE = 1 << 30  # bytes
+DEFAULT_MAX_HASHES = 1 << 12  # rows
+CHUNK_SIZE = 1 << 20
+SCHEMA_VERSION = 3  # tables are recreated if user_version of database differs
+
+
+def hash_file(file_path):
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def converter_version():
+    """Hash of sources of converters, any change of code invalidates cache"""
+    h = hashlib.sha1()
+    root = Path(__file__).resolve().parents[1]
+    for package in ['ifc2gmsh', 'ifc2fenia']:
+        for path in sorted((root / package).glob('*.py')):
+            h.update(path.name.encode())
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class Cache:
+    """Persistent cache of data extracted from IFC files in SQLite database
+
+    Entry is a set of named files, e.g. parts of ifc2gmsh.extraction.Extraction,
+    stored as plain rows (name TEXT, value BLOB) with zlib-compressed
+    values, nothing is unpickled, so database can be shared between
+    machines. Entries are keyed by content hash of IFC file, name of data
+    and version of converters (see converter_version). Least recently used
+    entries are evicted when total size of values exceeds max_size. Hashes
+    of files are memoized by path, size and mtime, least recently used of
+    them are evicted when their number exceeds max_hashes.
+
+    Args:
+        path (str or Path or None): path to database, DEFAULT_CACHE_PATH if None
+        max_size (int): max total size of values in bytes
+        max_hashes (int): max number of memoized hashes of files
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE, max_hashes=DEFAULT_MAX_HASHES):
+        self.path = Path(DEFAULT_CACHE_PATH if path is None else path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.max_hashes = max_hashes
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        with self.connection:
+            if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                self.connection.execute('DROP TABLE IF EXISTS entries')
+                self.connection.execute('DROP TABLE IF EXISTS files')
+                self.connection.execute('DROP TABLE IF EXISTS hashes')
+                self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, size INTEGER, accessed REAL)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS files '
+                '(key TEXT, name TEXT, value BLOB, PRIMARY KEY (key, name))')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS hashes '
+                '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT, '
+                'accessed REAL)')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def file_hash(self, file_path):
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        row = self.connection.execute(
+            'SELECT hash FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row is not None:
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE hashes SET accessed = ? WHERE path = ?', (time.time(), path))
+            return row[0]
+        h = hash_file(path)
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime_ns, h, time.time()))
+            self.evict_hashes()
+        return h
+
+    def key(self, file_path, name, options=None):
+        """Key of data of IFC file, e.g. name of converter and its options"""
+        data = [self.file_hash(file_path), name, options, converter_version()]
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key):
+        """Files of entry
+
+        Returns:
+            dict or None: name to content (bytes), None if there is no entry
+        """
+        if self.connection.execute(
+                'SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is None:
+            return None
+        with self.connection:
+            self.connection.execute(
+                'UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        rows = self.connection.execute(
+            'SELECT name, value FROM files WHERE key = ? ORDER BY rowid', (key,))
+        return {name: zlib.decompress(value) for name, value in rows}
+
+    def put(self, key, files):
+        """Store files of entry, entry larger than max_size is not stored
+
+        Args:
+            key (str): key of entry
+            files (dict): name to content (bytes)
+        """
+        rows = [(key, name, zlib.compress(value)) for name, value in files.items()]
+        size = sum(len(x[2]) for x in rows)
+        if size > self.max_size:
+            return
+        with self.connection:
+            self.remove(key)
+            self.connection.execute('INSERT INTO entries VALUES (?, ?, ?)',
+                                    (key, size, time.time()))
+            self.connection.executemany('INSERT INTO files VALUES (?, ?, ?)', rows)
+            self.evict()
+
+    def remove(self, key):
+        self.connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+        self.connection.execute('DELETE FROM files WHERE key = ?', (key,))
+
+    def evict(self):
+        """Remove least recently used entries while size > max_size"""
+        size = self.size()
+        if size <= self.max_size:
+            return
+        rows = self.connection.execute(
+            'SELECT key, size FROM entries ORDER BY accessed').fetchall()
+        for key, entry_size in rows:
+            if size <= self.max_size:
+                break
+            self.remove(key)
+            size -= entry_size
+
+    def evict_hashes(self):
+        """Remove least recently used hashes of files while their number > max_hashes"""
+        self.connection.execute(
+            'DELETE FROM hashes WHERE path NOT IN '
+            '(SELECT path FROM hashes ORDER BY accessed DESC LIMIT ?)', (self.max_hashes,))
+
+    def size(self):
+        return self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
@@ -0,0 +1,312 @@
+"""Data of model shared by converters
+
+Converters of one IFC file (geometry and properties of ifc2gmsh and
+ifc2fenia) need the same data of it: parsed items, transforms of children of
+products and property maps. Extraction gathers each part lazily from
+model, and load shares parts between runs of converters by entries of
+Cache, one per part, keyed by hash of file and version of converters, so
+each part is extracted once for all of them and the model is opened only if
+a part that a converter needs is missing.
+
+Parts are stored in entries as plain files (JSON and NumPy .npz without
+pickled objects), see Extraction.dumps.
+"""
+from functools import cached_property, wraps
+import io
+import json
+
+import ifcopenshell
+import numpy as np
+
+from ifc2gmsh.cache import Cache, DEFAULT_MAX_SIZE
+from ifc2gmsh.inventory import Inventory
+from ifc2gmsh.profiling import Profiler
+
+PARTS = ['summary', 'items', 'hashes', 'children', 'gmsh_properties',
+         'fenia_conditions']
+CACHE_NAME = 'extraction'
+
+
+def dumps_json(value):
+    return json.dumps(value).encode()
+
+
+def dumps_arrays(arrays):
+    f = io.BytesIO()
+    np.savez(f, **arrays)
+    return f.getvalue()
+
+
+def loads_arrays(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as f:
+        return {k: f[k] for k in f.files}
+
+
+def part(function):
+    """Part of Extraction, cached property loaded from Cache if it is set
+
+    If there is no entry of the part, the model is opened (once for all
+    parts), the part is extracted and stored.
+    """
+    name = function.__name__
+
+    @wraps(function)
+    def wrapper(self):
+        if self.cache is None:
+            return function(self)
+        with self.profiler.stage('cache'):
+            with Cache(self.cache, self.cache_size) as cache:
+                key = cache.key(self.file_path, f'{CACHE_NAME}/{name}')
+                files = cache.get(key)
+        if files is not None:
+            print(f'cache: {name} of {self.file_path} from {self.cache}')
+            return self.loads(name, files)
+        self.open()
+        value = function(self)
+        self.__dict__[name] = value  # dumps reads value of part
+        files = self.dumps(name)
+        with self.profiler.stage('cache'):
+            with Cache(self.cache, self.cache_size) as cache:
+                cache.put(key, files)
+        return value
+
+    return cached_property(wrapper)
+
+
+class Extraction:
+    """Data of model shared by converters
+
+    Parts are extracted on first access like indexes of Inventory, so a
+    converter that runs alone extracts only what it needs. With cache each
+    part is loaded from its entry first, model is opened on first missing
+    part. Modules of converters import this one, so they are imported by
+    parts lazily.
+
+    Args:
+        ifc (ifcopenshell.file or None): model, opened from file_path on
+            first missing part if None
+        file_path (str or Path or None): path to model, workers open it by
+            themselves
+        workers (int): number of processes parsing items
+        batch_size (int): number of Breps parsed at once
+        inventory (Inventory or None): inventory of model, built if None
+        profiler (Profiler or None): profiler of stages
+        cache (str or Path or None): path to database of Cache, no cache if None
+        cache_size (int): max size of cache in bytes
+        statistics (bool): gather statistics of products and shapes of
+            inventory that is built
+
+    Attributes:
+        summary (dict): numbers of products, shapes, items by
+            RepresentationType and property sets
+        items (dict): parsed Brep and SweptSolid items, see
+            ifc2gmsh.geometry.extract_items
+        hashes (dict): id of Brep or SweptSolid item to hash of its entity
+            graph, see ifc2gmsh.geometry.hash_items
+        children (dict): arrays and keys of children of main.json, see
+            ifc2gmsh.geometry.collect_children
+        gmsh_properties (dict): GlobalId of product to gmsh data, see
+            ifc2gmsh.properties.get_gmsh_properties
+        fenia_conditions (dict): conditions and properties of zones, see
+            ifc2fenia.main.get_fenia_conditions
+    """
+
+    def __init__(self, ifc=None, file_path=None, workers=1, batch_size=256,
+                 inventory=None, profiler=None, cache=None, cache_size=DEFAULT_MAX_SIZE,
+                 statistics=False):
+        self.ifc = ifc
+        self.file_path = file_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.statistics = statistics
+        if inventory is None and ifc is not None:
+            inventory = Inventory(ifc, statistics=statistics)
+        self.inventory = inventory
+        self.profiler = Profiler(enabled=False) if profiler is None else profiler
+        self.cache = cache
+        self.cache_size = cache_size
+
+    def open(self):
+        """Open model and build its inventory if they are not set"""
+        if self.ifc is None:
+            with self.profiler.stage('open'):
+                self.ifc = ifcopenshell.open(str(self.file_path))
+        if self.inventory is None:
+            self.inventory = Inventory(self.ifc, statistics=self.statistics)
+
+    @part
+    def summary(self):
+        with self.profiler.stage('inventory'):
+            summary = self.inventory.summary()
+            summary['property_sets'] = sum(
+                len(x) for x in self.inventory.property_sets.values())
+        return summary
+
+    @property
+    def items_ids(self):
+        """Ids of Brep and SweptSolid items of shapes of model"""
+        self.open()
+        items = self.inventory.items
+        return items.get('Brep', []), items.get('SweptSolid', [])
+
+    @part
+    def items(self):
+        from ifc2gmsh import geometry
+        breps_ids, swept_ids = self.items_ids
+        if self.workers > 1:
+            with self.profiler.stage('export'):
+                return geometry.extract_items_parallel(
+                    self.file_path, breps_ids, swept_ids, self.workers, self.batch_size)
+        return geometry.extract_items(self.ifc, breps_ids, swept_ids, self.batch_size,
+                                      profiler=self.profiler)
+
+    @part
+    def hashes(self):
+        from ifc2gmsh import geometry
+        breps_ids, swept_ids = self.items_ids
+        with self.profiler.stage('hash'):
+            return geometry.hash_items(self.file_path, breps_ids + swept_ids)
+
+    def export_items(self, gmsh_path, keys, deduplicate=False, items_ids=None):
+        """Write gmsh objects of items, see ifc2gmsh.geometry.write_items
+
+        If items are not extracted yet and there is no cache to store them,
+        only items_ids are parsed, with workers > 1 they are parsed and
+        written by workers.
+
+        Returns:
+            tuple: item id to gmsh file (dict), item id to fields of child (dict)
+        """
+        from ifc2gmsh import geometry
+        if self.cache is not None or 'items' in self.__dict__:
+            return geometry.write_items(self.items, gmsh_path, keys, deduplicate, items_ids,
+                                        profiler=self.profiler)
+        breps_ids, swept_ids = self.items_ids
+        if items_ids is not None:
+            breps_ids = [x for x in breps_ids if x in items_ids]
+            swept_ids = [x for x in swept_ids if x in items_ids]
+        if self.workers > 1:  # Workers write files by themselves
+            with self.profiler.stage('export'):
+                return geometry.export_items_parallel(
+                    self.file_path, breps_ids, swept_ids, gmsh_path, keys,
+                    self.workers, self.batch_size, deduplicate)
+        items = geometry.extract_items(self.ifc, breps_ids, swept_ids, self.batch_size,
+                                       profiler=self.profiler)
+        return geometry.write_items(items, gmsh_path, keys, deduplicate,
+                                    profiler=self.profiler)
+
+    @part
+    def children(self):
+        from ifc2gmsh import geometry
+        from ifc2gmsh.placement import PlacementResolver
+        breps_ids, swept_ids = self.items_ids
+        products = self.inventory.products
+        with self.profiler.stage('placement'):
+            resolver = PlacementResolver()
+            products_transforms = resolver.product_transforms(products)
+        with self.profiler.stage('children'):
+            return geometry.collect_children(products, products_transforms, resolver,
+                                             set(breps_ids) | set(swept_ids))
+
+    @part
+    def gmsh_properties(self):
+        from ifc2gmsh import properties
+        with self.profiler.stage('properties'):
+            return properties.get_gmsh_properties(self.ifc, inventory=self.inventory)
+
+    @part
+    def fenia_conditions(self):
+        from ifc2fenia import main as fenia
+        with self.profiler.stage('properties'):
+            return fenia.get_fenia_conditions(self.ifc, self.inventory)
+
+    def dumps(self, name):
+        """Files of part, it is extracted if missing
+
+        Args:
+            name (str): name of part, see PARTS
+
+        Returns:
+            dict: name to content (bytes)
+        """
+        value = getattr(self, name)
+        if name == 'items':
+            files = {}
+            for i, (batch_ids, arrays) in enumerate(value['breps']):
+                files[f'breps/{i}.npz'] = dumps_arrays(dict(arrays, ids=batch_ids))
+            files['swept.json'] = dumps_json(list(value['swept'].items()))
+            return files
+        if name == 'hashes':
+            return {'hashes.json': dumps_json(list(value.items()))}
+        if name == 'children':
+            children = dict(value)
+            return {'keys.json': dumps_json(list(children.pop('keys').items())),
+                    'children.npz': dumps_arrays(children)}
+        if name == 'gmsh_properties':
+            sets, sets_indices, products = [], {}, []
+            for gid, gmsh_data in value.items():  # Data of set is shared
+                index = sets_indices.setdefault(id(gmsh_data), len(sets))
+                if index == len(sets):
+                    sets.append(gmsh_data)
+                products.append([gid, index])
+            return {'gmsh_properties.json': dumps_json({'sets': sets, 'products': products})}
+        return {f'{name}.json': dumps_json(value)}
+
+    @staticmethod
+    def loads(name, files):
+        """Part from files, see dumps
+
+        Args:
+            name (str): name of part, see PARTS
+            files (dict): name to content (bytes)
+
+        Returns:
+            object: value of part
+        """
+        if name == 'items':
+            breps = []
+            for i in range(sum(x.startswith('breps/') for x in files)):
+                arrays = loads_arrays(files[f'breps/{i}.npz'])
+                breps.append((arrays.pop('ids'), arrays))
+            swept = {k: v for k, v in json.loads(files['swept.json'])}
+            return {'breps': breps, 'swept': swept}
+        if name == 'hashes':
+            return {k: v for k, v in json.loads(files['hashes.json'])}
+        if name == 'children':
+            children = loads_arrays(files['children.npz'])
+            children['keys'] = {k: v for k, v in json.loads(files['keys.json'])}
+            return children
+        if name == 'gmsh_properties':
+            gmsh_properties = json.loads(files['gmsh_properties.json'])
+            sets = gmsh_properties['sets']
+            return {gid: sets[i] for gid, i in gmsh_properties['products']}
+        return json.loads(files[f'{name}.json'])
+
+
+def load(file_path, cache=None, cache_size=DEFAULT_MAX_SIZE, workers=1, batch_size=256,
+         statistics=False, profiler=None):
+    """Extraction of model, shared by converters through cache
+
+    Model is opened and parts are extracted lazily. With cache each part is
+    loaded from its entry of the file, if there is no entry the model is
+    opened, the part is extracted and stored, so a converter extracts only
+    parts that it needs.
+
+    Args:
+        file_path (str or Path): path to model
+        cache (str or Path or None): path to database of Cache, no cache if None
+        cache_size (int): max size of cache in bytes
+        workers (int): number of processes parsing items
+        batch_size (int): number of Breps parsed at once
+        statistics (bool): gather statistics of products and shapes of inventory
+        profiler (Profiler or None): profiler of stages
+
+    Returns:
+        Extraction: data of model
+    """
+    extraction = Extraction(file_path=file_path, workers=workers, batch_size=batch_size,
+                            profiler=profiler, cache=cache, cache_size=cache_size,
+                            statistics=statistics)
+    if cache is None:
+        extraction.open()
+    return extraction
@@ -0,0 +1,416 @@
+"""Generator of synthetic IFC models for load testing of converters
+
+Models are written to STEP physical file line by line, without building them
+in ifcopenshell, so models of millions of products are generated in constant
+memory. Output of the same arguments and seed is byte-identical.
+
+Products are IfcBuildingElementProxy on a grid, contained in the deepest level
+of the spatial structure (IfcSite, IfcBuilding, IfcBuildingStorey, ...).
+Representations of products:
+    brep: IfcFacetedBrep of a prism in world coordinates (as of FreeCAD export)
+    rectangle, circle, hollow_circle: IfcExtrudedAreaSolid of own
+        IfcRepresentationMap, placed by product
+    mapped: IfcMappedItem of one of shared IfcRepresentationMap (sources)
+Products are split into zones with IBRAE_Gmsh and IBRAE_Fenia property sets.
+
+Example:
+    python -m ifc2gmsh.generator --file_path synthetic.ifc -n 10000 --depth 5
+"""
+import argparse
+import math
+from pathlib import Path
+import random
+import uuid
+
+import ifcopenshell.guid
+
+REPRESENTATIONS = ['brep', 'rectangle', 'circle', 'hollow_circle', 'mapped']
+SPACING = 4.
+CHUNK_SIZE = 1000  # Max number of related objects of relationship
+SURFACES = {  # Name: (type, {property: (value, unit)})
+    'Surface1': ('timeValueTr', {'timeValueTr': (273., 'temperature')}),
+    'Surface2': ('timeValueTr', {'timeValueTr': (300., 'temperature')}),
+    'Surface3': ('fixedFlux', {'fluxValue': (10., 'heat_flux')}),
+    'Surface4': ('convectionFlux', {'TRef': (315., 'temperature'),
+                                    'heatTrans': (10., 'heat_transfer')}),
+    'Surface5': ('timeValueTr', {'timeValueTr': (10., 'temperature')}),
+    'Surface6': ('timeValueTr', {'timeValueTr': (10., 'temperature')})}
+SI_UNIT_TYPES = {'METRE': 'LENGTHUNIT', 'GRAM': 'MASSUNIT', 'SECOND': 'TIMEUNIT',
+                 'KELVIN': 'THERMODYNAMICTEMPERATUREUNIT', 'WATT': 'POWERUNIT',
+                 'JOULE': 'ENERGYUNIT'}
+DERIVED_UNITS = {  # Name: (unit type, [(exponent, prefix, SI unit name)])
+    'density': ('MASSDENSITYUNIT', [(1, 'KILO', 'GRAM'), (-3, None, 'METRE')]),
+    'conductivity': ('THERMALCONDUCTANCEUNIT', [
+        (1, None, 'WATT'), (-1, None, 'METRE'), (-1, None, 'KELVIN')]),
+    'heat_capacity': ('SPECIFICHEATCAPACITYUNIT', [
+        (1, None, 'JOULE'), (1, 'KILO', 'GRAM'), (-1, None, 'KELVIN')]),
+    'heat_source': ('HEATINGVALUEUNIT', [(1, None, 'WATT'), (-3, None, 'METRE')]),
+    'heat_flux': ('HEATFLUXDENSITYUNIT', [(1, None, 'WATT'), (-2, None, 'METRE')]),
+    'heat_transfer': ('THERMALTRANSMITTANCEUNIT', [
+        (1, None, 'WATT'), (-2, None, 'METRE'), (-1, None, 'KELVIN')])}
+
+
+class Ref(int):
+    """Reference to entity instance"""
+
+
+class Enum(str):
+    """Enumeration value"""
+
+
+class Raw(str):
+    """Value written as is, e.g. derived attribute *"""
+
+
+class Typed:
+    """Value of defined type, e.g. IFCREAL(1.)"""
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+def to_step(v):
+    """Encode value to STEP physical file"""
+    if v is None:
+        return '$'
+    elif isinstance(v, Ref):
+        return f'#{int(v)}'
+    elif isinstance(v, Enum):
+        return f'.{v}.'
+    elif isinstance(v, Raw):
+        return str(v)
+    elif isinstance(v, str):
+        return "'" + v.replace('\\', '\\\\').replace("'", "''") + "'"
+    elif isinstance(v, bool):
+        return '.T.' if v else '.F.'
+    elif isinstance(v, int):
+        return str(v)
+    elif isinstance(v, float):
+        s = repr(v).upper()
+        if '.' not in s:
+            s = s.replace('E', '.E') if 'E' in s else f'{s}.'
+        return s
+    elif isinstance(v, Typed):
+        return f'{v.name}({to_step(v.value)})'
+    elif isinstance(v, (list, tuple)):
+        return f'({",".join(to_step(x) for x in v)})'
+    else:
+        raise TypeError(v)
+
+
+class StepWriter:
+    """Writer of entity instances with sequential ids to STEP physical file"""
+
+    def __init__(self, f):
+        self.f = f
+        self.n = 0
+
+    def add(self, entity, *args):
+        self.n += 1
+        self.f.write(f'#{self.n}={entity}({",".join(to_step(x) for x in args)});\n')
+        return Ref(self.n)
+
+
+def parse_representations(s):
+    """Parse weights of representations
+
+    Args:
+        s (str): comma separated names with optional weights, e.g. brep=2,mapped
+
+    Returns:
+        dict: name of representation to weight
+    """
+    weights = {}
+    for x in s.split(','):
+        name, _, weight = x.strip().partition('=')
+        if name not in REPRESENTATIONS:
+            raise ValueError(f'Unknown representation {name}, '
+                             f'available: {", ".join(REPRESENTATIONS)}')
+        weights[name] = float(weight) if weight else 1.
+    return weights
+
+
+def new_guid(rng):
+    return ifcopenshell.guid.compress(uuid.UUID(int=rng.getrandbits(128)).hex)
+
+
+def write_prism_brep(w, rng, center=(0., 0., 0.)):
+    """Faceted Brep of prism with random number of sides and size"""
+    k = rng.randint(3, 8)
+    r, h, a = rng.uniform(0.5, 1.5), rng.uniform(0.5, 1.5), rng.uniform(0, math.pi)
+    cx, cy, cz = center
+    ring = [(cx + r * math.cos(a + 2 * math.pi * i / k),
+             cy + r * math.sin(a + 2 * math.pi * i / k)) for i in range(k)]
+    points = [w.add('IFCCARTESIANPOINT', (round(x, 6), round(y, 6), z))
+              for z in [cz, cz + round(h, 6)] for x, y in ring]
+    loops = [list(reversed(range(k))), list(range(k, 2 * k))]
+    loops.extend([i, (i + 1) % k, k + (i + 1) % k, k + i] for i in range(k))
+    faces = []
+    for loop in loops:
+        polyloop = w.add('IFCPOLYLOOP', [points[i] for i in loop])
+        bound = w.add('IFCFACEOUTERBOUND', polyloop, True)
+        faces.append(w.add('IFCFACE', [bound]))
+    return w.add('IFCFACETEDBREP', w.add('IFCCLOSEDSHELL', faces))
+
+
+def write_extrusion(w, rng, kind, position, direction):
+    """Extruded area solid of rectangle, circle or hollow circle profile"""
+    if kind == 'rectangle':
+        profile = w.add('IFCRECTANGLEPROFILEDEF', Enum('AREA'), None, None,
+                        round(rng.uniform(0.5, 2.), 6), round(rng.uniform(0.5, 2.), 6))
+    elif kind == 'circle':
+        profile = w.add('IFCCIRCLEPROFILEDEF', Enum('AREA'), None, None,
+                        round(rng.uniform(0.25, 1.), 6))
+    elif kind == 'hollow_circle':
+        radius = rng.uniform(0.25, 1.)
+        profile = w.add('IFCCIRCLEHOLLOWPROFILEDEF', Enum('AREA'), None, None,
+                        round(radius, 6), round(rng.uniform(0.1, 0.9) * radius, 6))
+    else:
+        raise NotImplementedError(kind)
+    return w.add('IFCEXTRUDEDAREASOLID', profile, position, direction,
+                 round(rng.uniform(0.5, 2.), 6))
+
+
+def write_representation_map(w, rng, kind, context, origin, direction):
+    if kind == 'brep':
+        item, representation_type = write_prism_brep(w, rng), 'Brep'
+    else:
+        item = write_extrusion(w, rng, kind, origin, direction)
+        representation_type = 'SweptSolid'
+    representation = w.add('IFCSHAPEREPRESENTATION', context, 'Body',
+                           representation_type, [item])
+    return w.add('IFCREPRESENTATIONMAP', origin, representation)
+
+
+def write_units(w):
+    """SI units and derived units of IBRAE_Fenia properties
+
+    Returns:
+        tuple: IfcUnitAssignment and dict of name of unit to unit
+    """
+    si = {}
+    for prefix, name in [(None, 'METRE'), ('KILO', 'GRAM'), (None, 'SECOND'),
+                         (None, 'KELVIN'), (None, 'WATT'), (None, 'JOULE')]:
+        si[(prefix, name)] = w.add('IFCSIUNIT', Raw('*'), Enum(SI_UNIT_TYPES[name]),
+                                   None if prefix is None else Enum(prefix), Enum(name))
+    assignment = w.add('IFCUNITASSIGNMENT', [si[(None, 'METRE')], si[('KILO', 'GRAM')],
+                                             si[(None, 'SECOND')], si[(None, 'KELVIN')]])
+    units = {'temperature': si[(None, 'KELVIN')]}
+    for name, (unit_type, elements) in DERIVED_UNITS.items():
+        units[name] = w.add('IFCDERIVEDUNIT', [
+            w.add('IFCDERIVEDUNITELEMENT', si[(prefix, x)], exponent)
+            for exponent, prefix, x in elements], Enum(unit_type), None)
+    return assignment, units
+
+
+def write_property_sets(w, rng, owner_history, zone, units, boundary_conditions):
+    """IBRAE_Gmsh and IBRAE_Fenia property sets of zone
+
+    Returns:
+        list: property sets
+    """
+    def single(name, value, unit=None):
+        return w.add('IFCPROPERTYSINGLEVALUE', name, None, value, unit)
+
+    def real(value):
+        return Typed('IFCREAL', round(value, 6))
+
+    volume_zones = w.add('IFCPROPERTYLISTVALUE', 'VolumeZones', None,
+                         [Typed('IFCIDENTIFIER', zone)], None)
+    surfaces_zones = w.add('IFCPROPERTYLISTVALUE', 'SurfacesZones', None,
+                           [Typed('IFCIDENTIFIER', x) for x in SURFACES], None)
+    gmsh_properties = [
+        w.add('IFCPROPERTYSINGLEVALUE', 'BooleanLevel',
+              'Level for boolean operations before meshing',
+              Typed('IFCINTEGER', 0), None),
+        volume_zones, surfaces_zones]
+    gmsh_property_set = w.add(
+        'IFCPROPERTYSET', new_guid(rng), owner_history, 'IBRAE_Gmsh',
+        'Properties for mesh generator. See https://github.com/romanzes637/gmsh_scripts',
+        gmsh_properties)
+    material_property = w.add('IFCCOMPLEXPROPERTY', 'MaterialProperty', None, zone, [
+        single('matType', Typed('IFCIDENTIFIER', 'constPropTSource')),
+        single('rho', real(rng.uniform(1000., 3000.)), units['density']),
+        single('DT', real(rng.uniform(0.5, 3.)), units['conductivity']),
+        single('cHeat', real(rng.uniform(500., 1500.)), units['heat_capacity']),
+        single('qW', real(rng.uniform(0., 10.)), units['heat_source'])])
+    initial_condition = w.add('IFCCOMPLEXPROPERTY', 'InitialCondition', None, zone, [
+        single('type', Typed('IFCIDENTIFIER', 'temperature')),
+        single('inZoneTemperature', real(rng.uniform(273., 373.)), units['temperature'])])
+    fenia_property_set = w.add(
+        'IFCPROPERTYSET', new_guid(rng), owner_history, 'IBRAE_Fenia',
+        'Properties for FENIA', [volume_zones, surfaces_zones, material_property,
+                                 initial_condition] + boundary_conditions)
+    return [gmsh_property_set, fenia_property_set]
+
+
+def generate(file_path, n_products=1000, representations=None, depth=3,
+             zones=1, sources=10, seed=0, properties=True):
+    """Generate synthetic IFC4 model
+
+    Args:
+        file_path (str or Path): path to output IFC file
+        n_products (int): number of products
+        representations (dict or None): name of representation to weight
+            of random choice, all REPRESENTATIONS with equal weights if None
+        depth (int): number of levels of spatial structure (IfcSite,
+            IfcBuilding, IfcBuildingStorey, nested IfcBuildingStorey, ...)
+        zones (int): number of zones, products are split into zones by order
+        sources (int): number of shared representation maps of mapped products
+        seed (int): seed of random generator
+        properties (bool): attach IBRAE_Gmsh and IBRAE_Fenia property sets
+
+    Returns:
+        int: number of entity instances
+    """
+    if depth < 1:
+        raise ValueError('Depth should be >= 1')
+    representations = {x: 1. for x in REPRESENTATIONS} \
+        if representations is None else representations
+    kinds, weights = list(representations), list(representations.values())
+    rng = random.Random(seed)
+    file_path = Path(file_path)
+    with open(file_path, 'w', buffering=1 << 20) as f:
+        f.write('ISO-10303-21;\nHEADER;\n'
+                "FILE_DESCRIPTION(('ViewDefinition [CoordinationView]'),'2;1');\n"
+                f"FILE_NAME({to_step(file_path.name)},'1970-01-01T00:00:00',"
+                "(''),(''),'ifc2gmsh','ifc2gmsh.generator','');\n"
+                "FILE_SCHEMA(('IFC4'));\nENDSEC;\nDATA;\n")
+        w = StepWriter(f)
+        # Project
+        person = w.add('IFCPERSON', None, None, '', None, None, None, None, None)
+        organization = w.add('IFCORGANIZATION', None, 'ifc2gmsh', None, None, None)
+        person_and_organization = w.add('IFCPERSONANDORGANIZATION', person,
+                                        organization, None)
+        application = w.add('IFCAPPLICATION', organization, '0', 'ifc2gmsh.generator',
+                            'ifc2gmsh.generator')
+        owner_history = w.add('IFCOWNERHISTORY', person_and_organization, application,
+                              None, Enum('ADDED'), 0, person_and_organization,
+                              application, 0)
+        direction_x = w.add('IFCDIRECTION', (1., 0., 0.))
+        direction_z = w.add('IFCDIRECTION', (0., 0., 1.))
+        origin = w.add('IFCAXIS2PLACEMENT3D', w.add('IFCCARTESIANPOINT', (0., 0., 0.)),
+                       direction_z, direction_x)
+        context = w.add('IFCGEOMETRICREPRESENTATIONCONTEXT', None, 'Model', 3, 1e-5,
+                        origin, None)
+        unit_assignment, units = write_units(w)
+        project = w.add('IFCPROJECT', new_guid(rng), owner_history, 'Synthetic', None,
+                        None, None, None, [context], unit_assignment)
+        # Spatial structure
+        parent, parent_placement = project, None
+        for level in range(depth):
+            placement = w.add('IFCLOCALPLACEMENT', parent_placement, origin)
+            if level == 0:
+                structure = w.add('IFCSITE', new_guid(rng), owner_history, 'Site',
+                                  None, None, placement, None, None,
+                                  Enum('ELEMENT'), None, None, None, None, None)
+            elif level == 1:
+                structure = w.add('IFCBUILDING', new_guid(rng), owner_history,
+                                  'Building', None, None, placement, None, None,
+                                  Enum('ELEMENT'), None, None, None)
+            else:
+                structure = w.add('IFCBUILDINGSTOREY', new_guid(rng), owner_history,
+                                  f'Storey{level - 1}', None, None, placement, None,
+                                  None, Enum('ELEMENT'), 0.)
+            w.add('IFCRELAGGREGATES', new_guid(rng), owner_history, None, None,
+                  parent, [structure])
+            parent, parent_placement = structure, placement
+        # Properties
+        zones_property_sets = []
+        if properties:
+            boundary_conditions = []
+            for name, (bc_type, bc_properties) in SURFACES.items():
+                boundary_conditions.append(w.add(
+                    'IFCCOMPLEXPROPERTY', 'BoundaryCondition', None, name,
+                    [w.add('IFCPROPERTYSINGLEVALUE', 'type', None,
+                           Typed('IFCIDENTIFIER', bc_type), None)] +
+                    [w.add('IFCPROPERTYSINGLEVALUE', k, None, Typed('IFCREAL', v),
+                           units[u]) for k, (v, u) in bc_properties.items()]))
+            for zone in range(zones):
+                zones_property_sets.append(write_property_sets(
+                    w, rng, owner_history, f'Zone{zone + 1}', units,
+                    boundary_conditions))
+        # Shared sources of mapped products
+        target = w.add('IFCCARTESIANTRANSFORMATIONOPERATOR3D', None, None,
+                       w.add('IFCCARTESIANPOINT', (0., 0., 0.)), None, None)
+        source_maps = [write_representation_map(
+            w, rng, rng.choice(REPRESENTATIONS[:-1]), context, origin, direction_z)
+            for _ in range(sources)] if 'mapped' in kinds else []
+        # Products
+        side = max(1, math.ceil(n_products ** (1 / 3)))
+        contained = []
+        zones_products = [[] for _ in zones_property_sets]
+
+        def flush_contained():
+            w.add('IFCRELCONTAINEDINSPATIALSTRUCTURE', new_guid(rng), owner_history,
+                  None, None, contained, parent)
+            contained.clear()
+
+        def flush_zone(zone):
+            for property_set in zones_property_sets[zone]:
+                w.add('IFCRELDEFINESBYPROPERTIES', new_guid(rng), owner_history,
+                      None, None, zones_products[zone], property_set)
+            zones_products[zone].clear()
+
+        for i in range(n_products):
+            kind = rng.choices(kinds, weights)[0]
+            center = (SPACING * (i % side), SPACING * (i // side % side),
+                      SPACING * (i // side ** 2))
+            if kind == 'brep':
+                placement = w.add('IFCLOCALPLACEMENT', parent_placement, origin)
+                item = write_prism_brep(w, rng, center)
+                representation = w.add('IFCSHAPEREPRESENTATION', context, 'Body',
+                                       'Brep', [item])
+            else:
+                placement = w.add('IFCLOCALPLACEMENT', parent_placement, w.add(
+                    'IFCAXIS2PLACEMENT3D', w.add('IFCCARTESIANPOINT', center),
+                    direction_z, direction_x))
+                if kind == 'mapped':
+                    source = source_maps[rng.randrange(len(source_maps))]
+                else:
+                    source = write_representation_map(w, rng, kind, context, origin,
+                                                      direction_z)
+                item = w.add('IFCMAPPEDITEM', source, target)
+                representation = w.add('IFCSHAPEREPRESENTATION', context, 'Body',
+                                       'MappedRepresentation', [item])
+            product = w.add('IFCBUILDINGELEMENTPROXY', new_guid(rng), owner_history,
+                            f'{kind}{i}', None, None, placement,
+                            w.add('IFCPRODUCTDEFINITIONSHAPE', None, None,
+                                  [representation]), None, None)
+            contained.append(product)
+            if len(contained) == CHUNK_SIZE:
+                flush_contained()
+            if zones_products:
+                zone = i * len(zones_products) // n_products
+                zones_products[zone].append(product)
+                if len(zones_products[zone]) == CHUNK_SIZE:
+                    flush_zone(zone)
+        if contained:
+            flush_contained()
+        for zone, products in enumerate(zones_products):
+            if products:
+                flush_zone(zone)
+        f.write('ENDSEC;\nEND-ISO-10303-21;\n')
+    return w.n
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic IFC model')
+    parser.add_argument('--file_path', default='synthetic.ifc')
+    parser.add_argument('-n', '--n_products', type=int, default=1000)
+    parser.add_argument('-r', '--representations', type=parse_representations,
+                        default=None,
+                        help=f'weights of representations, e.g. brep=2,mapped=1, '
+                             f'available: {",".join(REPRESENTATIONS)}')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='number of levels of spatial structure')
+    parser.add_argument('-z', '--zones', type=int, default=1)
+    parser.add_argument('--sources', type=int, default=10,
+                        help='number of shared sources of mapped products')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--no_properties', dest='properties', action='store_false',
+                        help='do not attach IBRAE_Gmsh and IBRAE_Fenia property sets')
+    args = parser.parse_args()
+    n = generate(**vars(args))
+    print(f'{args.file_path}: {args.n_products} products, {n} entities')
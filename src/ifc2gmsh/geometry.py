@@ -1,14 +1,25 @@
-from collections import Counter
+import hashlib
 import json
+import multiprocessing
+import os
 from pathlib import Path
-from pprint import pprint
+import re
 import shutil
 
 import ifcopenshell
-from ifcopenshell.util.placement import get_local_placement, get_axis2placement
 import numpy as np
 from tqdm import tqdm
 
+from ifc2gmsh.cache import DEFAULT_MAX_SIZE
+from ifc2gmsh.extraction import Extraction, load as load_extraction
+from ifc2gmsh.inventory import Inventory
+from ifc2gmsh.manifest import MANIFEST_FILE, load_manifest, write_manifest, remove_stale
+from ifc2gmsh.placement import PlacementResolver
+from ifc2gmsh.profiling import Profiler
+
+STEP_ENTITY = re.compile(rb"^#(\d+)\s*=\s*((?:[^;']+|'[^']*')*);", re.M)  # id and body
+STEP_REFERENCE = re.compile(rb"'[^']*'|#(\d+)")  # strings are skipped
+
 
 def create_main_gmsh_object():
     gmsh_obj = {
@@ -44,28 +55,114 @@ def create_main_gmsh_object():
     return gmsh_obj
 
 
+def gather_faceted_breps(items):
+    """Gather points and loops of IfcFacetedBrep items into flat arrays
+
+    Each item is read with one recursive get_info call (C++ path of
+    ifcopenshell), points are deduplicated per item in order of first
+    appearance and loops are stored in CSR format.
+
+    Args:
+        items (list): IfcFacetedBrep entities
+
+    Returns:
+        dict: arrays
+            points (np.ndarray): (n_points, 3) coordinates of all items,
+            point_offsets (np.ndarray): (n_items + 1) offsets of items in points,
+            indices (np.ndarray): item local point indices of all loops,
+            loop_offsets (np.ndarray): (n_loops + 1) offsets of loops in indices,
+            face_offsets (np.ndarray): (n_faces + 1) offsets of faces in loops,
+            item_offsets (np.ndarray): (n_items + 1) offsets of items in faces
+    """
+    point_ids, coordinates = [], []
+    loop_sizes, face_sizes, item_sizes, item_points = [], [], [], []
+    for item in items:
+        faces = item.get_info(recursive=True)['Outer']['CfsFaces']  # IfcFace
+        item_sizes.append(len(faces))
+        n_points = len(point_ids)
+        for f in faces:
+            bounds = f['Bounds']  # IfcFaceOuterBound, IfcFaceBound
+            face_sizes.append(len(bounds))
+            for b in bounds:
+                polygon = b['Bound']['Polygon']  # IfcPolyLoop
+                loop_sizes.append(len(polygon))
+                point_ids.extend([x['id'] for x in polygon])  # IfcCartesianPoint
+                coordinates.extend([x['Coordinates'] for x in polygon])
+        item_points.append(len(point_ids) - n_points)
+    point_ids = np.array(point_ids, dtype=np.int64)
+    coordinates = np.array(coordinates, dtype=float).reshape(-1, 3)
+    # Deduplicate points per item, keep order of the first appearance
+    n_items = len(item_sizes)
+    vertex_items = np.repeat(np.arange(n_items, dtype=np.int64), item_points)
+    keys = vertex_items * (point_ids.max(initial=0) + 1) + point_ids
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    new_ids = np.empty_like(order)
+    new_ids[order] = np.arange(len(order))
+    new_ids = new_ids[inverse.ravel()]
+    point_counts = np.bincount(vertex_items[first], minlength=n_items)
+    point_offsets = np.concatenate([[0], np.cumsum(point_counts)])
+    return {
+        'points': coordinates[first[order]],
+        'point_offsets': point_offsets,
+        'indices': new_ids - point_offsets[vertex_items],
+        'loop_offsets': np.concatenate([[0], np.cumsum(loop_sizes, dtype=np.int64)]),
+        'face_offsets': np.concatenate([[0], np.cumsum(face_sizes, dtype=np.int64)]),
+        'item_offsets': np.concatenate([[0], np.cumsum(item_sizes, dtype=np.int64)])}
+
+
+def parse_ifc_faceted_breps(items, zones_names=None):
+    """Parse IfcFacetedBrep items to gmsh-scripts block.Polyhedron objects
+
+    Args:
+        items (list): IfcFacetedBrep entities
+        zones_names (list of str or None): zone name of each item
+
+    Returns:
+        list of dict: gmsh objects
+    """
+    return build_faceted_breps([x.id() for x in items], gather_faceted_breps(items),
+                               zones_names)
+
+
+def build_faceted_breps(items_ids, arrays, zones_names=None):
+    """Build gmsh-scripts block.Polyhedron objects from arrays of items
+
+    Args:
+        items_ids (list of int): ids of IfcFacetedBrep items
+        arrays (dict): arrays of items, see gather_faceted_breps
+        zones_names (list of str or None): zone name of each item
+
+    Returns:
+        list of dict: gmsh objects
+    """
+    if zones_names is None:
+        zones_names = [None for _ in items_ids]
+    points = arrays['points'].tolist()
+    indices = arrays['indices'].tolist()
+    point_offsets = arrays['point_offsets'].tolist()
+    loop_offsets = arrays['loop_offsets'].tolist()
+    face_offsets = arrays['face_offsets'].tolist()
+    item_offsets = arrays['item_offsets'].tolist()
+    gmsh_objs = []
+    for i, (item_id, zone_name) in enumerate(zip(items_ids, zones_names)):
+        zone_name = f'IfcFacetedBrep.{item_id}' if zone_name is None else zone_name
+        gmsh_obj = {'data': {'class': 'block.Polyhedron', 'zone': zone_name}}
+        polygons = []
+        for f in range(item_offsets[i], item_offsets[i + 1]):
+            polygon = [indices[loop_offsets[b]:loop_offsets[b + 1]]
+                       for b in range(face_offsets[f], face_offsets[f + 1])]
+            if len(polygon) == 1:
+                polygon = polygon[0]
+            polygons.append(polygon)
+        gmsh_obj['data']['polygons'] = polygons
+        gmsh_obj['data']['points'] = points[point_offsets[i]:point_offsets[i + 1]]
+        gmsh_objs.append(gmsh_obj)
+    return gmsh_objs
+
+
 def parse_ifc_faceted_brep(item, zone_name=None):
-    zone_name = f'IfcFacetedBrep.{item.id()}' if zone_name is None else zone_name
-    gmsh_obj = {'data': {'class': 'block.Polyhedron', 'zone': zone_name}}
-    points_coordinates = {}
-    points_old2new = {}
-    polygons = []
-    for f in item.Outer.CfsFaces:  # IfcFace
-        polygon = []
-        for b in f.Bounds:  # IfcFaceOuterBound, IfcFaceBound
-            loop = []
-            for point in b.Bound.Polygon:  # IfcPolyLoop
-                new_id = points_old2new.setdefault(point.id(), len(points_old2new))
-                loop.append(new_id)
-                points_coordinates.setdefault(new_id, list(point.Coordinates))
-            polygon.append(loop)
-        if len(polygon) == 1:
-            polygon = polygon[0]
-        polygons.append(polygon)
-    n_points = len(points_coordinates)
-    gmsh_obj['data']['polygons'] = polygons
-    gmsh_obj['data']['points'] = [points_coordinates[x] for x in range(n_points)]
-    return gmsh_obj
+    return parse_ifc_faceted_breps([item], [zone_name])[0]
 
 
 def parse_extruded_area_solid(item):
@@ -122,113 +219,500 @@ def parse_extruded_area_solid(item):
     return gmsh_object
 
 
-def main(file_path, output_dir_path='gmsh'):
-    ifc = ifcopenshell.open(file_path)
-    gmsh_dir = output_dir_path
-    owner_history = ifc.by_type("IfcOwnerHistory")[0]
-    project = ifc.by_type("IfcProject")[0]
-    context = ifc.by_type("IfcGeometricRepresentationContext")[0]
-    print(ifc.by_type("IfcOwnerHistory"))
-
-    products = ifc.by_type('IfcProduct')
-    print(f'products: {len(products)}')
-    pprint(Counter([x.is_a() for x in products]))
-    shapes = ifc.by_type('IfcShapeRepresentation')
-    print(f'shapes: {len(shapes)}')
-    pprint(Counter([x.RepresentationIdentifier for x in shapes]))
-    pprint(Counter([y.is_a() for x in shapes for y in x.Items]))
-    structure = {}
-    for i, shape in enumerate(shapes):
-        structure.setdefault(shape.RepresentationType, []).append(shape)
-    # pprint(structure)
-    print('shapes structure:')
-    pprint({k: len(v) for k, v in structure.items()})
-
-    transformations = ifc.by_type('IfcGeometricRepresentationItem')
-    print(f'transformations: {len(transformations)}')
-    # pprint([(x.get_info(), ifc.get_inverse(x))
-    #         for x in ifc.by_type('IfcAxis2Placement3D')
-    #         if x.Location.Coordinates != (0, 0, 0)])
-    pprint(Counter([x.is_a() for x in transformations]))
-
-    gmsh_path = Path(gmsh_dir)
-    if gmsh_path.exists():
-        shutil.rmtree(gmsh_path)
-    gmsh_path.mkdir(exist_ok=True, parents=True)
-    main_obj = create_main_gmsh_object()
-    id2file = {}
-    allowed_items = {}
-    # allowed_items = {52667, 52365, 52481}
-
-    for shape in tqdm(structure.get('Brep', [])):
-        for i, item in enumerate(shape.Items):  # IfcFacetedBrep
-            item_id = item.id()
-            if item_id not in allowed_items and len(allowed_items) != 0:
-                continue
-            gmsh_file = f'{item_id}.json'
-            id2file[item_id] = gmsh_file
-            gmsh_obj = parse_ifc_faceted_brep(item)
-            with open(gmsh_path / gmsh_file, 'w') as f:
-                json.dump(gmsh_obj, f)
-
-    for shape in tqdm(structure.get('SweptSolid', [])):
-        for item in shape.Items:
-            item_id = item.id()
-            if item_id not in allowed_items and len(allowed_items) != 0:
-                continue
-            gmsh_file = f'{item_id}.json'
-            id2file[item_id] = gmsh_file
+def item_name(item_id, keys):
+    """Name of file of item by its key, see collect_children
+
+    Key is stable between revisions of the model, so files of items that are
+    renumbered are not mixed up by incremental export, items without key
+    (without product) are named by id.
+
+    Args:
+        item_id (int): id of item
+        keys (dict): item id to key of item
+
+    Returns:
+        str: name of file without extension
+    """
+    key = keys.get(item_id)
+    return str(item_id) if key is None else key.replace('/', '_')
+
+
+def write_item(gmsh_obj, name, gmsh_path):
+    gmsh_file = f'{name}.json'
+    with open(Path(gmsh_path) / gmsh_file, 'w') as f:
+        json.dump(gmsh_obj, f)
+    return gmsh_file
+
+
+def canonicalize(gmsh_obj, decimals=9):
+    """Move geometry of gmsh object to local frame and hash it
+
+    Points of block.Polyhedron are translated to the minimum corner of their
+    bounding box, they are rounded only for the digest. Other objects
+    (extrusions) are already in the frame of the item Position. Zones are not
+    hashed, zones of shared object are named by digest and zones of item are
+    kept in fields of its child, see children_fields.
+
+    Args:
+        gmsh_obj (dict): gmsh object of item
+        decimals (int): number of decimals of local coordinates in digest
+
+    Returns:
+        tuple: digest (str), canonical gmsh object (dict), fields of child
+            of item (dict): transform from local frame (list of list) and
+            zone or items_zone
+    """
+    data = dict(gmsh_obj['data'])
+    child = {}
+    zone = data.pop('zone', None)
+    items_zone = data.pop('items_zone', None)
+    hashed = data
+    if data['class'] == 'block.Polyhedron':
+        points = np.array(data['points'], dtype=float).reshape(-1, 3)
+        origin = points.min(axis=0, initial=np.inf) if len(points) else np.zeros(3)
+        points = points - origin
+        data['points'] = points.tolist()
+        hashed = dict(data, points=(np.round(points, decimals) + 0.).tolist())
+        transform = np.eye(4)
+        transform[:3, 3] = origin
+        child['transform'] = transform.tolist()
+    digest = hashlib.sha1(json.dumps(hashed, sort_keys=True).encode()).hexdigest()
+    if zone is not None:
+        data['zone'] = f'{zone.split(".")[0]}.{digest}'
+        child['zone'] = zone
+    if items_zone is not None:
+        data['items_zone'] = [f'{x.split(".")[0]}.{digest}' for x in items_zone]
+        child['items_zone'] = items_zone
+    return digest, {'data': data}, child
+
+
+def write_canonical_item(gmsh_obj, digest, gmsh_path):
+    """Write content addressed item once, see canonicalize
+
+    Write is atomic, so workers that meet the same shape do not clash.
+    """
+    gmsh_file = f'{digest}.json'
+    path = Path(gmsh_path) / gmsh_file
+    if not path.exists():
+        tmp_path = path.with_name(f'.{gmsh_file}.{os.getpid()}')
+        with open(tmp_path, 'w') as f:
+            json.dump(gmsh_obj, f)
+        os.replace(tmp_path, path)
+    return gmsh_file
+
+
+def export_item(gmsh_obj, name, gmsh_path, deduplicate=False):
+    if deduplicate:
+        digest, gmsh_obj, child = canonicalize(gmsh_obj)
+        return write_canonical_item(gmsh_obj, digest, gmsh_path), child
+    return write_item(gmsh_obj, name, gmsh_path), None
+
+
+def extract_items(ifc, breps_ids, swept_ids, batch_size=256, progress=True,
+                  profiler=None):
+    """Parse Brep and SweptSolid items to compact data, see write_items
+
+    Args:
+        ifc (ifcopenshell.file): model
+        breps_ids (list of int): ids of IfcFacetedBrep items
+        swept_ids (list of int): ids of IfcExtrudedAreaSolid items
+        batch_size (int): number of Brep items parsed at once
+        progress (bool): show progress bars
+        profiler (Profiler or None): profiler of brep and swept stages
+
+    Returns:
+        dict: items
+            breps (list of tuple): ids of IfcFacetedBrep items (np.ndarray)
+                and their arrays (see gather_faceted_breps) by batches,
+            swept (dict): id of IfcExtrudedAreaSolid item to gmsh object
+    """
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    breps, swept = [], {}
+    for i in tqdm(range(0, len(breps_ids), batch_size), disable=not progress):
+        with profiler.stage('brep'):
+            batch_ids = breps_ids[i:i + batch_size]
+            arrays = gather_faceted_breps([ifc.by_id(x) for x in batch_ids])
+            breps.append((np.array(batch_ids, dtype=np.int64), arrays))
+    for item_id in tqdm(swept_ids, disable=not progress):
+        with profiler.stage('swept'):
+            item = ifc.by_id(item_id)
             if item.is_a('IfcExtrudedAreaSolid'):
-                gmsh_obj = parse_extruded_area_solid
-                with open(gmsh_path / gmsh_file, 'w') as f:
-                    json.dump(gmsh_obj, f)
+                swept[item_id] = parse_extruded_area_solid(item)
             else:
                 raise NotImplementedError(item.get_info())
+    return {'breps': breps, 'swept': swept}
+
+
+_worker_ifc = None  # Model opened once per worker process
+
+
+def _init_worker(file_path):
+    global _worker_ifc
+    _worker_ifc = ifcopenshell.open(file_path)
+
+
+def _extract_chunk(args):
+    breps_ids, swept_ids, batch_size = args
+    return extract_items(_worker_ifc, breps_ids, swept_ids, batch_size, progress=False)
+
+
+def _export_chunk(args):
+    breps_ids, swept_ids, batch_size, gmsh_path, keys, deduplicate = args
+    items = extract_items(_worker_ifc, breps_ids, swept_ids, batch_size, progress=False)
+    id2file, id2child = write_items(items, gmsh_path, keys, deduplicate, progress=False)
+    return [(x, f, id2child.get(x)) for x, f in id2file.items()]
+
 
-    for product in tqdm(products):
-        placement = product.ObjectPlacement
-        placement_matrix = get_local_placement(placement)
+def split_chunks(breps_ids, swept_ids, batch_size):
+    """Split items into chunks of batch_size Brep and SweptSolid items
+
+    Chunks are dispatched to workers one by one, so a worker that got large
+    items takes fewer chunks.
+
+    Returns:
+        list of tuple: ids of Brep and SweptSolid items of chunks
+    """
+    n_chunks = (max(len(breps_ids), len(swept_ids)) + batch_size - 1) // batch_size
+    return [(breps_ids[i * batch_size:(i + 1) * batch_size],
+             swept_ids[i * batch_size:(i + 1) * batch_size]) for i in range(n_chunks)]
+
+
+def extract_items_parallel(file_path, breps_ids, swept_ids, workers, batch_size=256):
+    """Extract items with a pool of processes, see extract_items
+
+    Items are split into chunks (see split_chunks), results are gathered in
+    order of chunks, so they are the same as of extract_items. Each worker
+    opens the model once and returns compact arrays of its chunks.
+
+    Returns:
+        dict: items, see extract_items
+    """
+    chunks = [(b, s, batch_size) for b, s in split_chunks(breps_ids, swept_ids, batch_size)]
+    breps, swept = [], {}
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(str(file_path),)) as pool:
+        for chunk in tqdm(pool.imap(_extract_chunk, chunks), total=len(chunks)):
+            breps.extend(chunk['breps'])
+            swept.update(chunk['swept'])
+    return {'breps': breps, 'swept': swept}
+
+
+def export_items_parallel(file_path, breps_ids, swept_ids, gmsh_path, keys, workers,
+                          batch_size=256, deduplicate=False):
+    """Parse and write items with a pool of processes, see write_items
+
+    Items are split into chunks (see split_chunks), each worker opens the
+    model once, parses items of its chunks and writes their files, only
+    names of files and fields of children are sent back.
+
+    Args:
+        file_path (str or Path): path to model
+        breps_ids (list of int): ids of IfcFacetedBrep items
+        swept_ids (list of int): ids of IfcExtrudedAreaSolid items
+        gmsh_path (str or Path): output directory
+        keys (dict): item id to key of item, see collect_children
+        workers (int): number of processes
+        batch_size (int): number of items in chunk
+        deduplicate (bool): write each unique shape once, see write_items
+
+    Returns:
+        tuple: item id to gmsh file (dict), item id to fields of child (dict)
+    """
+    chunks = []
+    for b, s in split_chunks(breps_ids, swept_ids, batch_size):
+        chunk_keys = {x: keys[x] for x in b + s if x in keys}
+        chunks.append((b, s, batch_size, str(gmsh_path), chunk_keys, deduplicate))
+    id2file, id2child = {}, {}
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(str(file_path),)) as pool:
+        for chunk in tqdm(pool.imap(_export_chunk, chunks), total=len(chunks)):
+            for item_id, gmsh_file, child in chunk:
+                id2file[item_id] = gmsh_file
+                if child is not None:
+                    id2child[item_id] = child
+    return id2file, id2child
+
+
+def write_items(items, gmsh_path, keys, deduplicate=False, items_ids=None,
+                progress=True, profiler=None):
+    """Write gmsh objects of extracted items to <name>.json files, see item_name
+
+    Args:
+        items (dict): extracted items, see extract_items
+        gmsh_path (str or Path): output directory
+        keys (dict): item id to key of item, see collect_children
+        deduplicate (bool): write each unique shape once to <digest>.json,
+            see canonicalize
+        items_ids (set or None): write only these items, all if None
+        progress (bool): show progress bars
+        profiler (Profiler or None): profiler of write stage
+
+    Returns:
+        tuple: item id to gmsh file (dict), item id to fields of child of
+            deduplicated item (dict), see canonicalize
+    """
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    id2file, id2child = {}, {}
+
+    def write(gmsh_obj, item_id):
+        with profiler.stage('write'):
+            id2file[item_id], child = export_item(
+                gmsh_obj, item_name(item_id, keys), gmsh_path, deduplicate)
+        if child is not None:
+            id2child[item_id] = child
+
+    for batch_ids, arrays in tqdm(items['breps'], disable=not progress):
+        batch_ids = batch_ids.tolist()
+        if items_ids is not None and items_ids.isdisjoint(batch_ids):
+            continue
+        for item_id, gmsh_obj in zip(batch_ids, build_faceted_breps(batch_ids, arrays)):
+            if items_ids is None or item_id in items_ids:
+                write(gmsh_obj, item_id)
+    for item_id, gmsh_obj in tqdm(items['swept'].items(), disable=not progress):
+        if items_ids is None or item_id in items_ids:
+            write(gmsh_obj, item_id)
+    return id2file, id2child
+
+
+def hash_items(file_path, items_ids):
+    """Hashes of entity graphs of items, see extract_items
+
+    Graph of item (item and all entities it references) is serialized from
+    STEP text of the model with references replaced by order of entities in
+    the graph, so ids are not hashed and renumbering of entities between
+    revisions of the model does not change the hashes. Items are not parsed,
+    so incremental export parses only changed items.
+
+    Args:
+        file_path (str or Path): path to model
+        items_ids (list of int): ids of items
+
+    Returns:
+        dict: item id to hash
+    """
+    with open(file_path, 'rb') as f:
+        text = f.read()
+    entities = dict(STEP_ENTITY.findall(text, text.find(b'DATA;')))
+    hashes = {}
+    for item_id in items_ids:
+        root = str(item_id).encode()
+        graph, order = [root], {root: b'0'}
+        h = hashlib.sha1()
+        for x in graph:  # Breadth first, graph grows in loop
+            body = entities[x]
+            if b'#' in body:
+                for y in STEP_REFERENCE.findall(body):
+                    if y and y not in order:
+                        order[y] = str(len(graph)).encode()
+                        graph.append(y)
+                body = STEP_REFERENCE.sub(
+                    lambda m: m[0] if m[1] is None else b'#' + order[m[1]], body)
+            h.update(body + b';')
+        hashes[item_id] = h.hexdigest()
+    return hashes
+
+
+def collect_children(products, products_transforms, resolver, items_ids):
+    """Collect children of main.json from representations of products
+
+    Args:
+        products (list): IfcProduct entities
+        products_transforms (np.ndarray): (N, 4, 4) transforms of products
+        resolver (PlacementResolver): resolver of placements of items
+        items_ids (set): ids of exported items, others are skipped
+
+    Returns:
+        dict: children
+            items (np.ndarray): (M,) ids of items,
+            transforms (np.ndarray): (M, 4, 4) transforms of items,
+            placed (np.ndarray): (M,) bool, False for items without
+                placement, their transforms are not used,
+            keys (dict): item id to key of item, GlobalId of the first product
+                of item and index of item in items of product, e.g. "<GlobalId>/0"
+    """
+    children_items, transforms, placed, keys = [], [], [], {}
+    for product, placement_matrix in tqdm(zip(products, products_transforms),
+                                          total=len(products)):
         product_representation = product.Representation
-        if product_representation is not None:
-            assert len(product_representation.Representations) == 1
-            for r in product_representation.Representations:
-                # if len(r.Items) != 1:
-                #     print(f'{r.get_info()}: number of items {len(r.Items)} != 1')
-                #     continue
-                for i in r.Items:
-                    try:
-                        target = i.MappingTarget
-                        source = i.MappingSource
-                        source_representation = source.MappedRepresentation
-                        for item in source_representation.Items:
-                            item_id = item.id()
-                            if item_id not in allowed_items and len(allowed_items) != 0:
-                                continue
-                            gmsh_file = id2file[item_id]
-                            if source_representation.RepresentationType in ['SweptSolid']:
-                                m = get_axis2placement(
-                                    source.MappedRepresentation.Items[0].Position)
-                                new_pos = np.dot(placement_matrix, m)
-                                transforms = [new_pos.tolist()]
-                            elif source_representation.RepresentationType in ['Brep']:
-                                transforms = [placement_matrix.tolist()]
-                            else:
-                                transforms = []
-                            main_obj['data']['children'].append('/' + gmsh_file)
-                            main_obj['data']['children_transforms'].append(transforms)
-                    except Exception as e:
-                        if i.is_a('IfcFacetedBrep'):  # TODO where are MappingTarget and MappingSource?
-                            try:
-                                gmsh_file = id2file[i.id()]
-                                transforms = []
-                                main_obj['data']['children'].append('/' + gmsh_file)
-                                main_obj['data']['children_transforms'].append(transforms)
-                            except Exception as ee:
-                                print('Error')
-                                print(e)
-                                print(ee)
-                        else:
-                            print(e)
-
-    with open(gmsh_path / 'main.json', 'w') as f:
-        json.dump(main_obj, f, indent=2)
+        if product_representation is None:
+            continue
+        assert len(product_representation.Representations) == 1
+        global_id, index = product[0], 0  # GlobalId
+        for r in product_representation.Representations:
+            for i in r.Items:
+                if i.is_a('IfcMappedItem'):
+                    source_representation = i.MappingSource.MappedRepresentation
+                    representation_type = source_representation.RepresentationType
+                    for item in source_representation.Items:
+                        item_id = item.id()
+                        keys.setdefault(item_id, f'{global_id}/{index}')
+                        index += 1
+                        if item_id not in items_ids:
+                            print(f'Item {item_id} of {representation_type} '
+                                  f'representation is not exported')
+                            continue
+                        m = None
+                        if representation_type in ['SweptSolid']:
+                            m = np.dot(placement_matrix,
+                                       resolver.axis2placement(item.Position))
+                        elif representation_type in ['Brep']:
+                            m = placement_matrix
+                        children_items.append(item_id)
+                        transforms.append(np.eye(4) if m is None else m)
+                        placed.append(m is not None)
+                    continue
+                keys.setdefault(i.id(), f'{global_id}/{index}')
+                index += 1
+                if i.is_a('IfcFacetedBrep') and i.id() in items_ids:
+                    # TODO where are MappingTarget and MappingSource?
+                    children_items.append(i.id())
+                    transforms.append(np.eye(4))
+                    placed.append(False)
+                else:
+                    print(f'Item {i.id()} of {i.is_a()} is not a mapped item')
+    return {'items': np.array(children_items, dtype=np.int64),
+            'transforms': np.array(transforms, dtype=float).reshape(-1, 4, 4),
+            'placed': np.array(placed, dtype=bool),
+            'keys': keys}
+
+
+def children_transforms(children, id2child):
+    """Transforms of children of main.json
+
+    Args:
+        children (dict): arrays of children, see collect_children
+        id2child (dict): item id to fields of child, e.g. transform from local
+            frame of the shape, see canonicalize
+
+    Returns:
+        list of list: transforms of each child
+    """
+    transforms = []
+    for item_id, m, placed in zip(children['items'].tolist(), children['transforms'],
+                                  children['placed'].tolist()):
+        local = id2child.get(item_id, {}).get('transform')
+        if placed:
+            transforms.append([(m if local is None else np.dot(m, local)).tolist()])
+        else:
+            transforms.append([] if local is None else [local])
+    return transforms
+
+
+def children_fields(children, id2child):
+    """Fields of children of main.json but transforms, e.g. children_zone
+
+    gmsh-scripts sets field name of each child to value of children_<name>
+    of parent if it is not None, so deduplicated items that share object keep
+    their own zones.
+
+    Args:
+        children (dict): arrays of children, see collect_children
+        id2child (dict): item id to fields of child, see canonicalize
+
+    Returns:
+        dict: children_<name> to list of values of each child
+    """
+    items = children['items'].tolist()
+    names = {k for x in id2child.values() for k in x if k != 'transform'}
+    return {f'children_{k}': [id2child.get(x, {}).get(k) for x in items] for k in sorted(names)}
+
+
+def convert(ifc, file_path, output_dir_path='gmsh', workers=1, batch_size=256,
+            deduplicate=False, incremental=False, verbose=False,
+            inventory=None, profiler=None, extraction=None):
+    """Convert geometry of model to gmsh-scripts JSON files
+
+    Args:
+        ifc (ifcopenshell.file or None): model, not used if extraction is set
+        file_path (str): path to model, workers open it by themselves
+        output_dir_path (str or Path): output directory
+        workers (int): number of processes
+        batch_size (int): number of Breps parsed at once
+        deduplicate (bool): write each unique shape once
+        incremental (bool): parse and rewrite only changed items
+        verbose (bool): print statistics of model
+        inventory (Inventory or None): inventory of model, built if None
+        profiler (Profiler or None): profiler of stages
+        extraction (Extraction or None): data of model, extracted from ifc if None
+
+    Returns:
+        list of str: written files relative to output directory
+    """
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    gmsh_path = Path(output_dir_path)
+    if extraction is None:
+        if inventory is None:
+            inventory = Inventory(ifc, statistics=verbose)
+        extraction = Extraction(ifc, file_path, workers, batch_size, inventory, profiler)
+    summary = extraction.summary
+    if verbose and extraction.inventory is not None:
+        extraction.inventory.print()
+    else:
+        print(f'products: {summary["products"]}, shapes: {summary["shapes"]}')
+    profiler.metadata.update(summary)
+
+    options = {'deduplicate': deduplicate}
+    manifest = load_manifest(gmsh_path, options) if incremental else None
+    if manifest is None and gmsh_path.exists():
+        shutil.rmtree(gmsh_path)
+    gmsh_path.mkdir(exist_ok=True, parents=True)
+    main_obj = create_main_gmsh_object()
+    profiler.metadata.update({'breps': summary['items'].get('Brep', 0),
+                              'swept': summary['items'].get('SweptSolid', 0)})
+    children = extraction.children
+    changed = None
+    if incremental:
+        cached = {} if manifest is None else manifest['items']
+        items_hashes = extraction.hashes
+        # Items and their files are keyed by GlobalId of product, so
+        # renumbering of entities between revisions of the model does not
+        # change the keys and files, items without product are keyed by id
+        keys = {x: children['keys'].get(x, f'#{x}') for x in items_hashes}
+        unchanged = {x for x, h in items_hashes.items()
+                     if cached.get(keys[x], {}).get('hash') == h
+                     and (gmsh_path / cached[keys[x]]['file']).exists()}
+        changed = set(items_hashes) - unchanged
+        print(f'changed items: {len(changed)}/{len(items_hashes)}')
+    id2file, id2child = extraction.export_items(gmsh_path, children['keys'],
+                                                deduplicate, changed)
+    if incremental:
+        for x in unchanged:
+            id2file[x] = cached[keys[x]]['file']
+            if cached[keys[x]]['child'] is not None:
+                id2child[x] = cached[keys[x]]['child']
+        manifest_items = {keys[x]: {'hash': h, 'file': id2file[x],
+                                    'child': id2child.get(x)}
+                          for x, h in items_hashes.items()}
+        with profiler.stage('write'):
+            write_manifest(gmsh_path, manifest_items, options)
+            removed = remove_stale(gmsh_path, id2file.values())
+        print(f'removed files: {len(removed)}')
+    if deduplicate:
+        print(f'unique shapes: {len(set(id2file.values()))}/{len(id2file)}')
+
+    main_obj['data']['children'] = [f'/{id2file[x]}' for x in children['items'].tolist()]
+    main_obj['data']['children_transforms'] = children_transforms(children, id2child)
+    main_obj['data'].update(children_fields(children, id2child))
+    with profiler.stage('write'):
+        with open(gmsh_path / 'main.json', 'w') as f:
+            json.dump(main_obj, f, indent=2)
+    files = set(id2file.values()) | {'main.json'}
+    if incremental:
+        files.add(MANIFEST_FILE)
+    return sorted(files)
+
+
+def main(file_path, output_dir_path='gmsh', workers=1, batch_size=256,
+         deduplicate=False, incremental=False, profile=False, cprofile=False,
+         verbose=False, cache=None, cache_size=DEFAULT_MAX_SIZE):
+    profiler = Profiler(enabled=profile or cprofile, cprofile=cprofile)
+    profiler.metadata.update({'converter': 'ifc2gmsh.geometry',
+                              'file_path': str(file_path), 'workers': workers})
+    profiler.start()
+    gmsh_path = Path(output_dir_path)
+    extraction = load_extraction(file_path, cache, cache_size, workers, batch_size,
+                                 verbose, profiler)
+    convert(None, file_path, gmsh_path, workers, batch_size, deduplicate,
+            incremental, verbose, profiler=profiler, extraction=extraction)
+    profiler.stop()
+    profiler.dump(gmsh_path)
@@ -0,0 +1,117 @@
+from collections import Counter
+from functools import cached_property
+from pprint import pprint
+
+
+class Inventory:
+    """Inventory of products, shape representations and property sets of model
+
+    Indexes are built lazily on first access, so converters sharing one
+    inventory (see ifc2gmsh.pipeline) scan the model once for each index.
+    Shapes are indexed by RepresentationType in one pass over
+    IfcShapeRepresentation, statistics for diagnostics are gathered in the
+    same pass only if requested.
+
+    Args:
+        ifc (ifcopenshell.file): model
+        statistics (bool): gather statistics of products and shapes
+
+    Attributes:
+        products (list): IfcProduct entities
+        shapes (list): IfcShapeRepresentation entities
+        structure (dict): RepresentationType to shapes
+        items (dict): RepresentationType to ids of items of shapes
+        statistics (dict or None): name to Counter, e.g. types of products
+        property_sets (dict): Name to IfcPropertySet entities
+        definitions (dict): id of property definition to related objects
+            of IfcRelDefinesByProperties
+    """
+
+    def __init__(self, ifc, statistics=False):
+        self.ifc = ifc
+        self.gather_statistics = statistics
+
+    @cached_property
+    def products(self):
+        return self.ifc.by_type('IfcProduct')
+
+    @cached_property
+    def shapes(self):
+        return self.ifc.by_type('IfcShapeRepresentation')
+
+    @cached_property
+    def _shapes_index(self):
+        structure, items = {}, {}
+        identifiers, items_types = Counter(), Counter()
+        statistics = self.gather_statistics
+        # Attributes are read by index (RepresentationIdentifier, RepresentationType,
+        # Items), it is several times faster than by name
+        for shape in self.shapes:
+            representation_type = shape[2]
+            structure.setdefault(representation_type, []).append(shape)
+            shape_items = items.setdefault(representation_type, [])
+            for item in shape[3]:
+                shape_items.append(item.id())
+                if statistics:
+                    items_types[item.is_a()] += 1
+            if statistics:
+                identifiers[shape[1]] += 1
+        if statistics:
+            statistics = {
+                'products': Counter(x.is_a() for x in self.products),
+                'identifiers': identifiers,
+                'types': Counter({k: len(v) for k, v in structure.items()}),
+                'items': items_types}
+        else:
+            statistics = None
+        return structure, items, statistics
+
+    @property
+    def structure(self):
+        return self._shapes_index[0]
+
+    @property
+    def items(self):
+        return self._shapes_index[1]
+
+    @property
+    def statistics(self):
+        return self._shapes_index[2]
+
+    @cached_property
+    def property_sets(self):
+        index = {}
+        for x in self.ifc.by_type('IfcPropertySet'):
+            index.setdefault(x[2], []).append(x)  # Name
+        return index
+
+    @cached_property
+    def definitions(self):
+        index = {}
+        for x in self.ifc.by_type('IfcRelDefinesByProperties'):
+            # RelatingPropertyDefinition (or IfcPropertySetDefinitionSet) and RelatedObjects
+            definitions = x[5] if isinstance(x[5], tuple) else [x[5]]
+            for definition in definitions:
+                index.setdefault(definition.id(), []).extend(x[4])
+        return index
+
+    def summary(self):
+        """Numbers of products, shapes and items by RepresentationType"""
+        return {'products': len(self.products), 'shapes': len(self.shapes),
+                'items': {k: len(v) for k, v in self.items.items()}}
+
+    def print(self):
+        print(f'products: {len(self.products)}')
+        print(f'shapes: {len(self.shapes)}')
+        if self.statistics is None:
+            print('shapes structure:')
+            pprint({k: len(v) for k, v in self.structure.items()})
+            return
+        print('products types:')
+        pprint(self.statistics['products'])
+        print('shapes identifiers:')
+        pprint(self.statistics['identifiers'])
+        print('shapes structure:')
+        pprint(self.statistics['types'])
+        print('items types:')
+        pprint(self.statistics['items'])
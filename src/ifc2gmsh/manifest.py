@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 5
+
+
+def load_manifest(gmsh_path, options):
+    """Load manifest of previous export
+
+    Args:
+        gmsh_path (str or Path): output directory
+        options (dict): options of export that change output files
+
+    Returns:
+        dict or None: manifest or None if there is no manifest or it was
+            written by other version or with other options
+    """
+    path = Path(gmsh_path) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    if manifest.get('options') != options:
+        return None
+    return manifest
+
+
+def write_manifest(gmsh_path, items, options):
+    """Write manifest of export
+
+    Args:
+        gmsh_path (str or Path): output directory
+        items (dict): key of item to {'hash', 'file', 'child'}, key is
+            GlobalId of product and index of item in it, see
+            ifc2gmsh.geometry.collect_children
+        options (dict): options of export that change output files
+    """
+    manifest = {'version': MANIFEST_VERSION, 'options': options, 'items': items}
+    with open(Path(gmsh_path) / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f)
+
+
+def remove_stale(gmsh_path, files):
+    """Remove JSON files that are not in files, main.json or manifest
+
+    Returns:
+        list of str: removed files
+    """
+    keep = set(files) | {'main.json', MANIFEST_FILE}
+    removed = []
+    for path in Path(gmsh_path).glob('*.json'):
+        if path.name not in keep:
+            path.unlink()
+            removed.append(path.name)
+    return removed
@@ -0,0 +1,33 @@
+"""Pipeline of all converters on one extraction of model
+
+Geometry and properties of gmsh-scripts are written to <output>/gmsh,
+FENIA conditions and properties to <output>/fenia.
+"""
+from pathlib import Path
+
+import ifc2fenia.main as fenia
+from ifc2gmsh.cache import DEFAULT_MAX_SIZE
+from ifc2gmsh.extraction import load as load_extraction
+import ifc2gmsh.geometry as geometry
+from ifc2gmsh.profiling import Profiler
+import ifc2gmsh.properties as properties
+
+
+def main(file_path, output_dir_path='output', workers=1, batch_size=256,
+         deduplicate=False, incremental=False, global_ids=None, profile=False,
+         cprofile=False, verbose=False, cache=None, cache_size=DEFAULT_MAX_SIZE):
+    profiler = Profiler(enabled=profile or cprofile, cprofile=cprofile)
+    profiler.metadata.update({'converter': 'ifc2gmsh.pipeline',
+                              'file_path': str(file_path), 'workers': workers})
+    profiler.start()
+    output_path = Path(output_dir_path)
+    extraction = load_extraction(file_path, cache, cache_size, workers, batch_size,
+                                 verbose, profiler)
+    geometry.convert(None, file_path, output_path / 'gmsh', workers, batch_size,
+                     deduplicate, incremental, verbose, profiler=profiler,
+                     extraction=extraction)
+    properties.convert(None, output_path / 'gmsh', global_ids, profiler=profiler,
+                       extraction=extraction)
+    fenia.convert(None, output_path / 'fenia', profiler=profiler, extraction=extraction)
+    profiler.stop()
+    profiler.dump(output_path)
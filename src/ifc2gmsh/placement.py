@@ -0,0 +1,87 @@
+from ifcopenshell.util.placement import get_axis2placement
+import numpy as np
+
+
+class PlacementResolver:
+    """Resolver of placements to 4x4 transformation matrices
+
+    Matrices of IfcAxis2Placement and composed matrices of IfcLocalPlacement
+    are cached by entity id, so each placement of PlacementRelTo chains
+    (site, building, storey, ...) is resolved once. Unresolved placements are
+    composed level by level of the chains with one np.matmul per level.
+    Results are the same as of ifcopenshell.util.placement.get_local_placement.
+
+    Attributes:
+        axis2placements (dict): IfcAxis2Placement id to matrix
+        local_placements (dict): IfcLocalPlacement id to composed matrix
+    """
+
+    def __init__(self):
+        self.axis2placements = {}
+        self.local_placements = {}
+
+    def axis2placement(self, placement):
+        placement_id = placement.id()
+        m = self.axis2placements.get(placement_id)
+        if m is None:
+            m = get_axis2placement(placement)
+            self.axis2placements[placement_id] = m
+        return m
+
+    def resolve(self, placements):
+        """Resolve local placements
+
+        Args:
+            placements (list): IfcLocalPlacement entities or None
+
+        Returns:
+            np.ndarray: (N, 4, 4) matrices
+
+        Raises:
+            NotImplementedError: if a placement or PlacementRelTo of it is not
+                IfcLocalPlacement (e.g. IfcGridPlacement)
+        """
+        if len(placements) == 0:
+            return np.empty((0, 4, 4))
+        depths = {}  # Unresolved placement id to (depth in chain, placement)
+        for placement in placements:
+            chain = []
+            p = placement
+            while p is not None and p.id() not in self.local_placements \
+                    and p.id() not in depths:
+                if not p.is_a('IfcLocalPlacement'):
+                    raise NotImplementedError(
+                        f'{p.is_a()} #{p.id()} is not supported, only IfcLocalPlacement')
+                chain.append(p)
+                p = p.PlacementRelTo
+            depth = depths[p.id()][0] if p is not None and p.id() in depths else 0
+            for x in reversed(chain):
+                depth += 1
+                depths[x.id()] = (depth, x)
+        levels = {}
+        for depth, x in depths.values():
+            levels.setdefault(depth, []).append(x)
+        for depth in sorted(levels):
+            xs = levels[depth]
+            parents = np.stack([
+                np.eye(4) if x.PlacementRelTo is None
+                else self.local_placements[x.PlacementRelTo.id()] for x in xs])
+            axes = np.stack([self.axis2placement(x.RelativePlacement) for x in xs])
+            for x, m in zip(xs, np.matmul(parents, axes)):
+                self.local_placements[x.id()] = m
+        return np.stack([np.eye(4) if x is None else self.local_placements[x.id()]
+                         for x in placements]).reshape(-1, 4, 4)
+
+    def local_placement(self, placement):
+        return self.resolve([placement])[0]
+
+    def product_transforms(self, products):
+        """Transforms of products
+
+        Args:
+            products (list): IfcProduct entities
+
+        Returns:
+            np.ndarray: (N, 4, 4) matrices of ObjectPlacement of products
+        """
+        return self.resolve([x.ObjectPlacement for x in products])
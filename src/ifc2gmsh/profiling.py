@@ -0,0 +1,145 @@
+from contextlib import contextmanager, nullcontext
+import cProfile
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def get_peak_rss():
+    """Peak resident set size of the process in bytes, 0 if unknown"""
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024  # macOS B, Linux KB
+    if sys.platform == 'win32':
+        return get_peak_working_set()
+    return 0
+
+
+def get_peak_working_set():
+    """Peak working set of the process in bytes (Windows)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_current_process.restype = wintypes.HANDLE
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(
+            get_current_process(), ctypes.byref(counters), counters.cb):
+        return 0
+    return counters.PeakWorkingSetSize
+
+
+class Profiler:
+    """Profiler of converter stages
+
+    Stage metrics are accumulated over all calls of the stage: wall and CPU
+    time, allocated memory (tracemalloc, current at exit - current at enter),
+    peak of allocated memory and peak RSS of the process after the stage.
+    Stages should not be nested, because tracemalloc has one peak.
+    Work done in worker processes is not traced, only its wall time.
+
+    Args:
+        enabled (bool): profile stages, otherwise stage is a no-op
+        trace_memory (bool): trace allocations with tracemalloc (slower)
+        cprofile (bool): run cProfile between start and stop
+    """
+
+    def __init__(self, enabled=True, trace_memory=True, cprofile=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.cprofile = cProfile.Profile() if enabled and cprofile else None
+        self.stages = {}
+        self.metadata = {}
+        self.start_time = None
+        self.stop_time = None
+
+    def start(self):
+        if not self.enabled:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.stop_time = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def stage(self, name):
+        return self._stage(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _stage(self, name):
+        s = self.stages.setdefault(name, {
+            'calls': 0, 'time': 0., 'cpu_time': 0.,
+            'allocated': 0, 'peak_allocated': 0, 'peak_rss': 0})
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+        t, ct = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            s['time'] += time.perf_counter() - t
+            s['cpu_time'] += time.process_time() - ct
+            s['calls'] += 1
+            if tracing:
+                new_current, peak = tracemalloc.get_traced_memory()
+                s['allocated'] += new_current - current
+                s['peak_allocated'] = max(s['peak_allocated'], peak - current)
+            s['peak_rss'] = max(s['peak_rss'], get_peak_rss())
+
+    def report(self):
+        total = None
+        if self.start_time is not None:
+            stop_time = time.perf_counter() if self.stop_time is None else self.stop_time
+            total = stop_time - self.start_time
+        return {'metadata': self.metadata, 'time': total,
+                'peak_rss': get_peak_rss(), 'stages': self.stages}
+
+    def dump(self, output_path):
+        """Write JSON report (and cProfile stats) next to output
+
+        Args:
+            output_path (str or Path): output directory of converter
+
+        Returns:
+            Path or None: path to report
+        """
+        if not self.enabled:
+            return None
+        output_path = Path(output_path).resolve()
+        report_path = output_path.with_name(f'{output_path.name}.profile.json')
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f'profile: {report_path}')
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(output_path.with_name(f'{output_path.name}.prof'))
+        return report_path
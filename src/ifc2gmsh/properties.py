@@ -5,6 +5,10 @@ import argparse
 import ifcopenshell
 
 import ifc2fenia.foam as foam
+from ifc2gmsh.cache import DEFAULT_MAX_SIZE
+from ifc2gmsh.extraction import Extraction, load as load_extraction
+from ifc2gmsh.inventory import Inventory
+from ifc2gmsh.profiling import Profiler
 
 
 def ifc2py(v):
@@ -14,44 +18,109 @@ def ifc2py(v):
         return v
 
 
-def main(file_path, output_dir_path='gmsh'):
-    # Read
-    file_path = Path(file_path)
-    ifc = ifcopenshell.open(str(file_path))
-    products = ifc.by_type('IfcProduct')
-    print(f'products: {len(products)}')
+def decode_gmsh_property_set(prop_set):
+    """Decode IBRAE_Gmsh property set to gmsh-scripts data of block"""
+    gmsh_data = {'data': {"class": "block.Block"}}
+    volumes_zones = None
+    surfaces_zones = None
+    for y in prop_set.HasProperties:
+        prop_name = ifc2py(y.Name)
+        if prop_name == 'VolumeZones':
+            volumes_zones = [ifc2py(x) for x in ifc2py(y.ListValues)]
+        elif prop_name == 'SurfacesZones':
+            surfaces_zones = [ifc2py(x) for x in ifc2py(y.ListValues)]
+        elif prop_name == 'BooleanLevel':
+            gmsh_data['data']['boolean_level'] = ifc2py(y.NominalValue)
+    if volumes_zones is not None and surfaces_zones is not None:
+        gmsh_data['data']['zone'] = [volumes_zones[0], surfaces_zones]
+    elif volumes_zones is not None:
+        gmsh_data['data']['zone'] = volumes_zones[0]
+    else:
+        raise ValueError('Volume zone should be defined!')
+    return gmsh_data
 
-    # Read/Write
+
+def get_gmsh_properties(ifc, global_ids=None, inventory=None):
+    """Get gmsh-scripts data of IBRAE_Gmsh property sets of products
+
+    Property sets are related to products by IfcRelDefinesByProperties, each
+    set is decoded once and its data is shared by all related products.
+
+    Args:
+        ifc (ifcopenshell.file): model
+        global_ids (iterable or None): GlobalId of products to get, all if None
+        inventory (Inventory or None): inventory of model, built if None
+
+    Returns:
+        dict: GlobalId of product to gmsh data
+    """
+    inventory = Inventory(ifc) if inventory is None else inventory
+    global_ids = None if global_ids is None else set(global_ids)
+    n_sets = 0
+    gid2data = {}
+    for prop_set in inventory.property_sets.get('IBRAE_Gmsh', []):
+        gmsh_data = None
+        for product in inventory.definitions.get(prop_set.id(), []):
+            gid = product[0]  # GlobalId, by index is faster than by name
+            if global_ids is not None and gid not in global_ids:
+                continue
+            if not product.is_a('IfcProduct'):
+                continue
+            if gmsh_data is None:
+                gmsh_data = decode_gmsh_property_set(prop_set)
+                n_sets += 1
+            gid2data[gid] = gmsh_data
+    print(f'IBRAE_Gmsh property sets: {n_sets}, products: {len(gid2data)}')
+    return gid2data
+
+
+def convert(ifc, output_dir_path='gmsh', global_ids=None, inventory=None,
+            profiler=None, extraction=None):
+    """Write gmsh-scripts data of products of model to files by GlobalId
+
+    Args:
+        ifc (ifcopenshell.file or None): model, not used if extraction is set
+        output_dir_path (str or Path): output directory
+        global_ids (iterable or None): GlobalId of products to write, all if None
+        inventory (Inventory or None): inventory of model, built if None
+        profiler (Profiler or None): profiler of stages
+        extraction (Extraction or None): data of model, extracted from ifc if None
+
+    Returns:
+        list of str: written files relative to output directory
+    """
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    if extraction is None:
+        extraction = Extraction(ifc, inventory=inventory, profiler=profiler)
+    gid2data = extraction.gmsh_properties
+    if global_ids is not None:
+        global_ids = set(global_ids)
+        gid2data = {k: v for k, v in gid2data.items() if k in global_ids}
+    profiler.metadata['properties_products'] = len(gid2data)
+
+    # Write
     output_dir_path = Path(output_dir_path)
     output_dir_path.mkdir(parents=True, exist_ok=True)
-    for product in products:
-        gid = ifc2py(product.GlobalId)
-        if gid == '2wGebYoZr8CujW8_P1W8tC':
-            for x in product.IsDefinedBy:
-                if hasattr(x, 'RelatingPropertyDefinition'):
-                    if x.RelatingPropertyDefinition.is_a('IfcPropertySet'):
-                        prop_set = x.RelatingPropertyDefinition
-                        prop_set_name = ifc2py(prop_set.Name)
-                        if prop_set_name == 'IBRAE_Gmsh':
-                            gmsh_data = {'data': {"class": "block.Block"}}
-                            volumes_zones = None
-                            surfaces_zones = None
-                            for y in prop_set.HasProperties:
-                                prop_name = ifc2py(y.Name)
-                                if prop_name == 'VolumeZones':
-                                    volumes_zones = [ifc2py(x) for x in ifc2py(y.ListValues)]
-                                elif prop_name == 'SurfacesZones':
-                                    surfaces_zones = [ifc2py(x) for x in ifc2py(y.ListValues)]
-                                elif prop_name == 'BooleanLevel':
-                                    gmsh_data['data']['boolean_level'] = ifc2py(y.NominalValue)
-                            if volumes_zones is not None and surfaces_zones is not None:
-                                gmsh_data['data']['zone'] = [volumes_zones[0], surfaces_zones]
-                            elif volumes_zones is not None:
-                                gmsh_data['data']['zone'] = volumes_zones[0]
-                            else:
-                                raise ValueError('Volume zone should be defined!')
-                            data_path = output_dir_path / gid
-                            print(gid)
-                            print(gmsh_data)
-                            with open(data_path, 'w') as f:
-                                json.dump(gmsh_data, f)
+    with profiler.stage('write'):
+        texts = {}  # Data of property set is serialized once
+        for gid, gmsh_data in gid2data.items():
+            text = texts.get(id(gmsh_data))
+            if text is None:
+                text = json.dumps(gmsh_data)
+                texts[id(gmsh_data)] = text
+            with open(output_dir_path / gid, 'w') as f:
+                f.write(text)
+    return list(gid2data)
+
+
+def main(file_path, output_dir_path='gmsh', global_ids=None, profile=False,
+         cprofile=False, cache=None, cache_size=DEFAULT_MAX_SIZE):
+    profiler = Profiler(enabled=profile or cprofile, cprofile=cprofile)
+    profiler.metadata.update({'converter': 'ifc2gmsh.properties',
+                              'file_path': str(file_path)})
+    profiler.start()
+    output_dir_path = Path(output_dir_path)
+    extraction = load_extraction(file_path, cache, cache_size, profiler=profiler)
+    convert(None, output_dir_path, global_ids, profiler=profiler, extraction=extraction)
+    profiler.stop()
+    profiler.dump(output_dir_path)
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+import sys
+
+# Benchmarks run converters many times, they are collected only on demand:
+# IFC2GMSH_BENCHMARK=1 python -m pytest tests/benchmarks
+BENCHMARK = os.environ.get('IFC2GMSH_BENCHMARK', '0') == '1'
+SRC_PATH = str(Path(__file__).resolve().parents[2] / 'src')
+
+collect_ignore_glob = [] if BENCHMARK else ['test_*.py']
+if BENCHMARK and SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
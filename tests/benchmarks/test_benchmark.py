@@ -0,0 +1,150 @@
+"""Benchmarks of converters
+
+Each converter runs in a subprocess, so peak RSS is measured per run.
+Results are written to benchmark.json. A run that is slower than
+threshold * time of baseline.json fails. Baseline depends on the machine, so
+it is not committed: create it with IFC2GMSH_BENCHMARK_UPDATE=1 first, runs
+without baseline fail.
+
+Environment variables:
+    IFC2GMSH_BENCHMARK: run benchmarks if 1, they are skipped by default
+    IFC2GMSH_BENCHMARK_THRESHOLD: max ratio of time to baseline time, 1.5
+    IFC2GMSH_BENCHMARK_SCALES: numbers of products of synthetic models, 1000
+    IFC2GMSH_BENCHMARK_UPDATE: write baseline.json from results if 1
+"""
+import json
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+import ifc2gmsh
+from ifc2gmsh.generator import generate
+
+THRESHOLD = float(os.environ.get('IFC2GMSH_BENCHMARK_THRESHOLD', 1.5))
+SCALES = [int(x) for x in os.environ.get('IFC2GMSH_BENCHMARK_SCALES', '1000').split(',')]
+UPDATE = os.environ.get('IFC2GMSH_BENCHMARK_UPDATE', '0') == '1'
+ROOT = Path(__file__).parent
+BASELINE_PATH = ROOT / 'baseline.json'
+RESULTS_PATH = ROOT / 'benchmark.json'
+MODELS = {
+    'tuk_140': ROOT.parent / 'ifc2gmsh' / 'tuk_140' / 'TUK_140.ifc',
+    'model_pgzro': ROOT.parent / 'ifc2gmsh' / 'model_pgzro' / 'ModelPGZRO3Bidon.ifc'}
+CONVERTERS = {
+    'geometry': ['ifc2gmsh', '-t', 'geometry'],
+    'properties': ['ifc2gmsh', '-t', 'properties'],
+    'fenia': ['ifc2fenia']}
+# Run module and write its peak RSS in bytes. ru_maxrss of a child process
+# includes RSS of the parent at fork, VmHWM of the new mm on Linux does not
+RUNNER = """
+import os
+import runpy
+import sys
+
+rss_path, module = sys.argv[1:3]
+sys.argv = [module] + sys.argv[3:]
+try:
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+finally:
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            rss = int([x.split()[1] for x in f if x.startswith('VmHWM:')][0]) * 1024
+    else:
+        from ifc2gmsh.profiling import get_peak_rss
+        rss = get_peak_rss()
+    with open(rss_path, 'w') as f:
+        f.write(str(rss))
+"""
+
+
+def count_entities(file_path):
+    with open(file_path, 'rb') as f:
+        return len(re.findall(rb'^#\d+\s*=', f.read(), re.MULTILINE))
+
+
+def get_size(path):
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(x.stat().st_size for x in path.rglob('*') if x.is_file())
+
+
+def run(converter, file_path, output_path):
+    """Run converter in subprocess
+
+    Returns:
+        tuple: wall time (s) and peak RSS (bytes) of the subprocess
+    """
+    env = dict(os.environ)
+    src_path = str(Path(ifc2gmsh.__file__).resolve().parents[1])
+    env['PYTHONPATH'] = os.pathsep.join(
+        [src_path] + [x for x in [env.get('PYTHONPATH')] if x])
+    with tempfile.TemporaryDirectory() as tmp:
+        rss_path = Path(tmp) / 'rss'
+        args = [sys.executable, '-c', RUNNER, str(rss_path), *CONVERTERS[converter],
+                '--file_path', str(file_path), '--output_dir_path', str(output_path)]
+        t = time.perf_counter()
+        p = subprocess.run(args, env=env, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE)
+        wall_time = time.perf_counter() - t
+        if p.returncode != 0:
+            raise RuntimeError(p.stderr.decode(errors='replace')[-2000:])
+        peak_rss = int(rss_path.read_text())
+    return wall_time, peak_rss
+
+
+def load_json(path):
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def update_json(path, key, value):
+    data = load_json(path)
+    data[key] = value
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope='module')
+def models(tmp_path_factory):
+    models = dict(MODELS)
+    models_path = tmp_path_factory.mktemp('models')
+    for n in SCALES:
+        file_path = models_path / f'synthetic_{n}.ifc'
+        generate(file_path, n, seed=0)
+        models[f'synthetic_{n}'] = file_path
+    return models
+
+
+@pytest.mark.parametrize('converter', list(CONVERTERS))
+@pytest.mark.parametrize('model', list(MODELS) + [f'synthetic_{x}' for x in SCALES])
+def test_benchmark(models, model, converter, tmp_path):
+    file_path = models[model]
+    output_path = tmp_path / 'output'
+    wall_time, peak_rss = run(converter, file_path, output_path)
+    n_entities = count_entities(file_path)
+    result = {'time': wall_time,
+              'entities': n_entities,
+              'entities_per_second': n_entities / wall_time,
+              'input_bytes': get_size(file_path),
+              'output_bytes': get_size(output_path) if output_path.exists() else 0,
+              'peak_rss': peak_rss}
+    key = f'{model}/{converter}'
+    print(f'{key}: {result}')
+    update_json(RESULTS_PATH, key, result)
+    if UPDATE:
+        update_json(BASELINE_PATH, key, result)
+        return
+    baseline = load_json(BASELINE_PATH).get(key)
+    assert baseline is not None, \
+        f'no baseline of {key} in {BASELINE_PATH}, run with IFC2GMSH_BENCHMARK_UPDATE=1'
+    assert wall_time <= THRESHOLD * baseline['time'], \
+        f'{key} is slower than baseline: {wall_time:.3f}s > ' \
+        f'{THRESHOLD} * {baseline["time"]:.3f}s'
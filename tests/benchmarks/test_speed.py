@@ -0,0 +1,111 @@
+"""Speed of fast paths of converters against their reference implementations
+
+Tests of converters check that fast paths give the same results as the
+reference implementations, these benchmarks check that they are faster.
+Like test_benchmark.py they run only with IFC2GMSH_BENCHMARK=1.
+"""
+import io
+import time
+
+import ifcopenshell
+import numpy as np
+
+from ifc2fenia import fields, foam, msh
+from ifc2fenia.main import get_fenia_conditions
+from ifc2gmsh.inventory import Inventory
+from tests.ifc2fenia.foam.test_conditions import reference_conditions
+from tests.ifc2fenia.foam.test_foam import dictionary_text, dump_reference, field_text, \
+    header, load_dictionary_reference, load_faces_reference, load_reference, write_mesh
+from tests.ifc2fenia.foam.test_fields import cell_values_reference, random_zones
+from tests.ifc2fenia.foam.test_msh import box_mesh, faces_reference, write_msh
+
+
+def best_time(function, repeat=3):
+    """Min wall time of calls of function"""
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def test_load_field(n=200000):
+    values = np.random.default_rng(1).random((n, 3))
+    text = field_text(values, 'vectorField')
+    fast = best_time(lambda: foam.load(io.StringIO(text), 'vectorField'))
+    reference = best_time(lambda: load_reference(io.StringIO(text), 'vectorField'))
+    print(f'fast: {fast:.3f}s, reference: {reference:.3f}s, speedup: {reference / fast:.1f}')
+    assert fast < reference
+
+
+def test_load_binary_field(tmp_path, n=500000):
+    values = np.random.default_rng(5).random((n, 3))
+    ascii_path, binary_path = tmp_path / 'U.ascii', tmp_path / 'U.binary'
+    ascii_path.write_text(field_text(values, 'vectorField'))
+    with open(binary_path, 'wb') as f:
+        foam.dump(values, f, 'vectorField', binary=True, header=header('vectorField', 'U'))
+
+    def load(path, mode, **kwargs):
+        with open(path, mode) as f:
+            foam.load(f, 'vectorField', **kwargs)
+
+    ascii_time = best_time(lambda: load(ascii_path, 'r'))
+    binary_time = best_time(lambda: load(binary_path, 'rb', start_from=3))
+    print(f'ascii: {ascii_time:.3f}s, binary: {binary_time:.3f}s')
+    assert binary_time < ascii_time / 10
+
+
+def test_dump_field(n=200000):
+    zones = np.random.default_rng(8).random((100, 3))
+    values = zones[np.random.default_rng(9).integers(0, len(zones), n)]  # values of zones
+    fast = best_time(lambda: foam.dump(values, io.StringIO(), 'vectorField'))
+    reference = best_time(lambda: dump_reference(values, io.StringIO()))
+    print(f'fast: {fast:.3f}s, reference: {reference:.3f}s, speedup: {reference / fast:.1f}')
+    assert fast < reference
+
+
+def test_load_dictionary(n=10000):
+    text = dictionary_text(n)
+    fast = best_time(lambda: foam.load(io.StringIO(text), start_from=0))
+    reference = best_time(lambda: load_dictionary_reference(io.StringIO(text)))
+    print(f'patches: {n}, fast: {fast:.3f}s, reference: {reference:.3f}s, '
+          f'speedup: {reference / fast:.1f}')
+    assert fast < reference
+
+
+def test_load_faces(tmp_path, n=200000):
+    write_mesh(tmp_path / 'polyMesh', n_faces=n)
+    path = tmp_path / 'polyMesh' / 'faces'
+    fast = best_time(lambda: foam.load(path, 'faceList'))
+    reference = best_time(lambda: load_faces_reference(path))
+    print(f'fast: {fast:.3f}s, reference: {reference:.3f}s')
+    assert fast < reference
+
+
+def test_cell_values(n=1000000, n_zones=100):
+    zones, values = random_zones(n, n_zones)
+    fast = best_time(lambda: fields.cell_values(fields.cell_zones(zones, n), list(zones),
+                                                values))
+    reference = best_time(lambda: cell_values_reference(zones, values, n))
+    print(f'fast: {fast:.3f}s, reference: {reference:.3f}s')
+    assert fast < reference / 3
+
+
+def test_poly_mesh(tmp_path, n=20):
+    points, cells, surfaces = box_mesh(n)
+    write_msh(tmp_path / 'box.msh', points, cells, surfaces, binary=True)
+    tetrahedra = msh.load_msh(tmp_path / 'box.msh')['cells'][4]
+    fast = best_time(lambda: msh.poly_mesh(msh.load_msh(tmp_path / 'box.msh')))
+    reference = best_time(lambda: faces_reference(tetrahedra))
+    print(f'{len(cells)} cells, fast: {fast:.3f}s, reference: {reference:.3f}s')
+    assert fast < reference
+
+
+def test_conditions(synthetic_model, zones=2000):
+    file_path = synthetic_model('synthetic.ifc', 10, zones=zones, seed=6, properties=True)
+    ifc = ifcopenshell.open(str(file_path))
+    fast = best_time(lambda: get_fenia_conditions(ifc, Inventory(ifc)))
+    reference = best_time(lambda: reference_conditions(ifc))
+    print(f'fast: {fast:.3f}s, reference: {reference:.3f}s')
+    assert fast < reference
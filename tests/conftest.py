@@ -11,7 +11,25 @@ def change_test_dir(request, monkeypatch):
     monkeypatch.chdir(request.fspath.dirname)
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
+def synthetic_model(tmp_path):
+    """Factory of synthetic models in tmp_path
+
+    Returns:
+        callable: (name, *args, **kwargs) to path of model, arguments are of
+            ifc2gmsh.generator.generate
+    """
+    from ifc2gmsh.generator import generate
+
+    def create(name, *args, **kwargs):
+        file_path = tmp_path / name
+        generate(file_path, *args, **kwargs)
+        return file_path
+
+    return create
+
+
+@pytest.fixture
 def create_box_with_properties(box_path='box.ifc',
                                box_props_path='box_with_properties.ifc'):
     """
@@ -1,5 +1,8 @@
+import pytest
+
 from ifc2fenia.main import main
 
 
+@pytest.mark.usefixtures('create_box_with_properties')
 def test_fenia_box_with_properties(box_props_path='box_with_properties.ifc'):
     main(box_props_path)
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+
+from ifc2fenia import foam
+from ifc2fenia.case import FoamCase
+from tests.ifc2fenia.foam.test_foam import header, write_case, write_mesh
+
+
+def test_case(tmp_path):
+    case_path = tmp_path / 'case'
+    times, values = write_case(case_path)
+    (case_path / 'constant' / 'transportProperties').write_text(
+        '// header\n' * 3 + 'nu 1e-05;\nmodel laminar;\n')
+    (case_path / 'constant' / 'polyMesh').mkdir()
+    points = np.arange(12.).reshape(4, 3)
+    foam.dump(points, case_path / 'constant' / 'polyMesh' / 'points', 'vectorField',
+              binary=True, header=header('vectorField', 'points'))
+    case = FoamCase(case_path, start_from=3)
+    assert case.times == times.tolist()
+    assert len(case) == 0  # nothing is loaded by index
+    assert case.names('constant') == ['transportProperties']
+    assert case.fields() == ['T'] and case.fields(1.5) == ['T']  # 1.5/T.gz
+    assert case.constant('transportProperties') == {'nu': 1e-05, 'model': 'laminar'}
+    np.testing.assert_array_equal(case.mesh('points'), points)
+    for t, v in zip(times, values):
+        d = case.field('T', t)
+        assert d.flags.writeable is False
+        np.testing.assert_array_equal(np.broadcast_to(d, v.shape), v)
+    assert case.misses == len(times) + 2 and case.hits == 0
+    t = case.field('T', 0.5)
+    assert case.field('T', '0.5') is t and case.hits == 2
+    np.testing.assert_array_equal(case.field('T'), values[-1])  # latest time
+    with pytest.raises(KeyError):
+        case.field('T', 100)
+    with pytest.raises(FileNotFoundError):
+        case.field('U')
+
+
+def test_case_invalidation(tmp_path):
+    case_path = tmp_path / 'case'
+    times, values = write_case(case_path, n_times=3)
+    case = FoamCase(case_path, start_from=3)
+    t = case.field('T')
+    assert case.field('T') is t
+    # Rewritten field is loaded again
+    path = case_path / f'{times[-1]:g}' / 'T'
+    foam.dump(2 * values[-1], path, 'scalarField', header=header('scalarField'))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    np.testing.assert_array_equal(case.field('T'), 2 * values[-1])
+    assert case.misses == 2
+    # New time directory is indexed
+    (case_path / '10').mkdir()
+    foam.dump(values[1], case_path / '10' / 'T', 'scalarField', header=header('scalarField'))
+    stat = os.stat(case_path)
+    os.utime(case_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert case.times == times.tolist() + [10.]
+    np.testing.assert_array_equal(case.field('T'), values[1])
+
+
+def test_case_eviction(tmp_path):
+    case_path = tmp_path / 'case'
+    times, values = write_case(case_path, n_times=6, n=1000)
+    case = FoamCase(case_path, max_size=2 * values[1].nbytes, start_from=3)
+    for t in times[1:]:
+        case.field('T', t)
+        assert case.size <= case.max_size
+    assert len(case) == 2 and case.size == 2 * values[1].nbytes
+    case.field('T', times[-2])  # most recently used
+    case.field('T', times[1])  # evicts times[-1]
+    assert case.field('T', times[-2]) is not None and case.hits == 2
+    case.field('T', times[-1])
+    assert case.misses == len(times) + 1
+    case.clear()
+    assert len(case) == 0 and case.size == 0
+    case = FoamCase(case_path, max_size=values[1].nbytes - 1, start_from=3)
+    case.field('T')
+    assert len(case) == 0  # larger than cache
+
+
+def test_case_mesh(tmp_path):
+    mesh = write_mesh(tmp_path / 'case' / 'constant' / 'polyMesh', binary=True)
+    case = FoamCase(tmp_path / 'case', start_from=3)
+    assert case.names('constant/polyMesh') == ['cellZones', 'faces', 'neighbour', 'owner',
+                                               'points']
+    offsets, faces = case.mesh('faces')
+    assert np.array_equal(offsets, mesh['offsets']) and np.array_equal(faces, mesh['faces'])
+    assert not faces.flags.writeable
+    zones = case.mesh('cellZones')
+    assert np.array_equal(zones['air'], mesh['cellZones']['air'])
+    assert case.mesh('cellZones') is zones
+    assert case.size >= offsets.nbytes + faces.nbytes + zones['air'].nbytes
@@ -0,0 +1,92 @@
+import ifcopenshell
+import pytest
+
+from ifc2fenia import foam
+from ifc2fenia.main import convert, decode_complex_property, get_fenia_conditions, ifc2py
+from ifc2gmsh.inventory import Inventory
+
+
+def reference_conditions(ifc):
+    """Conditions by names of attributes of all property sets"""
+    conditions = {}
+    for prop_set in ifc.by_type('IfcPropertySet'):
+        if prop_set.Name != 'IBRAE_Fenia':
+            continue
+        for prop in prop_set.HasProperties:
+            if not prop.is_a('IfcComplexProperty'):
+                continue
+            values = {ifc2py(x.Name): ifc2py(x.NominalValue) for x in prop.HasProperties}
+            conditions.setdefault(prop.Name, {})[prop.UsageName] = values
+    return conditions
+
+
+def add_fenia_set(ifc, prop):
+    """Add IBRAE_Fenia property set with copy of complex property"""
+    copy = ifc.create_entity('IfcComplexProperty', prop.Name, None, prop.UsageName, [
+        ifc.create_entity('IfcPropertySingleValue', x.Name, None, x.NominalValue, None)
+        for x in prop.HasProperties])
+    ifc.create_entity('IfcPropertySet', ifcopenshell.guid.new(), None, 'IBRAE_Fenia',
+                      None, [copy])
+    return copy
+
+
+def test_conditions(synthetic_model, tmp_path):
+    file_path = synthetic_model('synthetic.ifc', 30, zones=5, seed=4, properties=True)
+    ifc = ifcopenshell.open(str(file_path))
+    conditions = get_fenia_conditions(ifc)
+    reference = reference_conditions(ifc)
+    assert conditions == reference
+    assert len(conditions['MaterialProperty']) == 5
+    assert all(isinstance(v, (str, float)) for x in conditions.values()
+               for y in x.values() for v in y.values())
+    # Equal duplicate is allowed
+    prop = next(x for x in ifc.by_type('IfcComplexProperty') if x.Name == 'MaterialProperty')
+    copy = add_fenia_set(ifc, prop)
+    assert get_fenia_conditions(ifc) == conditions
+    # Conflicting duplicate is not
+    rho = next(x for x in copy.HasProperties if x.Name == 'rho')
+    rho.NominalValue = ifc.create_entity('IfcReal', rho.NominalValue.wrappedValue + 1.)
+    with pytest.raises(ValueError, match=f'MaterialProperty of zone {prop.UsageName}'):
+        get_fenia_conditions(ifc)
+    with pytest.raises(ValueError, match='Conflicting'):
+        convert(ifc, tmp_path / 'fenia')
+
+
+def test_decode_complex_property():
+    ifc = ifcopenshell.file(schema='IFC4')
+    prop = ifc.create_entity('IfcComplexProperty', 'MaterialProperty', None, 'Zone1', [
+        ifc.create_entity('IfcPropertySingleValue', 'rho', None,
+                          ifc.create_entity('IfcReal', 2760.)),
+        ifc.create_entity('IfcPropertyListValue', 'DT', None,
+                          [ifc.create_entity('IfcReal', x) for x in [1., 2., 3.]])])
+    assert decode_complex_property(prop) == {'rho': 2760., 'DT': [1., 2., 3.]}
+    prop.HasProperties = prop.HasProperties + (ifc.create_entity(
+        'IfcPropertyEnumeratedValue', 'matType', None, [ifc.create_entity('IfcLabel', 'a')]),)
+    with pytest.raises(ValueError, match='IfcPropertyEnumeratedValue matType'):
+        decode_complex_property(prop)
+
+
+def test_convert_conditions(synthetic_model, tmp_path):
+    file_path = synthetic_model('synthetic.ifc', 30, zones=3, seed=5, properties=True)
+    ifc = ifcopenshell.open(str(file_path))
+    files = convert(ifc, tmp_path / 'fenia')
+    assert files == ['constant/T', 'constant/termProperty']
+    reference = reference_conditions(ifc)
+    bcs = foam.load(tmp_path / 'fenia' / 'constant' / 'T', start_from=0)
+    assert set(bcs) == {'FeniaFile'} | set(reference['BoundaryCondition'])
+    mats = foam.load(tmp_path / 'fenia' / 'constant' / 'termProperty', start_from=0)
+    assert set(mats) == {'FeniaFile', 'noZone'} | set(reference['MaterialProperty'])
+    for zone, values in reference['MaterialProperty'].items():
+        ic = reference['InitialCondition'][zone]
+        assert mats[zone]['rho'] == pytest.approx(values['rho'])
+        assert mats[zone]['DT'] == f'({" ".join([str(values["DT"])] * 3)})'
+        assert mats[zone]['inZoneTemperature'] == pytest.approx(ic['inZoneTemperature'])
+        assert 'type' not in mats[zone]
+
+
+def test_conditions_many_zones(synthetic_model, zones=2000):
+    file_path = synthetic_model('synthetic.ifc', 10, zones=zones, seed=6, properties=True)
+    ifc = ifcopenshell.open(str(file_path))
+    conditions = get_fenia_conditions(ifc, Inventory(ifc))
+    assert conditions == reference_conditions(ifc)
+    assert len(conditions['InitialCondition']) == zones
@@ -0,0 +1,105 @@
+import io
+
+import numpy as np
+import pytest
+
+from ifc2fenia import fields, foam
+from ifc2fenia.main import main as fenia_main
+
+
+def test_cell_values():
+    zones = {'Zone1': np.array([0, 2]), 'Zone2': np.array([1, 2, 4]), 'Zone3': np.array([], int)}
+    ids = fields.cell_zones(zones, 6)
+    assert ids.dtype == np.int32 and ids.tolist() == [0, 1, 1, -1, 1, -1]
+    assert fields.cell_zones(zones).tolist() == [0, 1, 1, -1, 1]
+    names = list(zones)
+    v = fields.cell_values(ids, names, {'Zone1': 10., 'Zone2': 20.}, default=0.)
+    assert v.tolist() == [10., 20., 20., 0., 20., 0.]
+    v = fields.cell_values(ids, names, {'Zone1': [1., 2., 3.], 'Zone2': [4., 5., 6.]},
+                           default=[0., 0., 0.])
+    assert v.shape == (6, 3) and v[1].tolist() == [4., 5., 6.] and v[3].tolist() == [0.] * 3
+    v = fields.cell_values(ids[[0, 1]], names, {'Zone1': 10., 'Zone2': 20.})
+    assert v.tolist() == [10., 20.]  # unused Zone3 and cells without zone
+    with pytest.raises(ValueError, match='without zone'):
+        fields.cell_values(ids, names, {'Zone1': 10., 'Zone2': 20.})
+    with pytest.raises(ValueError, match='Zone2'):
+        fields.cell_values(ids[:2], names, {'Zone1': 10.})
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_write_fields(tmp_path, binary):
+    zones = {'Zone1': np.arange(0, 10, 2), 'Zone2': np.arange(1, 10, 2)}
+    values = {'Zone1': {'inZoneTemperature': 300., 'qW': 1.5, 'DT': [1., 2., 3.]},
+              'Zone2': {'inZoneTemperature': 350., 'DT': [4., 5., 6.]},
+              'noZone': {'rho': 2760.}}
+    boundary = {'walls': {'type': 'wall', 'nFaces': 4, 'startFace': 20},
+                'top': {'type': 'patch', 'nFaces': 2, 'startFace': 24}}
+    files = fields.write_fields(zones, values, tmp_path, binary=binary,
+                                fields={'T': 'inZoneTemperature', 'qW': 'qW', 'DT': 'DT',
+                                        'rho': 'rho'}, boundary=boundary)
+    assert files == ['0/T', '0/qW', '0/DT']  # no rho of zones
+    t = foam.load(tmp_path / '0' / 'T', 'scalarField')
+    assert t.tolist() == [300., 350.] * 5
+    q = foam.load(tmp_path / '0' / 'qW', 'scalarField')
+    assert q.tolist() == [1.5, 0.] * 5
+    dt = foam.load(tmp_path / '0' / 'DT', 'vectorField')
+    assert dt.shape == (10, 3) and dt[1].tolist() == [4., 5., 6.]
+    assert 'volScalarField' in (tmp_path / '0' / 'T').read_bytes().decode(errors='ignore')
+    for name, dimensions in [('T', '[0 0 0 1 0 0 0]'), ('qW', '[1 -1 -3 0 0 0 0]'),
+                             ('DT', '[0 0 0 0 0 0 0]')]:
+        text = (tmp_path / '0' / name).read_bytes().decode(errors='ignore')
+        assert f'dimensions {dimensions};' in text
+        boundary_field = text[text.index('boundaryField'):]
+        assert foam.load(io.StringIO(boundary_field), start_from=0) == {
+            'boundaryField': {'walls': {'type': 'zeroGradient'},
+                              'top': {'type': 'zeroGradient'}}}
+
+
+def random_zones(n, n_zones, seed=15):
+    """Zones of n cells and their values"""
+    rng = np.random.default_rng(seed)
+    labels = rng.permutation(n)
+    zones = {f'Zone{i + 1}': x for i, x in enumerate(np.array_split(labels, n_zones))}
+    values = {x: float(rng.uniform(273., 373.)) for x in zones}
+    return zones, values
+
+
+def cell_values_reference(zones, values, n):
+    """Cell by cell values of zones"""
+    reference = [0.] * n
+    for name, cells in zones.items():
+        for cell in cells.tolist():
+            reference[cell] = values[name]
+    return reference
+
+
+def test_cell_values_large(n=1000000, n_zones=100):
+    zones, values = random_zones(n, n_zones)
+    v = fields.cell_values(fields.cell_zones(zones, n), list(zones), values)
+    assert v.tolist() == cell_values_reference(zones, values, n)
+
+
+def test_convert_fields(synthetic_model, tmp_path, n_cells=1000):
+    file_path = synthetic_model('synthetic.ifc', 30, zones=3, seed=8, properties=True)
+    mesh_path = tmp_path / 'polyMesh'
+    mesh_path.mkdir()
+    foam.dump(np.arange(n_cells), mesh_path / 'owner', 'labelList',
+              header={'FoamFile': {'version': 2.0, 'class': 'labelList', 'object': 'owner'}})
+    zones = {f'Zone{i + 1}': np.arange(i, n_cells, 3) for i in range(3)}
+    foam.dump(zones, mesh_path / 'cellZones', 'cellZoneList',
+              header={'FoamFile': {'version': 2.0, 'class': 'regIOobject',
+                                   'object': 'cellZones'}})
+    foam.dump({'outside': {'type': 'wall', 'nFaces': 0, 'startFace': 0}},
+              mesh_path / 'boundary', 'polyBoundaryMesh',
+              header={'FoamFile': {'version': 2.0, 'class': 'polyBoundaryMesh',
+                                   'object': 'boundary'}})
+    fenia_main(file_path, tmp_path / 'fenia', mesh_path=mesh_path, binary=True)
+    termProperty = foam.load(tmp_path / 'fenia' / 'constant' / 'termProperty', start_from=0)
+    for name in ['T', 'qW']:
+        v = foam.load(tmp_path / 'fenia' / '0' / name, 'scalarField')
+        key = fields.FIELDS[name]
+        assert v.shape == (n_cells,)
+        for zone, labels in zones.items():
+            assert np.all(v[labels] == termProperty[zone][key])
+        text = (tmp_path / 'fenia' / '0' / name).read_bytes().decode(errors='ignore')
+        assert 'outside\n{\ntype zeroGradient;\n}' in text
@@ -0,0 +1,597 @@
+import gzip
+import io
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ifc2fenia import foam
+
+BANNER = r"""/*--------------------------------*- C++ -*----------------------------------*\
+| =========                 |                                                 |
+| \\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |
+|  \\    /   O peration     | Version:  v2006                                 |
+|   \\  /    A nd           | Website:  www.openfoam.com                      |
+|    \\/     M anipulation  |                                                 |
+\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+"""
+
+
+def field_text(values, cls='scalarField', uniform=False):
+    text = BANNER + f'    class       {cls};\n    object      T;\n}}\n' \
+                    f'// * * * * * * * * * * * * * * * * * * * * * * * //\n\n'
+    values = np.asarray(values)
+    if uniform:
+        v = values if values.ndim == 0 else f'({" ".join(str(x) for x in values)})'
+        return text + f'internalField uniform {v};\n'
+    text += f'{len(values)}\n(\n'
+    if values.ndim == 1:
+        text += '\n'.join(repr(float(x)) for x in values)
+    else:
+        text += '\n'.join(f'({" ".join(repr(float(y)) for y in x)})' for x in values)
+    return text + '\n)\n'
+
+
+def load_reference(f, cls):
+    """Previous token by token parser of fields"""
+    for _ in range(12):
+        next(f)
+    d = []
+    for line in foam.read(f):
+        if 'nonuniform' in line or not 'uniform' in line:
+            line = line.replace('(', ' ').replace(')', ' ')
+            for t in line.split():
+                if foam.is_float(t):
+                    d.append(float(t))
+        else:
+            d.append(1)
+            d.append(float(line.split()[2][:-1]))
+    d = d[1:]
+    if cls in ['vectorList', 'vectorField']:
+        d = [d[x:x + 3] for x in range(0, len(d), 3)]
+    return d
+
+
+@pytest.mark.parametrize('cls, shape', [('scalarField', (1000,)),
+                                        ('vectorField', (1000, 3)),
+                                        ('vectorList', (1000, 3)),
+                                        ('scalarField', (0,)),
+                                        ('vectorField', (0, 3))])
+def test_field(cls, shape):
+    values = np.random.default_rng(0).normal(size=shape) * 1e3
+    text = field_text(values, cls)
+    d = foam.load(io.StringIO(text), cls)
+    assert d.dtype == np.float64
+    assert d.shape == shape
+    assert np.array_equal(d, values)
+    assert np.array_equal(d, np.array(load_reference(io.StringIO(text), cls)).reshape(shape))
+
+
+def test_uniform_and_inline():
+    text = field_text(np.array(300.), uniform=True)
+    assert foam.load(io.StringIO(text), 'scalarField').tolist() == [300.]
+    assert load_reference(io.StringIO(text), 'scalarField') == [300.]
+    text = field_text(np.array([1., 2., 3.]), 'vectorField', uniform=True)
+    assert foam.load(io.StringIO(text), 'vectorField').tolist() == [[1., 2., 3.]]
+    text = BANNER + '    class       scalarField;\n}\n3(1 2 /* inline */ 3) // end\n'
+    assert foam.load(io.StringIO(text), 'scalarField').tolist() == [1., 2., 3.]
+    text = BANNER + '    class       scalarField;\n}\n3(1 2)\n'
+    with pytest.raises(ValueError):
+        foam.load(io.StringIO(text), 'scalarField')
+
+
+def test_large(n=200000):
+    values = np.random.default_rng(1).random((n, 3))
+    text = field_text(values, 'vectorField')
+    d = foam.load(io.StringIO(text), 'vectorField')
+    assert np.array_equal(d, values)
+
+
+@pytest.mark.parametrize('cls, shape', [('scalarField', (10001,)),
+                                        ('vectorField', (3001, 3)),
+                                        ('scalarField', (0,))])
+@pytest.mark.parametrize('block_size', [1, 100, foam.BLOCK_SIZE])
+def test_iter_field(tmp_path, monkeypatch, cls, shape, block_size):
+    monkeypatch.setattr(foam, 'BLOCK_SIZE', block_size)
+    values = np.random.default_rng(2).normal(size=shape)
+    path = tmp_path / 'T'
+    path.write_text(field_text(values, cls))
+    chunks = list(foam.iter_field(path, cls, chunk_size=1000))
+    assert all(x.shape[0] == 1000 for x in chunks[:-1])
+    assert all(x.shape[1:] == shape[1:] for x in chunks)
+    d = np.concatenate(chunks) if len(chunks) > 0 else np.empty(shape)
+    assert np.array_equal(d, values)
+
+
+@pytest.mark.parametrize('block_size', [1, 7, foam.BLOCK_SIZE])
+def test_iter_field_comments(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(foam, 'BLOCK_SIZE', block_size)
+    path = tmp_path / 'T'
+    path.write_text(BANNER + '    class       scalarField;\n}\n// 2 (\n'
+                             '5(1 2 /* 4 ( block\n 7 */ 3 4 // 8 9\n 5) // end\n'
+                             'boundaryField { wall { type fixedValue; value uniform 3; } }\n')
+    chunks = list(foam.iter_field(path, chunk_size=2))
+    assert [x.tolist() for x in chunks] == [[1., 2.], [3., 4.], [5.]]
+    path.write_text(field_text(np.array([1., 2., 3.]), 'vectorField', uniform=True))
+    assert [x.tolist() for x in foam.iter_field(path, 'vectorField')] == [[[1., 2., 3.]]]
+    path.write_text(BANNER + '    class       scalarField;\n}\n3(1 2)\n')
+    with pytest.raises(ValueError):
+        list(foam.iter_field(path))
+
+
+def test_iter_field_memory(tmp_path, monkeypatch, n=300000):
+    monkeypatch.setattr(foam, 'BLOCK_SIZE', 1 << 16)
+    values = np.random.default_rng(3).random((n, 3))
+    path = tmp_path / 'U'
+    path.write_text(field_text(values, 'vectorField'))
+    tracemalloc.start()
+    low, high, total = np.inf, -np.inf, np.zeros(3)
+    for chunk in foam.iter_field(path, 'vectorField', chunk_size=4096):
+        low, high = min(low, chunk.min()), max(high, chunk.max())
+        total += chunk.sum(axis=0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'file: {path.stat().st_size / 2 ** 20:.1f}MB, peak: {peak / 2 ** 20:.1f}MB')
+    assert low == values.min() and high == values.max()
+    assert np.allclose(total, values.sum(axis=0))
+    assert peak < path.stat().st_size / 10
+
+
+def header(cls, name='T'):
+    return {'FoamFile': {'version': 2.0, 'format': 'ascii', 'class': cls, 'object': name}}
+
+
+@pytest.mark.parametrize('cls, shape', [('scalarField', (1000,)),
+                                        ('vectorField', (1000, 3)),
+                                        ('labelList', (1000,)),
+                                        ('vectorField', (0, 3))])
+def test_binary(tmp_path, cls, shape):
+    rng = np.random.default_rng(4)
+    values = rng.integers(0, 1 << 20, shape) if cls == 'labelList' else rng.normal(size=shape)
+    path = tmp_path / 'T'
+    with open(path, 'wb') as f:
+        foam.dump(values, f, cls, binary=True, header=header(cls))
+    with open(path, 'rb') as f:
+        text = f.read(1000)
+    assert b'format binary;' in text and b'arch "LSB;label=32;scalar=64";' in text
+    with open(path, 'rb') as f:
+        d = foam.load(f, cls, start_from=3)
+    assert d.dtype == (np.int32 if cls == 'labelList' else np.float64)
+    assert d.shape == shape
+    assert np.array_equal(d, values)
+    chunks = list(foam.iter_field(path, cls, chunk_size=300, start_from=3))
+    assert [len(x) for x in chunks] == [300, 300, 300, 100][:len(chunks)]
+    d = np.concatenate(chunks) if len(chunks) > 0 else np.empty(shape)
+    assert np.array_equal(d, values)
+
+
+def test_binary_arch_and_errors(tmp_path):
+    path = tmp_path / 'T'
+    path.write_bytes(b'FoamFile\n{\n    format binary;\n    arch "MSB;label=64;scalar=32";\n}\n'
+                     b'3(' + np.array([1., 2., 3.], '>f4').tobytes() + b')\n')
+    with open(path, 'rb') as f:
+        d = foam.load(f, 'scalarField', start_from=2)
+    assert d.dtype == np.float32 and d.tolist() == [1., 2., 3.]
+    assert [x.tolist() for x in foam.iter_field(path, start_from=2)] == [[1., 2., 3.]]
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        with open(path, 'rb') as f:
+            foam.load(f, 'scalarField', start_from=2)
+    with pytest.raises(ValueError):
+        list(foam.iter_field(path, start_from=2))
+    path.write_text(field_text(np.arange(5.), 'scalarField'))  # ascii in binary mode
+    with open(path, 'rb') as f:
+        assert foam.load(f, 'scalarField').tolist() == [0., 1., 2., 3., 4.]
+
+
+def test_binary_size(tmp_path, n=500000):
+    values = np.random.default_rng(5).random((n, 3))
+    ascii_path, binary_path = tmp_path / 'U.ascii', tmp_path / 'U.binary'
+    ascii_path.write_text(field_text(values, 'vectorField'))
+    with open(binary_path, 'wb') as f:
+        foam.dump(values, f, 'vectorField', binary=True, header=header('vectorField', 'U'))
+    with open(binary_path, 'rb') as f:
+        d = foam.load(f, 'vectorField', start_from=3)
+    ratio = binary_path.stat().st_size / ascii_path.stat().st_size
+    print(f'size ratio: {ratio:.2f}')
+    assert np.array_equal(d, values)
+    assert ratio < 0.5
+
+
+@pytest.mark.parametrize('cls, shape', [('scalarField', (1000,)),
+                                        ('vectorField', (1000, 3)),
+                                        ('labelList', (1000,)),
+                                        ('scalarField', (0,))])
+@pytest.mark.parametrize('name', [None, 'internalField'])
+def test_dump_ascii(cls, shape, name):
+    rng = np.random.default_rng(6)
+    values = rng.integers(0, 1 << 20, shape) if cls == 'labelList' else rng.normal(size=shape)
+    f = io.StringIO()
+    foam.dump(values, f, cls, header=header(cls), name=name)
+    text = f.getvalue()
+    assert 'format ascii;' in text
+    if name is not None:
+        assert f'{name} nonuniform List<{foam.FIELD_TYPES[cls]}> {shape[0]}\n(\n' in text
+        assert text.endswith(');\n')
+    d = foam.load(io.StringIO(text), cls, start_from=3)
+    assert d.shape == shape
+    assert np.array_equal(d, values)
+
+
+def test_dump_ascii_format():
+    values = np.random.default_rng(7).choice([293.15, 300., 0.1], 5000)  # values of zones
+    f = io.StringIO()
+    foam.dump(values, f, 'scalarField')
+    lines = ''.join(repr(x) + '\n' for x in values.tolist())
+    assert f.getvalue() == f'5000\n(\n{lines})\n'
+    f = io.StringIO()
+    foam.dump(np.array([[293.15, 0.1, 300.]]), f, 'vectorField', precision=3)
+    assert f.getvalue() == '1\n(\n(293 0.1 300)\n)\n'
+    f = io.BytesIO()
+    foam.dump(np.array([1., 2.]), f, 'scalarField', name='internalField')
+    assert f.getvalue() == b'internalField nonuniform List<scalar> 2\n(\n1.0\n2.0\n);\n'
+    with pytest.raises(ValueError):
+        foam.dump(np.zeros((2, 2)), io.StringIO(), 'vectorField')
+
+
+def dump_reference(values, f):
+    """Line by line writer of vectorField"""
+    f.write(f'{len(values)}\n(\n')
+    for x in values.tolist():
+        f.write(f'({x[0]!r} {x[1]!r} {x[2]!r})\n')
+    f.write(')\n')
+
+
+def test_dump_ascii_large(n=200000):
+    zones = np.random.default_rng(8).random((100, 3))
+    values = zones[np.random.default_rng(9).integers(0, len(zones), n)]  # values of zones
+    f = io.StringIO()
+    foam.dump(values, f, 'vectorField')
+    g = io.StringIO()
+    dump_reference(values, g)
+    assert f.getvalue() == g.getvalue(), 'texts differ'
+
+
+def load_object_reference(f, name=None):
+    """Previous line by line parser of dictionaries"""
+    kvs = {}
+    for line in foam.read(f):
+        line = line.replace(';', '')
+        ts = line.split()
+        k, vs = ts[0], ts[1:]
+        if len(vs) == 0:
+            if k == '{':
+                continue
+            elif k == '}':
+                break
+            elif name is None and len(kvs) == 0:
+                name = k
+            else:
+                sub_name, sub_kvs = load_object_reference(f, k)
+                kvs[sub_name] = sub_kvs
+        else:
+            if len(vs) > 1:
+                if vs[0].startswith('('):
+                    v = ' '.join(vs)
+                else:
+                    k = ' '.join([k] + vs[:-1])
+                    v = vs[-1]
+            else:
+                v = vs[0]
+            if v in ['off', 'false']:
+                kvs[k] = False
+            elif v in ['on', 'true']:
+                kvs[k] = True
+            elif v.isnumeric():
+                kvs[k] = int(v)
+            elif foam.is_float(v):
+                kvs[k] = float(v)
+            else:
+                kvs[k] = v
+    return name, kvs
+
+
+def load_dictionary_reference(f):
+    d = {}
+    name, kvs = load_object_reference(f)
+    while name is not None or len(kvs) > 0:
+        d[name] = kvs
+        name, kvs = load_object_reference(f)
+    return d
+
+
+def dictionary_text(n):
+    """Text of dictionary with n patches"""
+    d = {'FeniaFile': {'version': 2.0, 'format': 'ascii', 'class': 'dictionary',
+                       'location': 'const', 'object': 'condition'}}
+    for i in range(n):
+        d[f'patch_{i}'] = {'type': 'timeValueTr', 'timeValueTr const': 273.15 + i,
+                           'DT': [1.5, 1.5, 2.5], 'flag': 'on', 'n': i, 'x': -1.5e-3,
+                           'sub': {'a': 'b', 'deep': {'y': 'off'}}}
+    f = io.StringIO()
+    foam.dump(d, f)
+    return f.getvalue()
+
+
+def test_dictionary(tmp_path, n=10000):
+    text = dictionary_text(n)
+    result = foam.load(io.StringIO(text), start_from=0)
+    reference = load_dictionary_reference(io.StringIO(text))
+    assert result == reference
+    assert result['patch_1'] == {'type': 'timeValueTr', 'timeValueTr const': 274.15,
+                                 'DT': '(1.5 1.5 2.5)', 'flag': True, 'n': 1, 'x': -1.5e-3,
+                                 'sub': {'a': 'b', 'deep': {'y': False}}}
+    # File in binary mode
+    assert foam.load(io.BytesIO(text.encode()), start_from=0) == result
+    path = tmp_path / 'condition'
+    path.write_text(text)
+    with open(path, 'rb') as f:
+        assert foam.load(f, 'dictionary', start_from=0) == result
+
+
+def test_dictionary_syntax(tmp_path):
+    (tmp_path / 'include').mkdir()
+    (tmp_path / 'include' / 'common').write_text('rho 2760;\n#include "nested"\n')
+    (tmp_path / 'include' / 'nested').write_text('cHeat 800;\n')
+    path = tmp_path / 'termProperty'
+    path.write_text('''/* header */
+zone_1 { matType constProp; DT ( 1.5
+  1.5 1.5 ); #include "include/common"
+  #includeIfPresent "missing"
+}
+"zone_(2|3)" // regex key
+{
+    value uniform (0 0 0); dimensions [0 0 0 1 0 0 0];
+    name "quoted; value";
+    #inputMode merge
+}
+''')
+    with open(path) as f:
+        d = foam.load(f, start_from=0)
+    assert d == {'zone_1': {'matType': 'constProp', 'DT': '( 1.5 1.5 1.5 )', 'rho': 2760,
+                            'cHeat': 800},
+                 '"zone_(2|3)"': {'value': 'uniform (0 0 0)',
+                                  'dimensions': '[0 0 0 1 0 0 0]',
+                                  'name': '"quoted; value"', '#inputMode': 'merge'}}
+    assert foam.lookup(d, 'zone_1')['rho'] == 2760
+    assert foam.lookup(d, 'zone_3')['value'] == 'uniform (0 0 0)'
+    assert foam.lookup(d, 'zone_4') is None
+    (tmp_path / 'include' / 'nested').write_text('#include "common"\n')
+    with pytest.raises(ValueError):
+        with open(path) as f:
+            foam.load(f, start_from=0)
+    depth = 5000  # over recursion limit
+    d = foam.load(io.StringIO('a { ' * depth + 'x 1; ' + '} ' * depth), start_from=0)
+    for _ in range(depth):
+        d = d['a']
+    assert d == {'x': 1}
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_gzip(tmp_path, binary):
+    values = np.random.default_rng(10).normal(size=(1000, 3))
+    path = tmp_path / 'U.gz'
+    foam.dump(values, path, 'vectorField', binary=binary, header=header('vectorField', 'U'))
+    with open(path, 'rb') as f:
+        assert f.read(2) == foam.GZIP_MAGIC
+    assert np.array_equal(foam.load(path, 'vectorField', start_from=3), values)
+    with open(path, 'rb') as f:
+        assert np.array_equal(foam.load(f, 'vectorField', start_from=3), values)
+    if not binary:
+        with open(path) as f:
+            assert np.array_equal(foam.load(f, 'vectorField', start_from=3), values)
+        f = io.BytesIO(gzip.compress(path.read_bytes()))
+        assert np.array_equal(foam.load(io.BytesIO(gzip.decompress(f.getvalue())),
+                                        'vectorField', start_from=3), values)
+    chunks = list(foam.iter_field(path, 'vectorField', chunk_size=300, start_from=3))
+    assert np.array_equal(np.concatenate(chunks), values)
+    plain_path = tmp_path / 'U'
+    foam.dump(values, plain_path, 'vectorField', binary=binary,
+              header=header('vectorField', 'U'), compress=False)
+    with open(plain_path, 'rb') as f:
+        assert f.read(2) != foam.GZIP_MAGIC
+    assert np.array_equal(foam.load(plain_path, 'vectorField', start_from=3), values)
+
+
+def test_gzip_dictionary(tmp_path):
+    d = {'FeniaFile': {'version': 2.0, 'format': 'ascii', 'class': 'dictionary'},
+         'zone': {'DT': [1.5, 1.5, 1.5], 'rho': 2760.0}}
+    path = tmp_path / 'termProperty'
+    foam.dump(d, path, compress=True)
+    with open(path, 'rb') as f:
+        assert f.read(2) == foam.GZIP_MAGIC
+    assert foam.load(path, start_from=0)['zone'] == {'DT': '(1.5 1.5 1.5)', 'rho': 2760.0}
+    with open(path) as f:
+        assert foam.load(f, start_from=0)['zone']['rho'] == 2760.0
+
+
+@pytest.mark.parametrize('block_size', [1, 100, foam.BLOCK_SIZE])
+def test_gzip_iter_field(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(foam, 'BLOCK_SIZE', block_size)
+    values = np.random.default_rng(11).normal(size=(3001, 3))
+    path = tmp_path / 'U.gz'
+    path.write_bytes(gzip.compress(field_text(values, 'vectorField').encode()))
+    chunks = list(foam.iter_field(path, 'vectorField', chunk_size=1000))
+    assert [len(x) for x in chunks] == [1000, 1000, 1000, 1]
+    assert np.array_equal(np.concatenate(chunks), values)
+
+
+def test_gzip_memory(tmp_path, monkeypatch, n=300000):
+    monkeypatch.setattr(foam, 'BLOCK_SIZE', 1 << 16)
+    values = np.random.default_rng(12).random(n)
+    path = tmp_path / 'T.gz'
+    foam.dump(values, path, 'scalarField')
+    tracemalloc.start()
+    total = sum(x.sum() for x in foam.iter_field(path, chunk_size=4096, start_from=0))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'values: {values.nbytes / 2 ** 20:.1f}MB, peak: {peak / 2 ** 20:.1f}MB')
+    assert np.isclose(total, values.sum())
+    assert peak < values.nbytes / 2
+
+
+def write_case(case_path, n_times=8, n=2000):
+    """Case with uniform T in 0 and ascii, binary and compressed T later"""
+    rng = np.random.default_rng(13)
+    for x in ['constant', 'system', '0.orig']:
+        (case_path / x).mkdir(parents=True)
+    (case_path / '0').mkdir()
+    (case_path / '0' / 'T').write_text(field_text(np.array(300.), uniform=True))
+    times, values = [0.], [np.full(n, 300.)]
+    for i in range(1, n_times):
+        time_path = case_path / f'{i * 0.5:g}'
+        time_path.mkdir()
+        v = rng.normal(size=n)
+        if i % 3 == 0:
+            foam.dump(v, time_path / 'T.gz', 'scalarField', header=header('scalarField'))
+        elif i % 3 == 1:
+            foam.dump(v, time_path / 'T', 'scalarField', binary=True,
+                      header=header('scalarField'))
+        else:
+            foam.dump(v, time_path / 'T', 'scalarField', header=header('scalarField'))
+        times.append(i * 0.5)
+        values.append(v)
+    return np.array(times), np.stack(values)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('scratch', [False, True])
+def test_load_time_series(tmp_path, workers, scratch):
+    times, values = write_case(tmp_path / 'case')
+    assert [t for t, _ in foam.time_directories(tmp_path / 'case')] == times.tolist()
+    output_path = tmp_path / 'T.npy' if scratch else None
+    t, d = foam.load_time_series(tmp_path / 'case', 'T', start_from=3, workers=workers,
+                                 output_path=output_path)
+    assert np.array_equal(t, times)
+    assert d.shape == values.shape
+    assert np.array_equal(d, values)
+    if scratch:
+        assert isinstance(d, np.memmap)
+        assert np.array_equal(np.load(output_path), values)
+    t, d = foam.load_time_series(tmp_path / 'case', 'T', start_from=3, times=[0.5, 1.5],
+                                 workers=workers)
+    assert t.tolist() == [0.5, 1.5]
+    assert np.array_equal(d, values[[1, 3]])
+    with pytest.raises(FileNotFoundError):
+        foam.load_time_series(tmp_path / 'case', 'U')
+
+
+def mesh_header(cls, name, binary=False):
+    text = BANNER.replace('ascii', 'binary') if binary else BANNER
+    text += f'    class       {cls};\n'
+    if binary:
+        text += '    arch        "LSB;label=32;scalar=64";\n'
+    return text + f'    object      {name};\n}}\n// * * * * * * * * * * * * * * * * //\n\n'
+
+
+def labels_text(labels, binary=False):
+    if binary:
+        return f'{len(labels)}\n('.encode() + np.asarray(labels, '<i4').tobytes() + b')'
+    return f'{len(labels)}\n(\n{" ".join(str(x) for x in labels)}\n)'.encode()
+
+
+def write_mesh(mesh_path, binary=False, n_faces=1000, n_points=500, n_cells=300):
+    """polyMesh of random faces of 3 to 6 points and zones, as written by OpenFOAM"""
+    rng = np.random.default_rng(14)
+    mesh_path.mkdir(parents=True)
+    sizes = rng.integers(3, 7, n_faces)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    mesh = {'points': rng.normal(size=(n_points, 3)),
+            'offsets': offsets, 'faces': rng.integers(0, n_points, offsets[-1]),
+            'owner': rng.integers(0, n_cells, n_faces),
+            'neighbour': rng.integers(0, n_cells, n_faces // 2),
+            'cellZones': {'air': np.arange(0, n_cells, 2), 'concrete': np.arange(1, 10),
+                          'empty': np.empty(0, int)}}
+    foam.dump(mesh['points'], mesh_path / 'points', 'vectorField', binary=binary,
+              header=header('vectorField', 'points'))
+    for name in ['owner', 'neighbour']:
+        foam.dump(mesh[name], mesh_path / name, 'labelList', binary=binary,
+                  header=header('labelList', name))
+    with open(mesh_path / 'faces', 'wb') as f:
+        if binary:
+            f.write(mesh_header('faceCompactList', 'faces', binary).encode())
+            f.write(labels_text(offsets, binary) + b'\n\n' + labels_text(mesh['faces'], binary))
+        else:
+            f.write(mesh_header('faceList', 'faces').encode())
+            f.write(f'{n_faces}\n(\n'.encode())
+            for i, j in zip(offsets[:-1], offsets[1:]):
+                f.write(f'{j - i}({" ".join(str(x) for x in mesh["faces"][i:j])})\n'.encode())
+            f.write(b')\n')
+        f.write(b'\n\n// ************************************************** //\n')
+    with open(mesh_path / 'cellZones', 'wb') as f:
+        f.write(mesh_header('regIOobject', 'cellZones', binary).encode())
+        f.write(f'{len(mesh["cellZones"])}\n(\n'.encode())
+        for name, labels in mesh['cellZones'].items():
+            f.write(f'{name}\n{{\n    type cellZone;\n\ncellLabels      List<label> '.encode())
+            f.write(labels_text(labels, binary) + b'\n;\n}\n\n')
+        f.write(b')\n\n// ************************************************** //\n')
+    return mesh
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_mesh(tmp_path, binary):
+    mesh = write_mesh(tmp_path / 'polyMesh', binary)
+    d = foam.load_mesh(tmp_path / 'polyMesh', start_from=3)
+    assert list(d) == list(mesh)[:-1] + ['boundary', 'cellZones'] and d['boundary'] == {}
+    for name in ['offsets', 'faces', 'owner', 'neighbour']:
+        assert d[name].dtype == np.int32
+        assert np.array_equal(d[name], mesh[name]), name
+    assert np.array_equal(d['points'], mesh['points'])
+    assert list(d['cellZones']) == list(mesh['cellZones'])
+    for name, labels in mesh['cellZones'].items():
+        assert d['cellZones'][name].dtype == np.int32
+        assert np.array_equal(d['cellZones'][name], labels)
+    (tmp_path / 'polyMesh' / 'cellZones').unlink()
+    assert foam.load_mesh(tmp_path / 'polyMesh', start_from=3)['cellZones'] == {}
+
+
+def test_faces_errors():
+    text = mesh_header('faceList', 'faces')
+    offsets, faces = foam.load(io.StringIO(text + '0()\n'), 'faceList')
+    assert offsets.tolist() == [0] and faces.size == 0
+    offsets, faces = foam.load(io.StringIO(text + '2(3(0 1 2) /* quad */ 4(2 3 4 5))'), 'faceList')
+    assert offsets.tolist() == [0, 3, 7] and faces.tolist() == [0, 1, 2, 2, 3, 4, 5]
+    for body in ['2(3(0 1 2))', '2(3(0 1 2) 4(2 3 4))', '1(3(0 1 2)']:
+        with pytest.raises(ValueError):
+            foam.load(io.StringIO(text + body), 'faceList')
+
+
+def load_faces_reference(path):
+    """Face by face parser of faceList"""
+    reference = []
+    with open(path) as f:
+        for line in foam.read(f):
+            if '(' in line and line[0] != '(':
+                reference.append([int(x) for x in line[line.index('(') + 1:-1].split()])
+    return reference
+
+
+def test_faces_large(tmp_path, n=200000):
+    mesh = write_mesh(tmp_path / 'polyMesh', n_faces=n)
+    offsets, faces = foam.load(tmp_path / 'polyMesh' / 'faces', 'faceList')
+    assert np.array_equal(offsets, mesh['offsets']) and np.array_equal(faces, mesh['faces'])
+    reference = load_faces_reference(tmp_path / 'polyMesh' / 'faces')
+    assert len(reference) == n
+    assert reference[-1] == faces[offsets[-2]:].tolist()
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_dump_mesh(tmp_path, binary):
+    mesh = write_mesh(tmp_path / 'polyMesh')
+    mesh['boundary'] = {'wall': {'type': 'wall', 'nFaces': 400, 'startFace': 500},
+                        'defaultFaces': {'type': 'patch', 'nFaces': 100, 'startFace': 900}}
+    paths = foam.dump_mesh(mesh, tmp_path / 'output', binary, header_name='FeniaFile')
+    assert [x.name for x in paths] == ['points', 'faces', 'owner', 'neighbour', 'boundary',
+                                       'cellZones']
+    assert (b'faceCompactList' if binary else b'faceList') in paths[1].read_bytes()
+    d = foam.load_mesh(tmp_path / 'output')
+    assert list(d) == list(mesh)[:-2] + ['boundary', 'cellZones']
+    for name in ['points', 'offsets', 'faces', 'owner', 'neighbour']:
+        assert np.array_equal(d[name], mesh[name]), name
+    assert d['boundary'] == mesh['boundary']
+    assert all(np.array_equal(d['cellZones'][k], v) for k, v in mesh['cellZones'].items())
+    assert 'nCells:300' in paths[2].read_text(errors='ignore')
@@ -0,0 +1,257 @@
+import struct
+
+import numpy as np
+import pytest
+
+from ifc2fenia import fields, foam, msh
+from ifc2fenia.case import FoamCase
+from ifc2fenia.main import main as fenia_main
+
+
+def box_mesh(n=4, hexahedra=False):
+    """Cube of n^3 cubes split to 6 tetrahedra each (of both orientations)
+
+    Returns:
+        tuple: points, tags of nodes, cells, surfaces (triangles or
+            quadrangles at x = 0)
+    """
+    grid = np.stack(np.meshgrid(*[np.arange(n + 1.)] * 3, indexing='ij'), -1).reshape(-1, 3)
+    ids = np.arange(len(grid)).reshape(n + 1, n + 1, n + 1)
+    i, j, k = [x.ravel() for x in np.meshgrid(*[np.arange(n)] * 3, indexing='ij')]
+    corners = np.stack([ids[i + a, j + b, k + c] for a, b, c in np.ndindex(2, 2, 2)], -1)
+    if hexahedra:
+        cells = corners[:, [0, 4, 6, 2, 1, 5, 7, 3]]  # 0-3 at z, 4-7 at z + 1
+        y, z = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+        y, z = y.ravel(), z.ravel()
+        surfaces = np.stack([ids[0, y, z], ids[0, y + 1, z], ids[0, y + 1, z + 1],
+                             ids[0, y, z + 1]], -1)
+    else:
+        cells = []  # Kuhn triangulation, all tetrahedra share diagonal 0-7
+        for a, b, c in [(4, 6, 7), (4, 5, 7), (2, 6, 7), (2, 3, 7), (1, 5, 7), (1, 3, 7)]:
+            cells.append(corners[:, [0, a, b, c]])
+        cells = np.stack(cells, 1).reshape(-1, 4)
+        y, z = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+        y, z = y.ravel(), z.ravel()
+        surfaces = np.concatenate([
+            np.stack([ids[0, y, z], ids[0, y + 1, z], ids[0, y + 1, z + 1]], -1),
+            np.stack([ids[0, y, z], ids[0, y, z + 1], ids[0, y + 1, z + 1]], -1)])
+    return grid, cells, surfaces
+
+
+def write_msh(path, points, cells, surfaces, binary=False, tags=None):
+    """MSH 4.1 file of cells of 2 zones (by x of first point) and one surface
+
+    Nodes are in 2 blocks with tags (1-based if None), unused point and
+    element of point are added.
+    """
+    rng = np.random.default_rng(16)
+    zone = (points[cells[:, 0], 0] >= points[:, 0].max() / 2).astype(int)
+    tags = np.arange(1, len(points) + 1) if tags is None else tags
+    points = np.concatenate([points, [[100., 100., 100.]]])  # unused
+    tags = np.concatenate([tags, [tags.max() + 1]])
+    cell_type = 4 if cells.shape[1] == 4 else 5
+    surface_type = 2 if surfaces.shape[1] == 3 else 3
+    element_blocks = [(0, 1, 15, np.array([[len(points) - 1]])),
+                      (2, 1, surface_type, surfaces),
+                      (3, 1, cell_type, cells[zone == 0]),
+                      (3, 2, cell_type, cells[zone == 1])]
+    entities = [[(1, ())], [], [(1, (1,))], [(1, (2,)), (2, (3,))]]
+    names = [(2, 1, 'Surface1'), (3, 2, 'Zone1'), (3, 3, 'Zone2')]
+    half = len(points) // 2
+    node_blocks = [(3, 1, tags[:half], points[:half]), (3, 2, tags[half:], points[half:])]
+    n_elements = sum(len(x[3]) for x in element_blocks)
+    with open(path, 'wb') as f:
+        f.write(f'$MeshFormat\n4.1 {int(binary)} 8\n'.encode())
+        if binary:
+            f.write(struct.pack('<i', 1) + b'\n')
+        f.write(b'$EndMeshFormat\n$Comments\nany text\n$EndComments\n')
+        f.write(f'$PhysicalNames\n{len(names)}\n'.encode())
+        f.write(''.join(f'{d} {t} "{x}"\n' for d, t, x in names).encode())
+        f.write(b'$EndPhysicalNames\n$Entities\n')
+        if binary:
+            f.write(struct.pack('<4Q', *[len(x) for x in entities]))
+            for dim, dim_entities in enumerate(entities):
+                for tag, physical in dim_entities:
+                    f.write(struct.pack('<i', tag) + rng.random(3 if dim == 0 else 6).tobytes())
+                    f.write(struct.pack(f'<Q{len(physical)}i', len(physical), *physical))
+                    if dim > 0:
+                        f.write(struct.pack('<Q2i', 2, 1, -1))
+            f.write(b'\n')
+        else:
+            f.write(f'{" ".join(str(len(x)) for x in entities)}\n'.encode())
+            for dim, dim_entities in enumerate(entities):
+                for tag, physical in dim_entities:
+                    box = ' '.join(['0'] * (3 if dim == 0 else 6))
+                    bounding = '' if dim == 0 else ' 2 1 -1'
+                    f.write(f'{tag} {box} {len(physical)} '
+                            f'{" ".join(map(str, physical))}{bounding}\n'.encode())
+        f.write(b'$EndEntities\n$Nodes\n')
+        if binary:
+            f.write(struct.pack('<4Q', len(node_blocks), len(points), tags.min(), tags.max()))
+            for dim, tag, x, y in node_blocks:
+                f.write(struct.pack('<3iQ', dim, tag, 0, len(x)))
+                f.write(x.astype('<u8').tobytes() + y.astype('<f8').tobytes())
+            f.write(b'\n')
+        else:
+            f.write(f'{len(node_blocks)} {len(points)} {tags.min()} {tags.max()}\n'.encode())
+            for dim, tag, x, y in node_blocks:
+                f.write(f'{dim} {tag} 0 {len(x)}\n'.encode())
+                f.write(''.join(f'{t}\n' for t in x.tolist()).encode())
+                f.write(''.join(f'{a!r} {b!r} {c!r}\n' for a, b, c in y.tolist()).encode())
+        f.write(b'$EndNodes\n$Elements\n')
+        header = [len(element_blocks), n_elements, 1, n_elements]
+        if binary:
+            f.write(struct.pack('<4Q', *header))
+        else:
+            f.write(f'{" ".join(map(str, header))}\n'.encode())
+        element_tag = 1
+        for dim, tag, element_type, x in element_blocks:
+            rows = np.column_stack([np.arange(element_tag, element_tag + len(x)), tags[x]])
+            element_tag += len(x)
+            if binary:
+                f.write(struct.pack('<3iQ', dim, tag, element_type, len(x)))
+                f.write(rows.astype('<u8').tobytes())
+            else:
+                f.write(f'{dim} {tag} {element_type} {len(x)}\n'.encode())
+                f.write(''.join(' '.join(map(str, r)) + '\n' for r in rows.tolist()).encode())
+        if binary:
+            f.write(b'\n')
+        f.write(b'$EndElements\n')
+    return zone
+
+
+def check_mesh(mesh, n_cells):
+    """Faces are closed, oriented from owner to neighbour and ordered"""
+    points, offsets, faces = mesh['points'], mesh['offsets'], mesh['faces']
+    owner, neighbour = mesh['owner'], mesh['neighbour']
+    n_internal = len(neighbour)
+    assert np.all(owner[:n_internal] < neighbour)
+    assert np.all(np.diff(owner[:n_internal].astype(np.int64) * n_cells + neighbour) > 0)
+    sizes = np.diff(offsets)
+    areas = np.zeros((len(sizes), 3))  # area vectors of faces
+    centers = np.zeros((len(sizes), 3))
+    for k in np.unique(sizes):
+        rows = np.flatnonzero(sizes == k)
+        x = points[faces[offsets[rows][:, None] + np.arange(k)]]
+        centers[rows] = x.mean(axis=1)
+        areas[rows] = 0.5 * np.cross(x, np.roll(x, -1, axis=1)).sum(axis=1)
+    cell_centers = np.zeros((n_cells, 3))
+    counts = np.bincount(owner, minlength=n_cells) + np.bincount(neighbour, minlength=n_cells)
+    np.add.at(cell_centers, owner, centers)
+    np.add.at(cell_centers, neighbour, centers[:n_internal])
+    cell_centers /= counts[:, None]
+    closed = np.zeros((n_cells, 3))
+    np.add.at(closed, owner, areas)
+    np.add.at(closed, neighbour, -areas[:n_internal])
+    assert np.allclose(closed, 0)
+    d = cell_centers[neighbour] - cell_centers[owner[:n_internal]]
+    assert np.all(np.einsum('ij,ij->i', d, areas[:n_internal]) > 0)
+    d = centers[n_internal:] - cell_centers[owner[n_internal:]]
+    assert np.all(np.einsum('ij,ij->i', d, areas[n_internal:]) > 0)
+    start = n_internal
+    for patch in mesh['boundary'].values():
+        assert patch['startFace'] == start
+        start += patch['nFaces']
+    assert start == len(owner)
+
+
+@pytest.mark.parametrize('binary', [False, True])
+@pytest.mark.parametrize('hexahedra', [False, True])
+@pytest.mark.parametrize('face_chunk', [100, msh.FACE_CHUNK])
+def test_poly_mesh(tmp_path, binary, hexahedra, face_chunk, n=4):
+    points, cells, surfaces = box_mesh(n, hexahedra)
+    tags = np.random.default_rng(17).permutation(len(points)) + 10
+    zone = write_msh(tmp_path / 'box.msh', points, cells, surfaces, binary, tags)
+    m = msh.load_msh(tmp_path / 'box.msh')
+    assert len(m['points']) == len(points) + 1
+    mesh = msh.poly_mesh(m, face_chunk)
+    n_cells = len(cells)
+    assert len(mesh['points']) == len(points)
+    k = cells.shape[1] == 4
+    n_boundary = 6 * n * n * (2 if k else 1)
+    n_faces = (n_cells * (4 if k else 6) + n_boundary) // 2
+    assert len(mesh['owner']) == n_faces and len(mesh['neighbour']) == n_faces - n_boundary
+    assert mesh['boundary'] == {
+        'Surface1': {'type': 'patch', 'nFaces': len(surfaces), 'startFace': n_faces - n_boundary},
+        'defaultFaces': {'type': 'patch', 'nFaces': n_boundary - len(surfaces),
+                         'startFace': n_faces - n_boundary + len(surfaces)}}
+    assert list(mesh['cellZones']) == ['Zone1', 'Zone2']
+    assert len(mesh['cellZones']['Zone1']) == np.count_nonzero(zone == 0)
+    check_mesh(mesh, n_cells)
+    surface_faces = mesh['offsets'][n_faces - n_boundary:][:len(surfaces)]
+    assert np.all(mesh['points'][mesh['faces'][surface_faces], 0] == 0)
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_convert(tmp_path, binary):
+    points, cells, surfaces = box_mesh(3)
+    write_msh(tmp_path / 'box.msh', points, cells, surfaces, binary)
+    files = msh.convert(tmp_path / 'box.msh', tmp_path / 'fenia', binary)
+    assert files == [f'constant/polyMesh/{x}' for x in
+                     ['points', 'faces', 'owner', 'neighbour', 'boundary', 'cellZones']]
+    mesh = foam.load_mesh(tmp_path / 'fenia' / 'constant' / 'polyMesh')
+    expected = msh.poly_mesh(msh.load_msh(tmp_path / 'box.msh'))
+    for name in ['points', 'offsets', 'faces', 'owner', 'neighbour']:
+        assert np.array_equal(mesh[name], expected[name]), name
+    assert mesh['boundary'] == expected['boundary']
+    assert list(mesh['cellZones']) == ['Zone1', 'Zone2']
+    case = FoamCase(tmp_path / 'fenia')
+    assert np.array_equal(case.mesh('owner'), expected['owner'])
+    assert np.array_equal(case.mesh('faces')[1], expected['faces'])
+    assert list(case.mesh('cellZones')) == ['Zone1', 'Zone2']
+
+
+def test_errors(tmp_path):
+    points, cells, surfaces = box_mesh(1)
+    write_msh(tmp_path / 'box.msh', points, cells, surfaces)
+    text = (tmp_path / 'box.msh').read_text()
+    (tmp_path / 'v2.msh').write_text(text.replace('4.1 0 8', '2.2 0 8'))
+    with pytest.raises(NotImplementedError):
+        msh.load_msh(tmp_path / 'v2.msh')
+    (tmp_path / 'cut.msh').write_text(text[:-40])
+    with pytest.raises(ValueError):
+        msh.load_msh(tmp_path / 'cut.msh')
+    m = msh.load_msh(tmp_path / 'box.msh')
+    m['cells'][4] = np.concatenate([m['cells'][4], m['cells'][4][:1]])  # face of 3 cells
+    m['cells_entities'][4] = np.concatenate([m['cells_entities'][4], [1]])
+    with pytest.raises(ValueError, match='more than 2 cells'):
+        msh.poly_mesh(m)
+
+
+def faces_reference(tetrahedra):
+    """Face by face map of sorted nodes of face to its cells"""
+    reference = {}
+    for cell, x in enumerate(tetrahedra.tolist()):
+        for face in msh.CELL_FACES[4]:
+            reference.setdefault(tuple(sorted(x[i] for i in face)), []).append(cell)
+    return reference
+
+
+def test_large(tmp_path, n=20):
+    points, cells, surfaces = box_mesh(n)
+    write_msh(tmp_path / 'box.msh', points, cells, surfaces, binary=True)
+    m = msh.load_msh(tmp_path / 'box.msh')
+    reference = faces_reference(m['cells'][4])
+    mesh = msh.poly_mesh(m)
+    assert len(reference) == len(mesh['owner'])
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_fenia_main(synthetic_model, tmp_path, binary):
+    points, cells, surfaces = box_mesh(3)
+    zone = write_msh(tmp_path / 'box.msh', points, cells, surfaces, binary)
+    file_path = synthetic_model('model.ifc', 20, zones=2, seed=9)
+    fenia_main(file_path, tmp_path / 'fenia', msh_path=tmp_path / 'box.msh',
+               binary=binary, cache=tmp_path / 'cache.sqlite')
+    output = {x.relative_to(tmp_path / 'fenia').as_posix() for x in
+              (tmp_path / 'fenia').rglob('*') if x.is_file()}
+    assert {'constant/polyMesh/cellZones', 'constant/T', 'constant/termProperty', '0/T',
+            '0/qW'}.issubset(output)
+    termProperty = foam.load(tmp_path / 'fenia' / 'constant' / 'termProperty', start_from=0)
+    mesh = foam.load_mesh(tmp_path / 'fenia' / 'constant' / 'polyMesh')
+    t = foam.load(tmp_path / 'fenia' / '0' / 'T', 'scalarField')
+    assert len(t) == len(cells)
+    for i, name in enumerate(['Zone1', 'Zone2']):
+        labels = mesh['cellZones'][name]
+        assert len(labels) == np.count_nonzero(zone == i)
+        assert np.all(t[labels] == termProperty[name][fields.FIELDS['T']])
@@ -1,6 +1,9 @@
+import pytest
+
 from ifc2gmsh.properties import main
 
 
+@pytest.mark.usefixtures('create_box_with_properties')
 def test_fenia_box_with_properties(box_props_path='box_with_properties.ifc',
                                    output_dir_path='gmsh_props'):
     main(box_props_path, output_dir_path)
@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+import ifcopenshell
+import pytest
+
+from ifc2gmsh.cache import Cache
+from ifc2gmsh.extraction import CACHE_NAME, PARTS
+from ifc2gmsh.geometry import main as geometry_main
+from ifc2gmsh.properties import main as properties_main
+from ifc2fenia.main import main as fenia_main
+
+CONVERTERS = {'geometry': geometry_main, 'properties': properties_main,
+              'fenia': fenia_main}
+
+
+def read_files(path):
+    path = Path(path)
+    return {x.relative_to(path): x.read_bytes() for x in path.rglob('*') if x.is_file()}
+
+
+def test_cache(synthetic_model, tmp_path, monkeypatch):
+    file_path = synthetic_model('synthetic_cache.ifc', 100, zones=2, seed=5)
+    cache_path = tmp_path / 'cache' / 'cache.sqlite'
+    for name, main in CONVERTERS.items():
+        main(file_path, tmp_path / 'reference' / name)
+    reference = read_files(tmp_path / 'reference')
+
+    opened = []
+    open_file = ifcopenshell.open
+
+    def counted_open(*args, **kwargs):
+        opened.append(args)
+        return open_file(*args, **kwargs)
+
+    # Converter extracts only parts that it needs, one opening of file for all of them
+    monkeypatch.setattr(ifcopenshell, 'open', counted_open)
+    geometry_main(file_path, tmp_path / 'output' / 'geometry', cache=cache_path)
+    assert len(opened) == 1
+    with Cache(cache_path) as cache:
+        files = {x: cache.get(cache.key(file_path, f'{CACHE_NAME}/{x}')) for x in PARTS}
+    assert files['gmsh_properties'] is None and files['fenia_conditions'] is None
+    assert {'summary.json'} == set(files['summary'])
+    assert {'swept.json', 'breps/0.npz'} <= set(files['items'])
+    assert {'keys.json', 'children.npz'} == set(files['children'])
+    assert all(isinstance(x, bytes) for x in files['items'].values())
+
+    # Converters share extracted parts of file
+    for name, main in CONVERTERS.items():
+        main(file_path, tmp_path / 'output' / name, cache=cache_path)
+    assert len(opened) == 3  # properties and fenia extract their parts
+    assert read_files(tmp_path / 'output') == reference
+    for name, main in CONVERTERS.items():
+        main(file_path, tmp_path / 'output' / name, cache=cache_path)
+    assert len(opened) == 3
+    assert read_files(tmp_path / 'output') == reference
+
+    # Changed file is extracted again
+    synthetic_model('synthetic_cache.ifc', 100, zones=2, seed=6)
+    geometry_main(file_path, tmp_path / 'output' / 'geometry', cache=cache_path)
+    assert len(opened) == 4
+
+
+def test_eviction(tmp_path):
+    with Cache(tmp_path / 'eviction.sqlite', max_size=3500) as cache:
+        values = {k: {'value': os.urandom(1000)} for k in 'abcd'}
+        for k in 'abc':
+            cache.put(k, values[k])
+        assert cache.get('a') == values['a']
+        cache.put('d', values['d'])
+        assert cache.get('b') is None
+        assert cache.get('a') == values['a']
+        assert cache.get('d') == values['d']
+        assert cache.size() <= 3500
+        cache.put('e', {'value': os.urandom(4000)})  # larger than cache
+        assert cache.get('e') is None and cache.get('d') == values['d']
+
+
+def test_eviction_hashes(tmp_path):
+    paths = [tmp_path / f'{k}.ifc' for k in 'abc']
+    for p in paths:
+        p.write_text(p.name)
+    with Cache(tmp_path / 'eviction.sqlite', max_hashes=2) as cache:
+        hashes = [cache.file_hash(p) for p in paths[:2]]
+        assert cache.file_hash(paths[0]) == hashes[0]  # a is used after b
+        cache.file_hash(paths[2])
+        rows = cache.connection.execute('SELECT path FROM hashes').fetchall()
+        assert sorted(Path(x).name for x, in rows) == ['a.ifc', 'c.ifc']
@@ -0,0 +1,57 @@
+from collections import Counter
+import json
+from pathlib import Path
+
+import ifcopenshell
+import ifcopenshell.util.element
+
+from ifc2gmsh.generator import generate
+from ifc2gmsh.geometry import main as geometry_main
+from ifc2fenia.main import main as fenia_main
+
+
+def test_generator(tmp_path, monkeypatch, n_products=200, depth=5, zones=3):
+    monkeypatch.chdir(tmp_path)
+    file_path = 'synthetic.ifc'
+    n_entities = generate(file_path, n_products, depth=depth, zones=zones, seed=1)
+    data = Path(file_path).read_bytes()
+    assert data.count(b'\n#') == n_entities
+    generate(file_path, n_products, depth=depth, zones=zones, seed=1)
+    assert Path(file_path).read_bytes() == data
+    generate(file_path, n_products, depth=depth, zones=zones, seed=2)
+    assert Path(file_path).read_bytes() != data
+
+    ifc = ifcopenshell.open(file_path)
+    products = ifc.by_type('IfcBuildingElementProxy')
+    assert len(products) == n_products
+    kinds = Counter(x.Name.rstrip('0123456789') for x in products)
+    assert set(kinds) == {'brep', 'rectangle', 'circle', 'hollow_circle', 'mapped'}
+    for product in products:
+        placement, n_levels = product.ObjectPlacement, 0
+        while placement.PlacementRelTo is not None:
+            placement, n_levels = placement.PlacementRelTo, n_levels + 1
+        assert n_levels == depth
+        assert ifcopenshell.util.element.get_container(product).Name == f'Storey{depth - 2}'
+        psets = ifcopenshell.util.element.get_psets(product)
+        assert set(psets) == {'IBRAE_Gmsh', 'IBRAE_Fenia'}
+    zones_names = Counter(ifcopenshell.util.element.get_psets(x)['IBRAE_Gmsh']['VolumeZones'][0]
+                          for x in products)
+    assert sorted(zones_names) == [f'Zone{x + 1}' for x in range(zones)]
+
+    geometry_main(file_path, 'gmsh')
+    with open(Path('gmsh') / 'main.json') as f:
+        assert len(json.load(f)['data']['children']) == n_products
+    fenia_main(file_path, 'fenia')
+    text = (Path('fenia') / 'constant' / 'termProperty').read_text()
+    assert all(f'Zone{x + 1}' in text for x in range(zones))
+
+
+def test_representations(synthetic_model):
+    file_path = synthetic_model('synthetic_mapped.ifc', 100,
+                                representations={'mapped': 1.}, sources=2, depth=1,
+                                properties=False)
+    ifc = ifcopenshell.open(str(file_path))
+    assert len(ifc.by_type('IfcRepresentationMap')) == 2
+    assert len(ifc.by_type('IfcMappedItem')) == 100
+    assert len(ifc.by_type('IfcPropertySet')) == 0
+    assert len(ifc.by_type('IfcBuildingStorey')) == 0
@@ -0,0 +1,25 @@
+from collections import Counter
+
+import ifcopenshell
+
+from ifc2gmsh.inventory import Inventory
+
+
+def test_inventory(synthetic_model):
+    file_path = synthetic_model('synthetic_inventory.ifc', 300, seed=3)
+    ifc = ifcopenshell.open(str(file_path))
+    inventory = Inventory(ifc)
+    assert inventory.statistics is None
+    assert inventory.items['Brep'] == [
+        y.id() for x in ifc.by_type('IfcShapeRepresentation')
+        if x.RepresentationType == 'Brep' for y in x.Items]
+    assert sorted(inventory.items['SweptSolid']) == sorted(
+        x.id() for x in ifc.by_type('IfcExtrudedAreaSolid'))
+    assert len(inventory.products) == len(ifc.by_type('IfcProduct'))
+    inventory = Inventory(ifc, statistics=True)
+    assert inventory.statistics['products'] == Counter(
+        x.is_a() for x in ifc.by_type('IfcProduct'))
+    assert inventory.statistics['items'] == Counter(
+        y.is_a() for x in ifc.by_type('IfcShapeRepresentation') for y in x.Items)
+    assert sum(inventory.statistics['types'].values()) == len(inventory.shapes)
+    inventory.print()
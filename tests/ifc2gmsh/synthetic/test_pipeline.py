@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import ifcopenshell
+
+from ifc2gmsh.geometry import main as geometry_main
+from ifc2gmsh.pipeline import main
+from ifc2gmsh.properties import main as properties_main
+from ifc2fenia.main import main as fenia_main
+
+
+def read_files(path):
+    path = Path(path)
+    return {x.relative_to(path): x.read_bytes() for x in path.rglob('*') if x.is_file()}
+
+
+def test_pipeline(synthetic_model, tmp_path, monkeypatch):
+    file_path = synthetic_model('synthetic_pipeline.ifc', 300, zones=2, seed=7)
+    monkeypatch.chdir(tmp_path)
+    geometry_main(file_path, 'separate/gmsh')
+    properties_main(file_path, 'separate/gmsh')
+    fenia_main(file_path, 'separate/fenia')
+
+    opened = []
+    open_file = ifcopenshell.open
+
+    def counted_open(*args, **kwargs):
+        opened.append(args)
+        return open_file(*args, **kwargs)
+
+    monkeypatch.setattr(ifcopenshell, 'open', counted_open)
+    main(file_path, 'pipeline', cache='cache/pipeline.sqlite')
+    assert len(opened) == 1
+    assert read_files('pipeline') == read_files('separate')
+    main(file_path, 'pipeline', cache='cache/pipeline.sqlite')
+    assert len(opened) == 1
+    assert read_files('pipeline') == read_files('separate')
@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+
+import ifcopenshell
+import ifcopenshell.util.element
+
+from ifc2gmsh.properties import get_gmsh_properties, main
+
+
+def test_properties(synthetic_model, tmp_path, monkeypatch, zones=3):
+    file_path = synthetic_model('synthetic_properties.ifc', 500, zones=zones, seed=4)
+    monkeypatch.chdir(tmp_path)
+    ifc = ifcopenshell.open(str(file_path))
+    products = ifc.by_type('IfcBuildingElementProxy')
+    gid2data = get_gmsh_properties(ifc)
+    assert len(gid2data) == len(products)
+    assert len({id(x) for x in gid2data.values()}) == zones
+    for product in products:
+        pset = ifcopenshell.util.element.get_psets(product)['IBRAE_Gmsh']
+        zone = gid2data[product.GlobalId]['data']['zone']
+        assert zone == [pset['VolumeZones'][0], pset['SurfacesZones']]
+        assert gid2data[product.GlobalId]['data']['boolean_level'] == pset['BooleanLevel']
+
+    global_ids = [x.GlobalId for x in products[::7]]
+    main(file_path, 'gmsh_properties', global_ids=global_ids)
+    files = sorted(x.name for x in Path('gmsh_properties').iterdir())
+    assert files == sorted(global_ids)
+    for gid in global_ids:
+        with open(Path('gmsh_properties') / gid) as f:
+            assert json.load(f) == gid2data[gid]
@@ -0,0 +1,45 @@
+import time
+
+import ifcopenshell
+
+from ifc2gmsh.geometry import parse_ifc_faceted_breps
+
+
+def parse_ifc_faceted_brep_reference(item):
+    """Per vertex parser, see parse_ifc_faceted_breps"""
+    zone_name = f'IfcFacetedBrep.{item.id()}'
+    gmsh_obj = {'data': {'class': 'block.Polyhedron', 'zone': zone_name}}
+    points_coordinates = {}
+    points_old2new = {}
+    polygons = []
+    for f in item.Outer.CfsFaces:  # IfcFace
+        polygon = []
+        for b in f.Bounds:  # IfcFaceOuterBound, IfcFaceBound
+            loop = []
+            for point in b.Bound.Polygon:  # IfcPolyLoop
+                new_id = points_old2new.setdefault(point.id(), len(points_old2new))
+                loop.append(new_id)
+                points_coordinates.setdefault(new_id, list(point.Coordinates))
+            polygon.append(loop)
+        if len(polygon) == 1:
+            polygon = polygon[0]
+        polygons.append(polygon)
+    n_points = len(points_coordinates)
+    gmsh_obj['data']['polygons'] = polygons
+    gmsh_obj['data']['points'] = [points_coordinates[x] for x in range(n_points)]
+    return gmsh_obj
+
+
+def test_brep(file_path='TUK_140.ifc'):
+    ifc = ifcopenshell.open(file_path)
+    items = ifc.by_type('IfcFacetedBrep')
+    print(f'items: {len(items)}')
+
+    t0 = time.perf_counter()
+    reference = [parse_ifc_faceted_brep_reference(x) for x in items]
+    t1 = time.perf_counter()
+    batched = parse_ifc_faceted_breps(items)
+    t2 = time.perf_counter()
+    print(f'reference: {t1 - t0:.3f}s, batched: {t2 - t1:.3f}s, '
+          f'speedup: {(t1 - t0) / (t2 - t1):.1f}')
+    assert batched == reference
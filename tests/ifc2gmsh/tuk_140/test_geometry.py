@@ -0,0 +1,159 @@
+import json
+import re
+from pathlib import Path
+
+import ifcopenshell
+import numpy as np
+
+from ifc2gmsh import geometry
+from ifc2gmsh.geometry import main
+
+
+def load_children_points(gmsh_path):
+    """World coordinates of points of main.json children"""
+    gmsh_path = Path(gmsh_path)
+    with open(gmsh_path / 'main.json') as f:
+        data = json.load(f)['data']
+    children_points = []
+    for child, transforms in zip(data['children'], data['children_transforms']):
+        with open(gmsh_path / child[1:]) as f:
+            points = np.array(json.load(f)['data']['points'])
+        points = np.c_[points, np.ones(len(points))]
+        for t in transforms:
+            points = points @ np.array(t).T
+        children_points.append(points[:, :3])
+    return children_points
+
+
+def load_children_zones(gmsh_path):
+    """Zones of main.json children, children_<zone> of main.json override them"""
+    gmsh_path = Path(gmsh_path)
+    with open(gmsh_path / 'main.json') as f:
+        data = json.load(f)['data']
+    children_zones = []
+    for i, child in enumerate(data['children']):
+        with open(gmsh_path / child[1:]) as f:
+            child_data = json.load(f)['data']
+        zones = {}
+        for name in ['zone', 'items_zone']:
+            zones[name] = child_data.get(name)
+            overrides = data.get(f'children_{name}')
+            if overrides is not None and overrides[i] is not None:
+                zones[name] = overrides[i]
+        children_zones.append(zones)
+    return children_zones
+
+
+def test_deduplicate(tmp_path, monkeypatch, file_path='TUK_140.ifc'):
+    file_path = Path(file_path).resolve()
+    monkeypatch.chdir(tmp_path)
+    main(file_path, 'gmsh')
+    main(file_path, 'gmsh_deduplicate', deduplicate=True)
+    main(file_path, 'gmsh_deduplicate_workers', workers=2, deduplicate=True)
+    files = sorted(x.name for x in Path('gmsh').iterdir())
+    unique_files = sorted(x.name for x in Path('gmsh_deduplicate').iterdir())
+    print(f'files: {len(files)}, unique files: {len(unique_files)}')
+    assert len(unique_files) < len(files)
+    for name in unique_files:
+        assert (Path('gmsh_deduplicate') / name).read_bytes() == \
+               (Path('gmsh_deduplicate_workers') / name).read_bytes()
+    for p, dp in zip(load_children_points('gmsh'),
+                     load_children_points('gmsh_deduplicate')):
+        assert np.allclose(p, dp, rtol=0, atol=1e-12)
+    assert load_children_zones('gmsh') == load_children_zones('gmsh_deduplicate')
+
+
+def test_workers(tmp_path, file_path='TUK_140.ifc'):
+    main(file_path, tmp_path / 'serial', batch_size=16)
+    main(file_path, tmp_path / 'parallel', workers=2, batch_size=16)
+    files = sorted(x.name for x in (tmp_path / 'serial').iterdir())
+    assert files == sorted(x.name for x in (tmp_path / 'parallel').iterdir())
+    for name in files:
+        assert (tmp_path / 'serial' / name).read_bytes() == \
+               (tmp_path / 'parallel' / name).read_bytes()
+
+
+def renumber(src_path, dst_path, function):
+    """Write model with entities renumbered by function of id"""
+    header, data = Path(src_path).read_text().split('DATA;', 1)
+    data = re.sub(r'#(\d+)\b', lambda m: f'#{function(int(m.group(1)))}', data)
+    Path(dst_path).write_text(f'{header}DATA;{data}')
+
+
+def test_incremental(tmp_path, monkeypatch, file_path='TUK_140.ifc',
+                     edit_path='TUK_140_edit.ifc', renumbered_path='TUK_140_renumbered.ifc',
+                     swapped_path='TUK_140_swapped.ifc'):
+    file_path = Path(file_path).resolve()
+    monkeypatch.chdir(tmp_path)
+    ifc = ifcopenshell.open(str(file_path))
+    breps = ifc.by_type('IfcFacetedBrep')
+    point = breps[3].Outer.CfsFaces[0].Bounds[0].Bound.Polygon[0]
+    point.Coordinates = tuple(x + 0.5 for x in point.Coordinates)
+    for x in ifc.get_inverse(breps[5]):
+        if x.is_a('IfcShapeRepresentation'):
+            x.Items = tuple(y for y in x.Items if y != breps[5])
+    ifc.write(edit_path)
+
+    main(file_path, 'gmsh_incremental', incremental=True)
+    mtimes = {x.name: x.stat().st_mtime_ns for x in Path('gmsh_incremental').iterdir()}
+    main(file_path, 'gmsh_incremental', incremental=True)
+    for x in Path('gmsh_incremental').iterdir():
+        if x.name not in ['main.json', 'manifest.json']:
+            assert x.stat().st_mtime_ns == mtimes[x.name]
+    # Renumbered entities keep keys of items (GlobalId of product and index),
+    # unchanged items are not parsed
+    renumber(file_path, renumbered_path, lambda x: x + 100000)
+    main_json = Path('gmsh_incremental/main.json').read_bytes()
+    parsed = []
+    gather_faceted_breps = geometry.gather_faceted_breps
+
+    def counted_gather(items):
+        parsed.extend(x.id() for x in items)
+        return gather_faceted_breps(items)
+
+    monkeypatch.setattr(geometry, 'gather_faceted_breps', counted_gather)
+    main(renumbered_path, 'gmsh_incremental', incremental=True)
+    assert parsed == []
+    for x in Path('gmsh_incremental').iterdir():
+        if x.name not in ['main.json', 'manifest.json']:
+            assert x.stat().st_mtime_ns == mtimes[x.name]
+    assert Path('gmsh_incremental/main.json').read_bytes() == main_json
+    main(edit_path, 'gmsh_incremental', incremental=True)
+    assert breps[3].id() in parsed and len(parsed) < len(breps)
+    main(edit_path, 'gmsh_edit')
+    files = sorted(x.name for x in Path('gmsh_edit').iterdir())
+    incremental_files = sorted(x.name for x in Path('gmsh_incremental').iterdir()
+                               if x.name != 'manifest.json')
+    assert files == incremental_files
+    for name in files:
+        assert (Path('gmsh_edit') / name).read_bytes() == \
+               (Path('gmsh_incremental') / name).read_bytes()
+    # Edited item takes id of unchanged one, files of items do not clash
+    edited_id, other_id = breps[3].id(), breps[4].id()
+    swap = {edited_id: other_id, other_id: edited_id}
+    renumber(edit_path, swapped_path, lambda x: swap.get(x, x))
+    main(file_path, 'gmsh_swapped_incremental', incremental=True)
+    main(swapped_path, 'gmsh_swapped_incremental', incremental=True)
+    main(swapped_path, 'gmsh_swapped')
+    with open('gmsh_swapped_incremental/main.json') as f:
+        children = json.load(f)['data']['children']
+    assert len(set(children)) == len(children)
+    files = sorted(x.name for x in Path('gmsh_swapped').iterdir())
+    incremental_files = sorted(x.name for x in Path('gmsh_swapped_incremental').iterdir()
+                               if x.name != 'manifest.json')
+    assert files == incremental_files
+    for p, ip in zip(load_children_points('gmsh_swapped'),
+                     load_children_points('gmsh_swapped_incremental')):
+        assert np.array_equal(p, ip)
+
+
+def test_profile(tmp_path, monkeypatch, file_path='TUK_140.ifc'):
+    file_path = Path(file_path).resolve()
+    monkeypatch.chdir(tmp_path)
+    main(file_path, 'gmsh_profile', profile=True)
+    with open('gmsh_profile.profile.json') as f:
+        report = json.load(f)
+    for stage in ['open', 'inventory', 'brep', 'write', 'placement']:
+        assert report['stages'][stage]['calls'] > 0
+    assert report['stages']['write']['calls'] == report['metadata']['breps'] + 1
+    assert report['peak_rss'] > 0
@@ -0,0 +1,60 @@
+import time
+
+import ifcopenshell
+from ifcopenshell.util.placement import get_local_placement
+import numpy as np
+import pytest
+
+from ifc2gmsh.placement import PlacementResolver
+
+
+def create_local_placement(ifc, point, axis, ref_direction, relative_to=None):
+    axis2placement = ifc.createIfcAxis2Placement3D(
+        ifc.createIfcCartesianPoint(point),
+        ifc.createIfcDirection(axis),
+        ifc.createIfcDirection(ref_direction))
+    return ifc.createIfcLocalPlacement(relative_to, axis2placement)
+
+
+def test_placement(file_path='TUK_140.ifc', depth=20, n_leaves=2000, seed=42):
+    ifc = ifcopenshell.open(file_path)
+    rng = np.random.default_rng(seed)
+    placements = [x.ObjectPlacement for x in ifc.by_type('IfcProduct')]
+    parent = placements[-1]
+    for _ in range(depth):
+        axis = rng.normal(size=3)
+        ref_direction = np.cross(axis, rng.normal(size=3))
+        parent = create_local_placement(
+            ifc, rng.normal(size=3).tolist(), axis.tolist(),
+            ref_direction.tolist(), parent)
+        placements.append(parent)
+    for _ in range(n_leaves):
+        placements.append(create_local_placement(
+            ifc, rng.normal(size=3).tolist(), (0., 0., 1.), (1., 0., 0.),
+            placements[rng.integers(len(placements))]))
+    placements.append(None)
+
+    t0 = time.perf_counter()
+    reference = np.stack([get_local_placement(x) for x in placements])
+    t1 = time.perf_counter()
+    resolver = PlacementResolver()
+    transforms = resolver.resolve(placements)
+    t2 = time.perf_counter()
+    print(f'placements: {len(placements)}, reference: {t1 - t0:.3f}s, '
+          f'resolver: {t2 - t1:.3f}s')
+    assert transforms.shape == (len(placements), 4, 4)
+    assert np.allclose(transforms, reference, rtol=0, atol=1e-12)
+    assert np.array_equal(resolver.local_placement(placements[0]), reference[0])
+
+
+def test_unsupported_placement():
+    ifc = ifcopenshell.file(schema='IFC4')
+    resolver = PlacementResolver()
+    assert resolver.resolve([]).shape == (0, 4, 4)
+    assert resolver.product_transforms([]).shape == (0, 4, 4)
+    grid_placement = ifc.createIfcGridPlacement()
+    local_placement = create_local_placement(
+        ifc, (1., 2., 3.), (0., 0., 1.), (1., 0., 0.), grid_placement)
+    for placements in [[grid_placement], [None, local_placement]]:
+        with pytest.raises(NotImplementedError, match='IfcGridPlacement'):
+            resolver.resolve(placements)